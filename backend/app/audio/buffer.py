@@ -2,54 +2,85 @@ import time
 import asyncio
 from collections import deque
 
+import numpy as np
+
 class JitterBuffer:
     """
-    A simple buffer to smooth out incoming results and optionally delay them
-    to match audio latency.
+    Holds items until their release time, in push order. By default an
+    item is released `delay_ms` after it arrives; push() can also give an
+    explicit `release_at`. Times are time.monotonic(), so wall-clock
+    adjustments never release items early or hold them forever.
     """
     def __init__(self, delay_ms=0):
         self.delay_ms = delay_ms
         self.queue = deque()
-        self._running = True
 
-    def push(self, data):
+    def __len__(self):
+        return len(self.queue)
+
+    def push(self, data, release_at=None):
         """
-        Push a new result into the buffer with its arrival timestamp.
+        Push a new item into the buffer with its arrival timestamp.
         """
+        received_at = time.monotonic()
+        if release_at is None:
+            release_at = received_at + self.delay_ms / 1000
         self.queue.append({
-            "received_at": time.time(),
+            "received_at": received_at,
+            "release_at": release_at,
             "data": data
         })
 
-    def pop_ready(self):
+    def next_release(self):
+        """Release time of the oldest item, or None if empty."""
+        return self.queue[0]["release_at"] if self.queue else None
+
+    def pop_ready(self, now=None):
         """
-        Returns all items that have been in the buffer longer than delay_ms.
+        Returns the items (oldest first) whose release time has passed.
+        An item that is not due yet holds back the ones behind it.
         """
-        now = time.time()
+        now = time.monotonic() if now is None else now
         ready = []
-        while self.queue:
-            # Check if the first item in queue is ready
-            if (now - self.queue[0]["received_at"]) * 1000 >= self.delay_ms:
-                ready.append(self.queue.popleft()["data"])
-            else:
-                break
+        while self.queue and self.queue[0]["release_at"] <= now:
+            ready.append(self.queue.popleft()["data"])
         return ready
 
+    async def wait_ready(self):
+        """Waits until the oldest item is due and returns the ready items."""
+        while self.queue:
+            ready = self.pop_ready()
+            if ready:
+                return ready
+            await asyncio.sleep(self.queue[0]["release_at"] - time.monotonic())
+        return []
+
 class AudioSyncBuffer:
     """
     Tracks audio processing time vs transcript arrival time.
     """
     def __init__(self):
         self.start_time = None
+        self.paused_at = None
         self.total_samples = 0
         self.sample_rate = 16000
 
     def start(self):
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
 
     def record_samples(self, count):
         self.total_samples += count
 
+    def pause(self):
+        """No audio will arrive for a while (the client is away)."""
+        self.paused_at = time.monotonic()
+
+    def resume(self):
+        """Audio arrives again; the time away does not count as drift."""
+        if self.paused_at is not None and self.start_time is not None:
+            self.start_time += time.monotonic() - self.paused_at
+        self.paused_at = None
+
     def get_audio_time(self):
         """Returns current position in audio stream in seconds."""
         return self.total_samples / self.sample_rate
@@ -58,5 +89,69 @@ class AudioSyncBuffer:
         """Returns the difference between real time and audio time."""
         if self.start_time is None:
             return 0
-        elapsed_real = time.time() - self.start_time
+        elapsed_real = time.monotonic() - self.start_time
         return elapsed_real - self.get_audio_time()
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of audio samples backed by one preallocated array.
+    Writes past capacity overwrite the oldest samples, so memory never grows.
+    """
+    def __init__(self, capacity: int, dtype=np.int16):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._start = 0
+        self._size = 0
+        self.dropped = 0  # samples overwritten before they were read
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def write(self, samples: np.ndarray):
+        """Append samples, discarding the oldest ones if the buffer is full."""
+        n = len(samples)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            self.dropped += self._size + n - self.capacity
+            self._data[:] = samples[-self.capacity:]
+            self._start = 0
+            self._size = self.capacity
+            return
+
+        overflow = max(0, self._size + n - self.capacity)
+        if overflow:
+            self.dropped += overflow
+            self._start = (self._start + overflow) % self.capacity
+            self._size -= overflow
+
+        end = (self._start + self._size) % self.capacity
+        first = min(n, self.capacity - end)
+        self._data[end:end + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self._size += n
+
+    def read(self, n: int, out: np.ndarray = None) -> np.ndarray:
+        """Remove and return the oldest n samples (fewer if not available)."""
+        n = min(n, self._size)
+        if out is None:
+            out = np.empty(n, dtype=self._data.dtype)
+        first = min(n, self.capacity - self._start)
+        out[:first] = self._data[self._start:self._start + first]
+        out[first:n] = self._data[:n - first]
+        self._start = (self._start + n) % self.capacity
+        self._size -= n
+        return out[:n]
+
+    def drain(self) -> np.ndarray:
+        """Remove and return everything in the buffer."""
+        return self.read(self._size)
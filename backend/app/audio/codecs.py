@@ -0,0 +1,285 @@
+from typing import Optional
+
+import numpy as np
+
+from app.audio.dsp_executor import dsp_executor
+from app.audio.resampler import StreamingResampler
+from app.core.metrics import AUDIO_OUT_BYTES, AUDIO_PCM_BYTES
+
+TTS_RATE = 24000  # bulbul:v3 output, what the client plays by default
+CODECS = ("pcm16", "mulaw", "alaw", "adpcm")
+OUTPUT_RATES = (24000, 16000)
+
+
+# --- G.711 (8 bits per sample) ---
+# Segment end points of the Sun reference implementation (g711.c)
+_ULAW_SEG_END = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32)
+_ALAW_SEG_END = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF], dtype=np.int32)
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+
+
+def mulaw_encode(samples: np.ndarray) -> bytes:
+    pcm = samples.astype(np.int32) >> 2  # 14-bit
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    seg = np.searchsorted(_ULAW_SEG_END, pcm)
+    uval = (seg << 4) | ((pcm >> (seg + 1)) & 0x0F)
+    uval = np.where(seg >= 8, 0x7F, uval)
+    return (uval ^ mask).astype(np.uint8).tobytes()
+
+
+def alaw_encode(samples: np.ndarray) -> bytes:
+    pcm = samples.astype(np.int32) >> 3  # 13-bit
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg = np.searchsorted(_ALAW_SEG_END, pcm)
+    shift = np.where(seg < 2, 1, seg)
+    aval = (np.minimum(seg, 7) << 4) | ((pcm >> shift) & 0x0F)
+    aval = np.where(seg >= 8, 0x7F, aval)
+    return (aval ^ mask).astype(np.uint8).tobytes()
+
+
+def _ulaw_table() -> np.ndarray:
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    t = (((u & 0x0F) << 3) + _ULAW_BIAS) << ((u & 0x70) >> 4)
+    return np.where(u & 0x80, _ULAW_BIAS - t, t - _ULAW_BIAS).astype(np.int16)
+
+
+def _alaw_table() -> np.ndarray:
+    a = np.arange(256, dtype=np.int32) ^ 0x55
+    t = (a & 0x0F) << 4
+    seg = (a & 0x70) >> 4
+    t = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+    return np.where(a & 0x80, t, -t).astype(np.int16)
+
+
+_ULAW_DECODE = _ulaw_table()
+_ALAW_DECODE = _alaw_table()
+
+
+def mulaw_decode(data: bytes) -> np.ndarray:
+    return _ULAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def alaw_decode(data: bytes) -> np.ndarray:
+    return _ALAW_DECODE[np.frombuffer(data, dtype=np.uint8)]
+
+
+# --- IMA ADPCM (4 bits per sample) ---
+# Wire format: a frame is a run of independent blocks, so any frame can be
+# decoded on its own (no state carried between frames). Each block is
+#   int16 LE   first sample (initial predictor)
+#   uint8      step index
+#   uint8      1 if the last nibble is padding, else 0
+#   nibbles    one per remaining sample, low nibble first
+# A full block holds ADPCM_BLOCK_SAMPLES samples in ADPCM_BLOCK_BYTES bytes.
+ADPCM_BLOCK_SAMPLES = 129
+ADPCM_BLOCK_BYTES = 4 + (ADPCM_BLOCK_SAMPLES - 1) // 2
+
+_IMA_STEPS = np.array([
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+    11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+    32767,
+], dtype=np.int32)
+_IMA_INDEX_ADJUST = np.array([-1, -1, -1, -1, 2, 4, 6, 8] * 2, dtype=np.int32)
+
+
+def _ima_tables():
+    """Per (step index, 3-bit magnitude): the decoder's reconstructed difference and next index."""
+    step = _IMA_STEPS[:, None]
+    code = np.arange(8)[None, :]
+    vpdiff = (step >> 3) + np.where(code & 4, step, 0) + np.where(code & 2, step >> 1, 0) + np.where(code & 1, step >> 2, 0)
+    next_index = np.clip(np.arange(89)[:, None] + _IMA_INDEX_ADJUST[:8][None, :], 0, 88)
+    # Flattened: entry = (index << 3) | magnitude
+    return vpdiff.astype(np.int32).ravel(), next_index.astype(np.int32).ravel()
+
+
+_IMA_VPDIFF, _IMA_NEXT_INDEX = _ima_tables()
+
+
+def adpcm_encode(samples: np.ndarray) -> bytes:
+    """
+    Encodes Int16 samples into IMA ADPCM blocks. The predictor is
+    sequential within a block, so the loop runs over sample positions and
+    every block of the frame advances at once (table lookups, no branches).
+    """
+    n = len(samples)
+    if n == 0:
+        return b""
+    n_blocks = -(-n // ADPCM_BLOCK_SAMPLES)
+    padded = np.empty(n_blocks * ADPCM_BLOCK_SAMPLES, dtype=np.int32)
+    padded[:n] = samples
+    padded[n:] = samples[-1]
+    blocks = padded.reshape(n_blocks, ADPCM_BLOCK_SAMPLES)
+
+    predictor = blocks[:, 0].copy()
+    # Blocks are coded in parallel, so each picks its starting step from its
+    # own opening slope instead of inheriting the previous block's
+    slope = np.abs(np.diff(blocks[:, :9], axis=1)).mean(axis=1)
+    index = np.minimum(np.searchsorted(_IMA_STEPS, slope), 88).astype(np.int32)
+    start_index = index.copy()
+    codes = np.empty((n_blocks, ADPCM_BLOCK_SAMPLES - 1), dtype=np.uint8)
+
+    for k in range(1, ADPCM_BLOCK_SAMPLES):
+        diff = blocks[:, k] - predictor
+        negative = diff < 0
+        # 3-bit magnitude: how many quarter steps the difference spans
+        magnitude = np.minimum((np.abs(diff) << 2) // _IMA_STEPS[index], 7)
+        entry = (index << 3) | magnitude
+        vpdiff = _IMA_VPDIFF[entry]
+        predictor = np.maximum(np.minimum(predictor + np.where(negative, -vpdiff, vpdiff), 32767), -32768)
+        index = _IMA_NEXT_INDEX[entry]
+        codes[:, k - 1] = magnitude | (negative << 3)
+
+    header = np.zeros((n_blocks, 4), dtype=np.uint8)
+    header[:, :2] = blocks[:, 0].astype("<i2").view(np.uint8).reshape(n_blocks, 2)
+    header[:, 2] = start_index
+    payload = (codes[:, 0::2] | (codes[:, 1::2] << 4)).astype(np.uint8)
+    body = np.concatenate((header, payload), axis=1).tobytes()
+
+    # Trim the last block to the samples it really holds
+    last = n - (n_blocks - 1) * ADPCM_BLOCK_SAMPLES
+    nibbles = last - 1
+    last_bytes = 4 + (nibbles + 1) // 2
+    out = bytearray(body[:(n_blocks - 1) * ADPCM_BLOCK_BYTES + last_bytes])
+    out[(n_blocks - 1) * ADPCM_BLOCK_BYTES + 3] = nibbles % 2
+    return bytes(out)
+
+
+def adpcm_decode(data: bytes) -> np.ndarray:
+    """Reference decoder (the extension has the same one in JavaScript)."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    out = []
+    for start in range(0, len(raw), ADPCM_BLOCK_BYTES):
+        block = raw[start:start + ADPCM_BLOCK_BYTES]
+        predictor = int(block[:2].view("<i2")[0])
+        index = int(block[2])
+        nibbles = np.empty(2 * (len(block) - 4), dtype=np.uint8)
+        nibbles[0::2] = block[4:] & 0x0F
+        nibbles[1::2] = block[4:] >> 4
+        if block[3]:
+            nibbles = nibbles[:-1]
+
+        samples = [predictor]
+        for code in nibbles.tolist():
+            step = int(_IMA_STEPS[index])
+            vpdiff = step >> 3
+            if code & 4:
+                vpdiff += step
+            if code & 2:
+                vpdiff += step >> 1
+            if code & 1:
+                vpdiff += step >> 2
+            predictor = predictor - vpdiff if code & 8 else predictor + vpdiff
+            predictor = max(-32768, min(32767, predictor))
+            index = max(0, min(88, index + int(_IMA_INDEX_ADJUST[code])))
+            samples.append(predictor)
+        out.append(np.array(samples, dtype=np.int16))
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.int16)
+
+
+_ENCODERS = {
+    "mulaw": mulaw_encode,
+    "alaw": alaw_encode,
+    "adpcm": adpcm_encode,
+}
+
+
+def negotiate_format(codecs: Optional[str] = None, rate=None):
+    """
+    Picks the outbound format from the client's query params: `codecs` is a
+    comma-separated preference list, `rate` the playback rate it wants.
+    Anything unsupported falls back to today's raw 24 kHz PCM.
+    """
+    codec = "pcm16"
+    for name in (codecs or "").split(","):
+        name = name.strip().lower()
+        if name in CODECS:
+            codec = name
+            break
+    try:
+        rate = int(rate) if rate else TTS_RATE
+    except ValueError:
+        rate = TTS_RATE
+    if rate not in OUTPUT_RATES:
+        rate = TTS_RATE
+    return codec, rate
+
+
+class AudioEncoder:
+    """
+    Encodes one outbound stream of TTS PCM (24 kHz Int16) into the
+    negotiated format. Rate conversion keeps filter state across frames,
+    so one encoder serves one stream.
+    """
+    def __init__(self, codec="pcm16", sample_rate=TTS_RATE, input_rate=TTS_RATE):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self.resampler = None
+        if sample_rate != input_rate:
+            self.resampler = StreamingResampler(input_rate, sample_rate)
+        self._encode = _ENCODERS.get(codec)
+        self._bytes_in = AUDIO_PCM_BYTES.labels(self.format_name)
+        self._bytes_out = AUDIO_OUT_BYTES.labels(self.format_name)
+
+    @property
+    def format_name(self) -> str:
+        return f"{self.codec}@{self.sample_rate // 1000}k"
+
+    @property
+    def passthrough(self) -> bool:
+        return self._encode is None and self.resampler is None
+
+    @property
+    def offload(self) -> bool:
+        return self.codec == "adpcm" or self.resampler is not None
+
+    def announcement(self) -> dict:
+        """JSON message telling the client how to decode what follows."""
+        return {"type": "audio_format", "codec": self.codec, "sample_rate": self.sample_rate}
+
+    def encode(self, frame) -> bytes:
+        """Encodes one frame of Int16 PCM (CPU only, safe on a DSP thread)."""
+        if self.passthrough:
+            return frame
+        if self.resampler is not None:
+            samples = self.resampler.process(frame)
+        else:
+            samples = np.frombuffer(frame, dtype=np.int16)
+        return samples.astype("<i2").tobytes() if self._encode is None else self._encode(samples)
+
+    async def encode_frame(self, frame) -> bytes:
+        """
+        Encodes on the event loop when it is cheap (G.711 is a few table
+        lookups) and on the DSP pool otherwise (ADPCM, rate conversion).
+        Frames arrive one at a time from the streamer, so order is kept.
+        """
+        if self.offload:
+            data = await dsp_executor.run(self.encode, frame)
+        else:
+            data = self.encode(frame)
+        self._bytes_in.inc(len(frame))
+        self._bytes_out.inc(len(data))
+        return data
+
+
+class EncodingSink:
+    """WebSocket wrapper that encodes outbound audio frames; JSON passes through."""
+    def __init__(self, websocket, encoder: AudioEncoder):
+        self.websocket = websocket
+        self.encoder = encoder
+
+    async def send_bytes(self, data):
+        data = await self.encoder.encode_frame(data)
+        if len(data):
+            await self.websocket.send_bytes(data)
+
+    async def send_json(self, message):
+        await self.websocket.send_json(message)
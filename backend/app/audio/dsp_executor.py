@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+
+
+class DSPExecutor:
+    """
+    Thread pool for CPU-bound per-session audio work (resampling, VAD).
+
+    NumPy, SciPy and torch release the GIL inside their kernels, so running
+    them on worker threads keeps the event loop free to receive, send to
+    Deepgram and stream TTS for every other session. With `enabled=False`
+    jobs run inline on the loop (the old behaviour), which is useful for
+    comparing event-loop lag.
+    """
+    def __init__(self, workers=2, enabled=True):
+        self.workers = workers
+        self.enabled = enabled
+        self._pool = None
+        self._stats_lock = threading.Lock()
+
+        # Stats
+        self.jobs = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+        self.run_time_max = 0.0
+
+    def _timed(self, submitted_at, fn, args):
+        started = time.monotonic()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.monotonic() - started
+            wait = started - submitted_at
+            with self._stats_lock:
+                self._record(wait, elapsed)
+
+    def _record(self, wait, elapsed):
+        self.jobs += 1
+        self.queue_wait_total += wait
+        self.queue_wait_max = max(self.queue_wait_max, wait)
+        self.run_time_total += elapsed
+        self.run_time_max = max(self.run_time_max, elapsed)
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) on a worker thread (or inline when disabled)."""
+        if not self.enabled:
+            return self._timed(time.monotonic(), fn, args)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dsp")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._timed, time.monotonic(), fn, args)
+
+    def session(self) -> "DSPSession":
+        return DSPSession(self)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        jobs = self.jobs
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "jobs": jobs,
+            "queue_wait_avg_ms": self.queue_wait_total / jobs * 1000 if jobs else 0.0,
+            "queue_wait_max_ms": self.queue_wait_max * 1000,
+            "run_avg_ms": self.run_time_total / jobs * 1000 if jobs else 0.0,
+            "run_max_ms": self.run_time_max * 1000,
+        }
+
+
+class DSPSession:
+    """
+    One session's view of the pool. Its jobs run one at a time in
+    submission order, because the resampler and VAD gate carry state from
+    chunk to chunk; different sessions still run in parallel.
+    """
+    def __init__(self, executor: DSPExecutor):
+        self.executor = executor
+        self._lock = asyncio.Lock()
+
+    async def run(self, fn, *args):
+        async with self._lock:
+            return await self.executor.run(fn, *args)
+
+
+# Shared by every session in this worker process
+dsp_executor = DSPExecutor(workers=settings.DSP_WORKERS, enabled=settings.DSP_OFFLOAD)
@@ -0,0 +1,136 @@
+import numpy as np
+
+SAMPLE_FORMATS = {"s16": np.dtype("<i2"), "f32": np.dtype("<f4")}
+MIN_RATE = 8000
+MAX_RATE = 192000
+MAX_CHANNELS = 2
+
+
+class IngestFormat:
+    """
+    What the client sends on the audio socket: sample rate, sample format
+    ("s16" little-endian Int16 or "f32" Float32, as Web Audio produces it),
+    interleaved channels, and samples per message (informational; used to
+    size the coalescer).
+    """
+    def __init__(self, sample_rate=44100, sample_format="s16", channels=1, frame_size=None):
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.channels = channels
+        self.frame_size = frame_size
+
+    @property
+    def dtype(self) -> np.dtype:
+        return SAMPLE_FORMATS[self.sample_format]
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.channels * self.dtype.itemsize
+
+    def is_native(self, target_rate: int) -> bool:
+        """True when the client already sends what ASR takes (mono Int16 at target_rate)."""
+        return self.sample_rate == target_rate and self.sample_format == "s16" and self.channels == 1
+
+    def describe(self) -> dict:
+        return {
+            "type": "ingest_format",
+            "sample_rate": self.sample_rate,
+            "sample_format": self.sample_format,
+            "channels": self.channels,
+            "frame_size": self.frame_size,
+        }
+
+    def __repr__(self):
+        return f"IngestFormat({self.sample_rate}Hz {self.sample_format} x{self.channels})"
+
+
+def parse_ingest_format(sample_rate=None, sample_format=None, channels=None, frame_size=None, default_rate=44100) -> IngestFormat:
+    """
+    Builds the format a client declared in its connect query params.
+    Missing values default to the extension's historic format (44.1 kHz
+    mono Int16). Raises ValueError for anything the server can't ingest.
+    """
+    rate = int(sample_rate) if sample_rate is not None else default_rate
+    if not MIN_RATE <= rate <= MAX_RATE:
+        raise ValueError(f"sample_rate must be {MIN_RATE}-{MAX_RATE} Hz, got {rate}")
+    fmt = (sample_format or "s16").lower()
+    if fmt not in SAMPLE_FORMATS:
+        raise ValueError(f"sample_format must be one of {sorted(SAMPLE_FORMATS)}, got {fmt!r}")
+    n_channels = int(channels) if channels is not None else 1
+    if not 1 <= n_channels <= MAX_CHANNELS:
+        raise ValueError(f"channels must be 1-{MAX_CHANNELS}, got {n_channels}")
+    frames = int(frame_size) if frame_size is not None else None
+    if frames is not None and frames <= 0:
+        raise ValueError(f"frame_size must be positive, got {frames}")
+    return IngestFormat(rate, fmt, n_channels, frames)
+
+
+class IngestDecoder:
+    """
+    Turns one client's audio messages into mono Int16 at the ASR rate.
+
+    Native input (mono Int16 at the target rate) is returned as a view of
+    the received bytes, with no copy and no filtering. Anything else goes
+    through the stream's own resampler (which also covers Float32 and
+    down-mixing).
+    """
+    def __init__(self, ingest_format: IngestFormat, resampler):
+        self.format = ingest_format
+        self.resampler = resampler
+        self.native = ingest_format.is_native(resampler.output_rate)
+
+    def process(self, data) -> np.ndarray:
+        if self.native:
+            return np.frombuffer(data, dtype=np.int16)
+        if self.format.sample_format == "s16" and self.format.channels == 1:
+            return self.resampler.process(data)
+
+        samples = np.frombuffer(data, dtype=self.format.dtype)
+        if self.format.channels > 1:
+            usable = len(samples) - len(samples) % self.format.channels
+            samples = samples[:usable].reshape(-1, self.format.channels).mean(axis=1)
+        if self.format.sample_format == "f32":
+            samples = samples * 32767.0
+        return np.clip(self.resampler.process_float(samples), -32768, 32767).astype(np.int16)
+
+
+class FrameCoalescer:
+    """
+    Joins small client messages into ASR-sized frames of at least
+    `min_bytes` (whole sample frames). This saves one DSP hop and one
+    Deepgram send per tiny message. Messages that are already big enough
+    pass through untouched when nothing is buffered.
+    """
+    def __init__(self, min_bytes: int, align: int = 2):
+        self.min_bytes = max(min_bytes - min_bytes % align, align)
+        self.align = align
+        self._buffer = bytearray()
+
+        # Stats
+        self.messages_in = 0
+        self.frames_out = 0
+
+    def push(self, data):
+        """Returns a frame to process, or None while still collecting."""
+        self.messages_in += 1
+        if not self._buffer and len(data) >= self.min_bytes and len(data) % self.align == 0:
+            self.frames_out += 1
+            return data
+        self._buffer += data
+        if len(self._buffer) < self.min_bytes:
+            return None
+        usable = len(self._buffer) - len(self._buffer) % self.align
+        frame = bytes(self._buffer[:usable])
+        del self._buffer[:usable]
+        self.frames_out += 1
+        return frame
+
+    def flush(self):
+        """Whatever whole samples are still buffered (or None)."""
+        usable = len(self._buffer) - len(self._buffer) % self.align
+        if not usable:
+            return None
+        frame = bytes(self._buffer[:usable])
+        del self._buffer[:usable]
+        self.frames_out += 1
+        return frame
@@ -0,0 +1,153 @@
+import time
+
+from app.audio.buffer import JitterBuffer
+from app.audio.codecs import TTS_RATE
+
+
+class PlayoutScheduler:
+    """
+    Keeps the dub at a steady lag behind the source.
+
+    Each sentence is registered with the time its source speech was heard
+    (`source_at`, monotonic). The client plays the audio it receives
+    back-to-back, so the scheduler can model its playback: `cursor` is when
+    the client will have played everything sent so far, and a sentence
+    starts at max(now, cursor) once its first frame goes out. Its lag is that
+    start minus `source_at`.
+
+    Two controls keep the lag within target ± band:
+    - release(): a sentence that would start before the band's lower edge is
+      held in a JitterBuffer until then (the dub waits for the speaker
+      instead of running ahead of the source timeline).
+    - pace(): a sentence about to be synthesized while the lag is above the
+      band is spoken faster, in proportion to the excess (TTS `pace`,
+      between min_pace and max_pace, in steps of 0.05 so cached audio is
+      reused). Within the band the base pace is used. Without holding,
+      sentences ahead of the band are spoken slower instead (down to
+      min_pace).
+    """
+    PACE_STEP = 0.05
+
+    def __init__(
+        self,
+        target_lag_s=3.0,
+        band_s=1.0,
+        base_pace=1.2,
+        min_pace=1.0,
+        max_pace=1.5,
+        hold=True,
+        adaptive_pace=True,
+        bytes_per_second=TTS_RATE * 2,
+        on_lag=None,
+    ):
+        self.target_lag_s = target_lag_s
+        self.band_s = band_s
+        self.base_pace = base_pace
+        self.min_pace = min_pace
+        self.max_pace = max_pace
+        self.hold = hold
+        self.adaptive_pace = adaptive_pace
+        self.bytes_per_second = bytes_per_second
+        self.on_lag = on_lag
+        self.jitter = JitterBuffer()
+        self.cursor = 0.0
+        self.current_pace = base_pace
+        self._source_at = {}  # sentence index -> monotonic time its speech was heard
+
+        # Stats
+        self.sentences = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.in_band = 0
+        self.held = 0
+        self.held_seconds = 0.0
+        self.paced = 0
+        self.pace_total = 0.0
+
+    def register(self, index: int, source_at):
+        """Sentence `index` translates speech heard at `source_at` (None = unknown)."""
+        if source_at is not None:
+            self._source_at[index] = source_at
+
+    def lag(self, index: int, now=None):
+        """The lag sentence `index` would have if it started as soon as possible."""
+        source_at = self._source_at.get(index)
+        if source_at is None:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(now, self.cursor) - source_at
+
+    def pace(self, index=None) -> float:
+        """
+        TTS pace for sentence `index`; without an index (speculative audio)
+        the pace of the latest decision.
+        """
+        lag = self.lag(index) if index is not None else None
+        if not self.adaptive_pace or lag is None:
+            return self.current_pace if self.adaptive_pace else self.base_pace
+
+        excess = lag - (self.target_lag_s + self.band_s)
+        shortfall = lag - (self.target_lag_s - self.band_s)
+        pace = self.base_pace
+        if excess > 0:
+            pace = self.base_pace * (1 + excess / self.target_lag_s)
+        elif shortfall < 0 and not self.hold:
+            # Nothing holds the dub back: speak slower instead
+            pace = self.base_pace * (1 + shortfall / self.target_lag_s)
+        pace = min(self.max_pace, max(self.min_pace, pace))
+        pace = round(round(pace / self.PACE_STEP) * self.PACE_STEP, 2)
+
+        self.current_pace = pace
+        self.paced += 1
+        self.pace_total += pace
+        return pace
+
+    async def release(self, index: int):
+        """
+        Called before the first frame of sentence `index` is sent; waits
+        while it would start ahead of the band. Returns its lag (None if
+        its source time is unknown).
+        """
+        source_at = self._source_at.pop(index, None)
+        if source_at is not None and self.hold:
+            release_at = source_at + self.target_lag_s - self.band_s
+            if release_at > max(time.monotonic(), self.cursor):
+                held_from = time.monotonic()
+                self.jitter.push(index, release_at)
+                await self.jitter.wait_ready()
+                self.held += 1
+                self.held_seconds += time.monotonic() - held_from
+
+        start = max(time.monotonic(), self.cursor)
+        self.cursor = start
+        if source_at is None:
+            return None
+
+        lag = start - source_at
+        self.sentences += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        if abs(lag - self.target_lag_s) <= self.band_s:
+            self.in_band += 1
+        if self.on_lag:
+            self.on_lag("playout_lag", lag)
+        return lag
+
+    def sent(self, nbytes: int):
+        """`nbytes` of PCM went to the client: its playback queue grew."""
+        self.cursor = max(self.cursor, time.monotonic()) + nbytes / self.bytes_per_second
+
+    def finished(self, index: int):
+        """Sentence `index` is done (or was skipped): forget it."""
+        self._source_at.pop(index, None)
+
+    def stats(self) -> dict:
+        return {
+            "sentences": self.sentences,
+            "lag_avg_s": round(self.lag_total / self.sentences, 3) if self.sentences else 0.0,
+            "lag_max_s": round(self.lag_max, 3),
+            "in_band": round(self.in_band / self.sentences, 3) if self.sentences else 0.0,
+            "held": self.held,
+            "held_avg_ms": round(self.held_seconds / self.held * 1000) if self.held else 0,
+            "pace_avg": round(self.pace_total / self.paced, 3) if self.paced else self.base_pace,
+        }
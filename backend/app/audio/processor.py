@@ -1,69 +1,76 @@
-import torch
-import numpy as np
 import math
-from scipy.signal import resample_poly
+import threading
+import time
+
+from app.audio.resampler import StreamingResampler
+from app.audio.vad import VADGate
+from app.audio.vad_model import VADStream, load_vad_model
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
 
 class AudioProcessor:
-    def __init__(self, browser_rate=44100, target_rate=16000, vad_threshold=0.5):
+    """
+    Shared audio setup for all sessions: resampling factors and the VAD
+    model. The model (and torch) is loaded on first use, or ahead of time
+    with load_model(), so importing the app stays fast.
+    """
+    def __init__(self, browser_rate=44100, target_rate=16000, vad_threshold=0.5, torch_threads=None, vad_model_path=None):
         self.browser_rate = browser_rate
         self.target_rate = target_rate
         self.vad_threshold = vad_threshold
         self.vad_window_size = 512  # Silero VAD requires exactly 512 samples at 16kHz
+        self.torch_threads = torch_threads
+        self.vad_model_path = vad_model_path  # .jit / .onnx file; None = torch.hub
         
         # Calculate resampling factors
         gcd = math.gcd(self.browser_rate, self.target_rate)
         self.up = self.target_rate // gcd
         self.down = self.browser_rate // gcd
         
-        print(f"🔄 Resampling: {self.browser_rate}Hz -> {self.target_rate}Hz (Factor: {self.up}/{self.down})")
+        log.info("🔄 Resampling", extra={"from_hz": self.browser_rate, "to_hz": self.target_rate, "factor": f"{self.up}/{self.down}"})
 
-        print("⏳ Loading VAD Model...")
-        self.model, utils = torch.hub.load(
-            repo_or_dir='snakers4/silero-vad',
-            model='silero_vad',
-            force_reload=False,
-            trust_repo=True
-        )
-        self.vad_iterator = utils[3] # VADIterator not used here but could be useful later
-        print("✅ VAD Model Loaded")
-        
-        self.vad_buffer = np.array([], dtype=np.int16)
+        self._vad_model = None
+        self._load_lock = threading.Lock()
+        self.load_seconds = None
 
-    def resample_chunk(self, raw_bytes: bytes) -> np.ndarray:
-        """
-        Convert bytes to Int16 Numpy array and resample to target rate.
-        """
-        # Convert bytes to Int16
-        audio_int16 = np.frombuffer(raw_bytes, dtype=np.int16)
+    @property
+    def is_ready(self) -> bool:
+        return self._vad_model is not None
 
-        # Resample using polyphase filtering
-        audio_resampled = resample_poly(audio_int16, self.up, self.down).astype(np.int16)
+    def load_model(self):
+        """Loads the VAD model once (thread-safe) and returns it."""
+        if self._vad_model is None:
+            with self._load_lock:
+                if self._vad_model is None:
+                    log.info("⏳ Loading VAD Model...", extra={"source": self.vad_model_path or "torch.hub"})
+                    start = time.monotonic()
+                    self._vad_model = load_vad_model(self.vad_model_path, self.target_rate, self.torch_threads)
+                    self.load_seconds = time.monotonic() - start
+                    log.info("✅ VAD Model Loaded", extra={"seconds": round(self.load_seconds, 2)})
+        return self._vad_model
 
-        return audio_resampled
+    def warm_up(self):
+        """Loads the model and designs the resampling filter before the first session."""
+        self.load_model()
+        self.create_resampler()
 
-    def process_with_vad(self, audio_int16: np.ndarray):
+    def create_resampler(self, input_rate=None) -> StreamingResampler:
         """
-        Add audio to buffer and return speech chunks.
+        Returns a new stateful resampler for one audio stream (one per session),
+        from `input_rate` (default: the browser rate) to the ASR rate.
         """
-        self.vad_buffer = np.concatenate((self.vad_buffer, audio_int16))
-        
-        speech_chunks = []
-        
-        while len(self.vad_buffer) >= self.vad_window_size:
-            # Extract chunk
-            chunk = self.vad_buffer[:self.vad_window_size]
-            self.vad_buffer = self.vad_buffer[self.vad_window_size:]
-
-            # Convert to Float32 for VAD (Normalize to -1.0 to 1.0)
-            audio_float32 = chunk.astype(np.float32) / 32768.0
-
-            # Convert numpy -> torch tensor
-            tensor = torch.from_numpy(audio_float32)
-
-            # Get speech confidence
-            speech_prob = self.model(tensor, self.target_rate).item()
+        return StreamingResampler(input_rate or self.browser_rate, self.target_rate)
 
-            if speech_prob > self.vad_threshold:
-                speech_chunks.append((chunk, speech_prob))
-                
-        return speech_chunks
+    def create_vad_gate(self, **kwargs) -> VADGate:
+        """
+        Returns a new speech gate for one audio stream (one per session).
+        """
+        return VADGate(
+            VADStream(self.load_model).score,
+            sample_rate=self.target_rate,
+            threshold=self.vad_threshold,
+            window_size=self.vad_window_size,
+            **kwargs
+        )
@@ -0,0 +1,166 @@
+import os
+import queue
+import threading
+import time
+import wave
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.audio.buffer import RingBuffer
+from app.core.log import get_logger
+
+log = get_logger("recorder")
+
+RECORD_MODES = ("off", "full", "rolling")
+
+
+class DiskWriter:
+    """
+    One background thread that performs every recording's file I/O in
+    submission order, so WAV writes never run on the event loop.
+    """
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((future, fn, args))
+        return future
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="wav-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            future, fn, args = self._queue.get()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:  # noqa: BLE001 - handed to the caller's future; the writer thread must outlive it
+                log.warning("⚠️ Recording write failed", extra={"error": repr(e)})
+                future.set_exception(e)
+
+
+disk_writer = DiskWriter()
+
+
+def _write_wav(path, sample_rate, chunks):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)  # 16-bit
+        wav_file.setframerate(sample_rate)
+        for chunk in chunks:
+            wav_file.writeframes(chunk)
+    return path
+
+
+def _open_wav(path, sample_rate):
+    """
+    Owns one WAV file for as long as it is being written: send() it frames,
+    close() it to finish the file (the `with` block closes it).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)  # 16-bit
+        wav_file.setframerate(sample_rate)
+        while True:
+            wav_file.writeframes((yield))
+
+
+class WavRecorder:
+    """
+    Records a whole session to `path`. Audio is batched in memory and
+    handed to the DiskWriter thread every `flush_bytes`.
+    """
+    def __init__(self, path, sample_rate=16000, flush_bytes=64 * 1024, writer=disk_writer):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.flush_bytes = flush_bytes
+        self.writer = writer
+        self._pending = []
+        self._pending_bytes = 0
+        self._wav = None  # _open_wav() generator, once the first frames arrive
+        self.bytes_written = 0
+
+    def write(self, samples: np.ndarray):
+        data = samples.tobytes()
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= self.flush_bytes:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self.writer.submit(self._write_frames, b"".join(self._pending))
+            self.bytes_written += self._pending_bytes
+            self._pending = []
+            self._pending_bytes = 0
+
+    # --- Writer thread ---
+    def _write_frames(self, data):
+        if self._wav is None:
+            self._wav = _open_wav(self.path, self.sample_rate)
+            next(self._wav)
+        self._wav.send(data)
+
+    def _close_file(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+        return self.path
+
+    def close(self) -> Future:
+        """Flushes and closes the file; the returned future resolves to the path."""
+        self._flush()
+        return self.writer.submit(self._close_file)
+
+    def dump(self, path=None):
+        """Nothing to do: everything is already on disk."""
+
+
+class RollingCapture:
+    """
+    Keeps only the last `seconds` of audio in a ring buffer; nothing touches
+    the disk unless dump() is called (e.g. when the session hits an error).
+    """
+    def __init__(self, path, sample_rate=16000, seconds=60.0, writer=disk_writer):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.writer = writer
+        self._ring = RingBuffer(int(seconds * sample_rate))
+
+    def write(self, samples: np.ndarray):
+        self._ring.write(samples)
+
+    def dump(self, path=None) -> Future:
+        """Writes the buffered audio to a WAV file in the background."""
+        snapshot = self._ring.read(len(self._ring))
+        return self.writer.submit(_write_wav, path or self.path, self.sample_rate, [snapshot.tobytes()])
+
+    def close(self):
+        self._ring.clear()
+
+
+def create_recorder(mode, session_id, directory, sample_rate=16000, rolling_seconds=60.0):
+    """
+    Per-session recorder for `mode` ("off", "full" or "rolling"), writing to
+    <directory>/<timestamp>-<session_id>[-error].wav. Returns None when off,
+    so the receive loop pays nothing for a disabled recorder.
+    """
+    if mode in (None, "", "off"):
+        return None
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    if mode == "full":
+        return WavRecorder(os.path.join(directory, f"{stamp}-{session_id}.wav"), sample_rate)
+    if mode == "rolling":
+        path = os.path.join(directory, f"{stamp}-{session_id}-error.wav")
+        return RollingCapture(path, sample_rate, seconds=rolling_seconds)
+    raise ValueError(f"Unknown recording mode: {mode}")
@@ -0,0 +1,155 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=8)
+def _design_filter_bank(up: int, down: int) -> np.ndarray:
+    """
+    Designs the same Kaiser low-pass filter that scipy's resample_poly uses
+    and splits it into `up` polyphase branches.
+
+    Row p holds the taps h[p], h[p + up], h[p + 2*up], ... stored in reverse
+    order, so a branch can be applied with a plain dot product against a
+    window of consecutive input samples (oldest first).
+    Banks are shared by every session that uses the same rate pair.
+    """
+    from scipy.signal import firwin  # deferred: scipy.signal is slow to import
+
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * up
+
+    taps_per_phase = math.ceil(len(h) / up)
+    padded = np.zeros(taps_per_phase * up, dtype=np.float64)
+    padded[:len(h)] = h
+
+    bank = padded.reshape(taps_per_phase, up).T[:, ::-1]
+    bank = np.ascontiguousarray(bank)
+    bank.setflags(write=False)
+    return bank
+
+
+class StreamingResampler:
+    """
+    Stateful polyphase resampler for a single audio stream.
+
+    The filter bank is designed once and the last few input samples are kept
+    between calls, so feeding a stream chunk by chunk produces exactly the
+    samples resample_poly would produce for the whole stream at once
+    (once `flush()` has drained the tail). No edge artifacts at chunk
+    boundaries and no per-chunk filter redesign.
+    """
+    def __init__(self, input_rate=44100, output_rate=16000):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+
+        gcd = math.gcd(input_rate, output_rate)
+        self.up = output_rate // gcd
+        self.down = input_rate // gcd
+        self.passthrough = self.up == self.down == 1
+
+        self.half_len = 10 * max(self.up, self.down)
+        self.bank = None if self.passthrough else _design_filter_bank(self.up, self.down)
+        self.taps_per_phase = 0 if self.passthrough else self.bank.shape[1]
+
+        self.reset()
+
+    def reset(self):
+        """Forgets all history, as if the stream had just started."""
+        # The last (taps_per_phase - 1) input samples; starts as the zero
+        # padding resample_poly applies before the first sample.
+        self._history = np.zeros(max(self.taps_per_phase - 1, 0), dtype=np.float64)
+        self._samples_in = 0   # total input samples consumed
+        self._samples_out = 0  # total output samples produced
+
+    @property
+    def delay_samples(self) -> int:
+        """Input samples of look-ahead the filter needs before an output is ready."""
+        if self.passthrough:
+            return 0
+        return self.half_len // self.up + 1
+
+    def _emit(self, total_in: int, last_out: int) -> np.ndarray:
+        """Computes outputs [self._samples_out, last_out) from history + buffered input."""
+        j = np.arange(self._samples_out, last_out, dtype=np.int64)
+        if len(j) == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        pos = j * self.down + self.half_len
+        newest = pos // self.up       # newest input sample index contributing to j
+        phase = pos - newest * self.up
+
+        # Index of the first sample in self._history, in stream coordinates.
+        base = total_in - len(self._history)
+        starts = newest - (self.taps_per_phase - 1) - base
+
+        windows = np.lib.stride_tricks.sliding_window_view(self._history, self.taps_per_phase)
+        return np.einsum("ij,ij->i", windows[starts], self.bank[phase])
+
+    def _output_ready(self, total_in: int) -> int:
+        """Number of outputs whose full filter support lies within total_in samples."""
+        # Output j needs input (j*down + half_len) // up, i.e. j*down + half_len < total_in*up.
+        ready = total_in * self.up - self.half_len
+        if ready <= 0:
+            return 0
+        return (ready - 1) // self.down + 1
+
+    def process_float(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Feeds a block of samples and returns every output sample that is now
+        fully determined, as float64.
+        """
+        if self.passthrough:
+            self._samples_in += len(samples)
+            self._samples_out += len(samples)
+            return np.asarray(samples, dtype=np.float64)
+
+        self._history = np.concatenate((self._history, samples.astype(np.float64, copy=False)))
+        total_in = self._samples_in + len(samples)
+
+        last_out = self._output_ready(total_in)
+        out = self._emit(total_in, last_out)
+
+        self._samples_in = total_in
+        self._samples_out = max(self._samples_out, last_out)
+        self._history = self._history[-(self.taps_per_phase - 1):].copy()
+        return out
+
+    def flush_float(self) -> np.ndarray:
+        """
+        Drains the filter tail (zero padding after the last input sample),
+        completing the output to the length resample_poly would return.
+        """
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float64)
+
+        total_out = -(-self._samples_in * self.up // self.down)
+        pad = self.delay_samples + self.taps_per_phase
+        self._history = np.concatenate((self._history, np.zeros(pad, dtype=np.float64)))
+        out = self._emit(self._samples_in + pad, total_out)
+
+        self._samples_in += pad
+        self._samples_out = max(self._samples_out, total_out)
+        self.reset()
+        return out
+
+    @staticmethod
+    def _to_int16(samples: np.ndarray) -> np.ndarray:
+        return np.clip(samples, -32768, 32767).astype(np.int16)
+
+    def process(self, raw_bytes: bytes) -> np.ndarray:
+        """
+        Convert Int16 PCM bytes to a resampled Int16 Numpy array.
+        """
+        audio_int16 = np.frombuffer(raw_bytes, dtype=np.int16)
+        if self.passthrough:
+            self._samples_in += len(audio_int16)
+            self._samples_out += len(audio_int16)
+            return audio_int16
+        return self._to_int16(self.process_float(audio_int16))
+
+    def flush(self) -> np.ndarray:
+        """Int16 version of flush_float()."""
+        return self._to_int16(self.flush_float())
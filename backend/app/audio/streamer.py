@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+from app.core.log import get_logger
+
+log = get_logger("streamer")
+
+
+class OrderedAudioStreamer:
+    """
+    Ensures that audio chunks from parallel sentence processing
+    are streamed to the WebSocket in correct order.
+
+    Each sentence index gets a bounded queue, created by whichever side asks
+    for it first, so the streamer simply awaits the next sentence's queue
+    instead of polling for it. When a queue is full the producer's put()
+    waits, which pushes backpressure into TTS for sentences the client is
+    not ready to hear yet. Chunks that are already waiting are coalesced into
+    a single WebSocket frame of up to `max_frame_bytes`.
+
+    If `on_span(stage, seconds)` is given it receives "queue_wait" (first
+    chunk of a sentence queued -> sent) and "ws_send" (one frame) timings.
+    With a `playout` scheduler (app.audio.playout), each sentence waits for
+    its release() before its first frame, and every frame sent is reported.
+    """
+    def __init__(self, websocket, max_queue_chunks=32, max_frame_bytes=16384, on_span=None, playout=None, name="streamer"):
+        self.websocket = websocket
+        self.on_span = on_span
+        self.playout = playout
+        self.max_queue_chunks = max_queue_chunks
+        self.max_frame_bytes = max_frame_bytes
+        self.next_index = 0
+        self.active_queues = {} # index -> asyncio.Queue
+        self._first_put_at = {} # index -> monotonic time of its first chunk
+        self._ending = set() # skipped while being sent with a full queue: ends once drained
+        self.closed = False
+        # True while sentence `next_index` is partly sent
+        self.sending = False
+
+        # Stats
+        self.chunks_in = 0
+        self.skipped = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+        self._stream_task = asyncio.create_task(self._stream_loop(), name=name)
+
+    def _queue_for(self, index: int) -> asyncio.Queue:
+        queue = self.active_queues.get(index)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.max_queue_chunks)
+            self.active_queues[index] = queue
+        return queue
+
+    async def put(self, index: int, chunk):
+        """Queue one audio chunk for a sentence; waits while that queue is full."""
+        if self.closed or index < self.next_index:
+            return
+        self.chunks_in += 1
+        if index not in self._first_put_at:
+            self._first_put_at[index] = time.monotonic()
+        await self._put(self._queue_for(index), chunk)
+
+    async def end(self, index: int):
+        """Mark a sentence as complete (also used for sentences with no audio)."""
+        if self.closed or index < self.next_index:
+            return
+        await self._put(self._queue_for(index), None)
+
+    async def _put(self, queue: asyncio.Queue, item):
+        await queue.put(item)
+        if self.closed:
+            # Closed while this producer waited. Each freed slot wakes only one
+            # waiting producer, so empty the queue again to wake the next ones
+            self._drain(queue)
+
+    @staticmethod
+    def _drain(queue: asyncio.Queue):
+        while not queue.empty():
+            queue.get_nowait()
+
+    def skip(self, index: int):
+        """
+        Marks a sentence that will never have audio (dropped by the
+        scheduler) so the stream moves past it. Does not wait, and discards
+        anything queued for it unless it is already being sent.
+        """
+        if self.closed or index < self.next_index:
+            return
+        queue = self._queue_for(index)
+        if not (index == self.next_index and self.sending):
+            self._drain(queue)
+            self._first_put_at.pop(index, None)
+        if queue.full():
+            # Only the sentence being sent keeps its queue, and its sender
+            # ends it once what is queued is out
+            self._ending.add(index)
+        else:
+            queue.put_nowait(None)
+        self.skipped += 1
+
+    async def _send_sentence(self, index: int, queue: asyncio.Queue):
+        first = True
+        while True:
+            if index in self._ending and queue.empty():
+                self._ending.discard(index)
+                return
+            chunk = await queue.get()
+            if chunk is None: # Sentinel for end of sentence
+                return
+            if first:
+                log.debug("📡 Now streaming sentence", extra={"sentence": index})
+                first = False
+                self.sending = True
+                queued_at = self._first_put_at.pop(index, None)
+                if self.on_span and queued_at is not None:
+                    self.on_span("queue_wait", time.monotonic() - queued_at)
+                if self.playout is not None:
+                    # Aligned to the source timeline (may hold the sentence back)
+                    await self.playout.release(index)
+
+            # Coalesce whatever else is already queued into one frame
+            parts = [chunk]
+            size = len(chunk)
+            finished = False
+            while size < self.max_frame_bytes and not queue.empty():
+                nxt = queue.get_nowait()
+                if nxt is None:
+                    finished = True
+                    break
+                parts.append(nxt)
+                size += len(nxt)
+
+            frame = parts[0] if len(parts) == 1 else b"".join(parts)
+            send_start = time.monotonic()
+            await self.websocket.send_bytes(bytes(frame))
+            if self.on_span:
+                self.on_span("ws_send", time.monotonic() - send_start)
+            self.frames_sent += 1
+            self.bytes_sent += size
+            if self.playout is not None:
+                self.playout.sent(size)
+
+            if finished:
+                return
+
+    async def _stream_loop(self):
+        """Background task that pulls from queues in order."""
+        try:
+            while True:
+                queue = self._queue_for(self.next_index)
+                await self._send_sentence(self.next_index, queue)
+
+                # Cleanup and move to next
+                del self.active_queues[self.next_index]
+                if self.playout is not None:
+                    self.playout.finished(self.next_index)
+                self.sending = False
+                self.next_index += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:  # noqa: BLE001 - whatever the socket raised, the stream is over; _close() frees the producers
+            log.error("❌ Streamer error", extra={"error": repr(e)})
+        finally:
+            self._close()
+
+    def _close(self):
+        """Stop accepting audio and release any producer blocked on a full queue."""
+        self.closed = True
+        for queue in self.active_queues.values():
+            self._drain(queue)
+        self.active_queues.clear()
+        self._first_put_at.clear()
+        self._ending.clear()
+
+    def cancel(self):
+        self._stream_task.cancel()
+        self._close()
@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+
+from app.audio.buffer import RingBuffer
+
+
+class VADGate:
+    """
+    Gates a 16kHz Int16 stream so only speech (plus a little context) is
+    forwarded to ASR.
+
+    Incoming audio is collected in a preallocated ring buffer and handed to
+    the scorer in batches of consecutive 512-sample windows. Silence is held in
+    a short preroll ring so the onset of a word is sent along with the first
+    speech window, and audio keeps flowing for a hangover period after speech
+    stops so trailing syllables are not clipped.
+
+    `score_fn` takes an Int16 array of shape (n_windows, window_size) and
+    returns one speech probability per window, scoring them in order (see
+    VADStream.score).
+    """
+    def __init__(
+        self,
+        score_fn,
+        sample_rate=16000,
+        threshold=0.5,
+        window_size=512,
+        preroll_ms=300,
+        hangover_ms=600,
+        max_batch=32,
+    ):
+        self.score_fn = score_fn
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.window_size = window_size
+        self.max_batch = max_batch
+
+        self.preroll_windows = math.ceil(preroll_ms * sample_rate / 1000 / window_size)
+        self.hangover_windows = math.ceil(hangover_ms * sample_rate / 1000 / window_size)
+
+        self._pending = RingBuffer(window_size * max_batch * 2)
+        self._preroll = RingBuffer(max(self.preroll_windows, 1) * window_size)
+        self._batch = np.empty((max_batch, window_size), dtype=np.int16)
+
+        self.is_speaking = False
+        self._hangover_left = 0
+
+        # Stats
+        self.windows_total = 0
+        self.windows_sent = 0
+
+    def reset(self):
+        self._pending.clear()
+        self._preroll.clear()
+        self.is_speaking = False
+        self._hangover_left = 0
+
+    def _score_batch(self, n_windows: int, out: list):
+        batch = self._batch[:n_windows]
+        for i in range(n_windows):
+            self._pending.read(self.window_size, out=batch[i])
+
+        probs = self.score_fn(batch)
+        self.windows_total += n_windows
+
+        for window, prob in zip(batch, probs):
+            if prob > self.threshold:
+                if not self.is_speaking and len(self._preroll):
+                    out.append(self._preroll.drain())
+                self.is_speaking = True
+                self._hangover_left = self.hangover_windows
+            elif self._hangover_left > 0:
+                self._hangover_left -= 1
+            else:
+                self.is_speaking = False
+
+            if self.is_speaking:
+                out.append(window.copy())
+                self.windows_sent += 1
+            elif self.preroll_windows:
+                self._preroll.write(window)
+
+    def process(self, audio_int16: np.ndarray) -> np.ndarray:
+        """
+        Feed resampled audio; returns the audio that should be sent to ASR
+        (possibly empty). Audio is delayed by at most one window.
+        """
+        out = []
+        offset = 0
+        while offset < len(audio_int16):
+            take = min(self._pending.free, len(audio_int16) - offset)
+            self._pending.write(audio_int16[offset:offset + take])
+            offset += take
+
+            while len(self._pending) >= self.window_size:
+                n = min(len(self._pending) // self.window_size, self.max_batch)
+                self._score_batch(n, out)
+
+        if not out:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(out)
+
+    @property
+    def sent_ratio(self) -> float:
+        """Fraction of scored windows that were forwarded to ASR."""
+        return self.windows_sent / self.windows_total if self.windows_total else 0.0
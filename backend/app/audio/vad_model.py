@@ -0,0 +1,127 @@
+import numpy as np
+
+SILERO_HUB_REPO = "snakers4/silero-vad"
+
+
+class VADStream:
+    """
+    Recurrent state of the VAD model for one audio stream (one per session).
+
+    Silero carries state from window to window, so windows must be scored
+    in order and streams must not share state. `score` is the `score_fn`
+    VADGate expects. The model is resolved on first use, so creating a
+    stream never blocks on loading it.
+    """
+    def __init__(self, model_loader):
+        self._loader = model_loader
+        self.model = None
+        self.state = None
+        self.context = None
+
+    def reset(self):
+        self.state = None
+        self.context = None
+
+    def score(self, windows: np.ndarray) -> np.ndarray:
+        """Speech probability for each Int16 window, shape (n, window_size)."""
+        if self.model is None:
+            self.model = self._loader()
+        return self.model.score(self, windows)
+
+
+class TorchScriptVAD:
+    """
+    Silero VAD as a TorchScript module (from a local .jit file or torch.hub).
+    The module's forward() keeps a single recurrent state on the module, so
+    it is not called. The stateless network it wraps (the graph that is also
+    exported to ONNX) is run with each stream's own state and context
+    instead. Nothing is shared between streams, so DSP threads score their
+    sessions in parallel without a lock.
+    """
+    STATE_SHAPE = (2, 1, 128)
+
+    def __init__(self, module, sample_rate=16000):
+        networks = dict(module.named_children())
+        self.network = networks["_model" if sample_rate == 16000 else "_model_8k"]
+        self.context_samples = self.network.context_size_samples
+        self.sample_rate = sample_rate
+
+    def score(self, stream: VADStream, windows: np.ndarray) -> np.ndarray:
+        import torch
+
+        audio = torch.from_numpy(windows.astype(np.float32) / 32768.0)
+        probs = np.empty(len(windows), dtype=np.float32)
+        with torch.inference_mode():
+            state = stream.state if stream.state is not None else torch.zeros(self.STATE_SHAPE)
+            context = stream.context if stream.context is not None else torch.zeros((1, self.context_samples))
+            for i in range(len(windows)):
+                frame = torch.cat([context, audio[i:i + 1]], dim=1)
+                out, state = self.network(frame, state)
+                probs[i] = out.item()
+                context = frame[:, -self.context_samples:]
+        stream.state = state
+        stream.context = context
+        return probs
+
+
+class OnnxVAD:
+    """
+    Silero VAD on onnxruntime: no torch needed at runtime. The graph is
+    stateless (state goes in and out explicitly), so streams need no lock.
+    """
+    CONTEXT_SAMPLES = 64  # at 16 kHz
+
+    def __init__(self, path, sample_rate=16000, threads=1):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.sample_rate = sample_rate
+        self._sr = np.array(sample_rate, dtype=np.int64)
+
+    def score(self, stream: VADStream, windows: np.ndarray) -> np.ndarray:
+        state = stream.state if stream.state is not None else np.zeros((2, 1, 128), dtype=np.float32)
+        context = stream.context if stream.context is not None else np.zeros((1, self.CONTEXT_SAMPLES), dtype=np.float32)
+
+        audio = windows.astype(np.float32) / 32768.0
+        probs = np.empty(len(windows), dtype=np.float32)
+        frame = np.empty((1, self.CONTEXT_SAMPLES + windows.shape[1]), dtype=np.float32)
+        for i in range(len(windows)):
+            frame[0, :self.CONTEXT_SAMPLES] = context
+            frame[0, self.CONTEXT_SAMPLES:] = audio[i]
+            out, state = self.session.run(None, {"input": frame, "state": state, "sr": self._sr})
+            probs[i] = out[0, 0]
+            context = frame[:, -self.CONTEXT_SAMPLES:].copy()
+        stream.state = state
+        stream.context = context
+        return probs
+
+
+def load_vad_model(path=None, sample_rate=16000, torch_threads=None):
+    """
+    Loads Silero VAD from `path` (.onnx via onnxruntime, anything else as
+    TorchScript) or, without a path, from torch.hub (needs network or a warm
+    hub cache).
+    """
+    if path and path.endswith(".onnx"):
+        return OnnxVAD(path, sample_rate, threads=torch_threads or 1)
+
+    import torch
+    if torch_threads:
+        # Several sessions score VAD in parallel on DSP threads; one
+        # intra-op thread each avoids oversubscribing the cores
+        torch.set_num_threads(torch_threads)
+
+    if path:
+        module = torch.jit.load(path, map_location="cpu")
+    else:
+        module, _ = torch.hub.load(
+            repo_or_dir=SILERO_HUB_REPO,
+            model="silero_vad",
+            force_reload=False,
+            trust_repo=True
+        )
+    module.eval()
+    return TorchScriptVAD(module, sample_rate)
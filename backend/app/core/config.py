@@ -13,8 +13,116 @@ class Settings:
     SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
     DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-    BROWSER_RATE = 44100
+    # Upstream endpoints (overridden to point at local stand-ins in benchmarks)
+    SARVAM_API_URL = os.getenv("SARVAM_API_URL", "https://api.sarvam.ai")
+    DEEPGRAM_URL = os.getenv("DEEPGRAM_URL") or None  # e.g. ws://127.0.0.1:9000
+    BROWSER_RATE = 44100  # ingest rate assumed when the client doesn't declare one
     TARGET_RATE = 16000
+    # Pre-warmed Deepgram sockets per worker (0 = connect per session), recycled
+    # after MAX_AGE; unfinalized audio kept for replay after a reconnect
+    ASR_POOL_SIZE = int(os.getenv("ASR_POOL_SIZE", "2"))
+    ASR_POOL_MAX_AGE_S = float(os.getenv("ASR_POOL_MAX_AGE_S", "300"))
+    ASR_REPLAY_SECONDS = float(os.getenv("ASR_REPLAY_SECONDS", "30"))
+    # Client audio messages are joined into frames of at least this length before DSP/ASR
+    INGEST_FRAME_MS = int(os.getenv("INGEST_FRAME_MS", "40"))
     VAD_THRESHOLD = 0.5
+    # Speech gating in front of ASR (silence is not sent to Deepgram)
+    VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "300"))
+    VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "600"))
+    # Local Silero model file (.jit TorchScript or .onnx via onnxruntime); unset = torch.hub
+    VAD_MODEL_PATH = os.getenv("VAD_MODEL_PATH") or None
+    # Load the model in the background at startup (/readyz turns 200 when done)
+    VAD_PRELOAD = os.getenv("VAD_PRELOAD", "true").lower() == "true"
+    # Translation cache (SQLite tier is disabled unless a path is given)
+    TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+    TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+    TRANSLATION_CACHE_DB = os.getenv("TRANSLATION_CACHE_DB") or None
+    # Synthesized audio cache (content-addressed PCM files)
+    TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "tts"))
+    TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+    TTS_CACHE_HOT_MB = int(os.getenv("TTS_CACHE_HOT_MB", "32"))
+    # ASR segmentation policy: "fixed" (6 words / 1.5s) or "adaptive"
+    SEGMENTER_POLICY = os.getenv("SEGMENTER_POLICY", "fixed")
+    LATENCY_TARGET_MS = int(os.getenv("LATENCY_TARGET_MS", "2500"))
+    # Per-session sentence scheduling: parallel translate+TTS jobs, and the
+    # budget from segment to first audio (late sentences fall back to text,
+    # then are dropped after the grace period)
+    SENTENCE_CONCURRENCY = int(os.getenv("SENTENCE_CONCURRENCY", "4"))
+    SENTENCE_BUDGET_MS = int(os.getenv("SENTENCE_BUDGET_MS", "6000"))
+    SENTENCE_TEXT_GRACE_MS = int(os.getenv("SENTENCE_TEXT_GRACE_MS", "4000"))
+    # Speculation: translate (and optionally synthesize) the next segment from
+    # interim ASR results that stayed the same for AGREEMENT results in a row;
+    # used if the final segment matches, otherwise wasted
+    SPECULATIVE_TRANSLATION = os.getenv("SPECULATIVE_TRANSLATION", "false").lower() == "true"
+    SPECULATIVE_TTS = os.getenv("SPECULATIVE_TTS", "false").lower() == "true"
+    SPECULATIVE_AGREEMENT = int(os.getenv("SPECULATIVE_AGREEMENT", "2"))
+    SPECULATIVE_MIN_WORDS = int(os.getenv("SPECULATIVE_MIN_WORDS", "3"))
+    # Playout: keep the dub PLAYOUT_TARGET_LAG_MS ± BAND behind the speaker.
+    # Sentences ahead of the band are held back (PLAYOUT_HOLD); while behind
+    # it, TTS speaks faster (up to TTS_PACE_MAX, PLAYOUT_ADAPTIVE_PACE)
+    PLAYOUT_TARGET_LAG_MS = int(os.getenv("PLAYOUT_TARGET_LAG_MS", "3000"))
+    PLAYOUT_LAG_BAND_MS = int(os.getenv("PLAYOUT_LAG_BAND_MS", "1000"))
+    PLAYOUT_HOLD = os.getenv("PLAYOUT_HOLD", "true").lower() == "true"
+    PLAYOUT_ADAPTIVE_PACE = os.getenv("PLAYOUT_ADAPTIVE_PACE", "true").lower() == "true"
+    TTS_PACE = float(os.getenv("TTS_PACE", "1.2"))
+    TTS_PACE_MIN = float(os.getenv("TTS_PACE_MIN", "1.0"))
+    TTS_PACE_MAX = float(os.getenv("TTS_PACE_MAX", "1.5"))
+    # Synthesize translated text clause by clause (lower time-to-first-audio)
+    TTS_CLAUSE_MODE = os.getenv("TTS_CLAUSE_MODE", "true").lower() == "true"
+    # Micro-batch TTS: segments arriving within the (adaptive) window share one multi-input request
+    TTS_BATCH_ENABLED = os.getenv("TTS_BATCH_ENABLED", "false").lower() == "true"
+    TTS_BATCH_WINDOW_MS = int(os.getenv("TTS_BATCH_WINDOW_MS", "40"))
+    TTS_BATCH_MAX_INPUTS = int(os.getenv("TTS_BATCH_MAX_INPUTS", "3"))
+    # Translate/TTS request resilience: hedge requests slower than the recent
+    # p95, retry retryable failures; hedges+retries add at most ~BUDGET extra
+    # load. Timeouts adapt to the recent p99 within MIN..MAX.
+    UPSTREAM_HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE_ENABLED", "true").lower() == "true"
+    UPSTREAM_HEDGE_BUDGET = float(os.getenv("UPSTREAM_HEDGE_BUDGET", "0.1"))
+    UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "1"))
+    UPSTREAM_TIMEOUT_MIN_MS = int(os.getenv("UPSTREAM_TIMEOUT_MIN_MS", "1000"))
+    UPSTREAM_TIMEOUT_MAX_MS = int(os.getenv("UPSTREAM_TIMEOUT_MAX_MS", "10000"))
+    # Shared outbound HTTP pool (Sarvam translate + TTS)
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "200"))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "100"))
+    HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "30"))
+
+    # CPU-bound audio work (resampling, VAD) runs on a thread pool off the event loop
+    DSP_OFFLOAD = os.getenv("DSP_OFFLOAD", "true").lower() == "true"
+    DSP_WORKERS = int(os.getenv("DSP_WORKERS", str(min(4, os.cpu_count() or 1))))
+    TORCH_THREADS = int(os.getenv("TORCH_THREADS", "1"))  # intra-op threads per VAD call; 0 = torch default
+    LOOP_LAG_INTERVAL_MS = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+
+    # Debug recording of the audio sent to ASR: "off", "full" or "rolling"
+    # (keep the last RECORD_ROLLING_SECONDS in memory, written only on error)
+    RECORD_MODE = os.getenv("RECORD_MODE", "off")
+    RECORD_ALLOW_CLIENT = os.getenv("RECORD_ALLOW_CLIENT", "false").lower() == "true"  # ?record=<mode>
+    RECORD_DIR = os.getenv("RECORD_DIR", os.path.join(BASE_DIR, "recordings"))
+    RECORD_ROLLING_SECONDS = float(os.getenv("RECORD_ROLLING_SECONDS", "60"))
+
+    # Broadcast rooms: frames queued per viewer before a slow one is resynced to the live edge
+    ROOM_SUBSCRIBER_QUEUE = int(os.getenv("ROOM_SUBSCRIBER_QUEUE", "256"))
+
+    # Resumable /ws/stream sessions: a dropped client may reconnect with its
+    # token within the grace period (0 = sessions end with their socket) and
+    # gets the output it had not acknowledged; up to BUFFER_KB of audio is kept
+    SESSION_RESUME_GRACE_S = float(os.getenv("SESSION_RESUME_GRACE_S", "30"))
+    SESSION_RESUME_BUFFER_KB = int(os.getenv("SESSION_RESUME_BUFFER_KB", "1024"))
+
+    # Admin diagnostics (/admin/*: stalls, tasks, profile) need this as a
+    # Bearer token; unset = the endpoints do not exist
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+    # Record the stack whenever the event loop is blocked longer than this
+    DIAG_STALL_DETECTOR = os.getenv("DIAG_STALL_DETECTOR", "true").lower() == "true"
+    DIAG_STALL_THRESHOLD_MS = int(os.getenv("DIAG_STALL_THRESHOLD_MS", "100"))
+    DIAG_PROFILE_MAX_SECONDS = float(os.getenv("DIAG_PROFILE_MAX_SECONDS", "60"))
+
+    # Logging: level name, and "text" (key=value) or "json" lines
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
 
 settings = Settings()
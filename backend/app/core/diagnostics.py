@@ -0,0 +1,252 @@
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from app.core.metrics import metrics
+
+LOOP_STALLS = metrics.counter(
+    "linguastream_event_loop_stalls_total",
+    "Times the event loop was blocked for longer than the stall threshold.",
+)
+
+# Pipeline tasks are named "<kind>[<session>/<lang>]<detail>" (see TranslationPipeline)
+_TASK_NAME = re.compile(r"^(\w+)\[(.+)\](.*)$")
+
+
+def _frame_name(code) -> str:
+    """`func (dir/file.py:line)` for a code object; stable across samples of the same function."""
+    path = code.co_filename
+    short = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _stack_of(frame, limit=40) -> list:
+    """Outermost-first list of "file:line in func" for a live frame."""
+    lines = []
+    while frame is not None and len(lines) < limit:
+        code = frame.f_code
+        lines.append(f"{code.co_filename}:{frame.f_lineno} in {code.co_name}")
+        frame = frame.f_back
+    return lines[::-1]
+
+
+class StallDetector:
+    """
+    Catches event-loop stalls while they happen. The loop bumps a heartbeat
+    every `threshold / 2`; a watchdog thread that sees it go stale by
+    `threshold` records the loop thread's stack at that moment (the code
+    blocking the loop) and the current task. When the loop runs again the
+    record gets the stall's full duration. The last `keep` stalls are kept.
+
+    Idle cost: one loop callback and two thread wake-ups per half-threshold.
+    """
+    def __init__(self, threshold=0.1, keep=50):
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self.stalls = deque(maxlen=keep)
+        self.count = 0
+        self.loop_thread = None
+        self._loop = None
+        self._last_beat = 0.0
+        self._current = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._handle = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="stall-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._thread = None
+
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._current is not None:
+                # The stall just ended
+                self._current["stalled_ms"] = round((now - self._last_beat - self.interval) * 1000, 1)
+                self._current["ongoing"] = False
+                self._current = None
+            self._last_beat = now
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                late = time.monotonic() - self._last_beat - self.interval
+                if late < self.threshold or self._current is not None:
+                    continue
+                frame = sys._current_frames().get(self.loop_thread)
+                task = asyncio.current_task(self._loop)
+                self._current = {
+                    "at": time.time(),
+                    "stalled_ms": round(late * 1000, 1),
+                    "ongoing": True,
+                    "task": task.get_name() if task is not None else None,
+                    "stack": _stack_of(frame),
+                }
+                self.stalls.append(self._current)
+                self.count += 1
+            LOOP_STALLS.inc()
+
+    def report(self) -> dict:
+        with self._lock:
+            stalls = [dict(stall) for stall in reversed(self.stalls)]
+        return {
+            "running": self._thread is not None,
+            "threshold_ms": self.threshold * 1000,
+            "stalls_total": self.count,
+            "recent": stalls,
+        }
+
+
+class Profile:
+    """Aggregated stack samples: {(thread, frame, ...): count}, outermost frame first."""
+    def __init__(self, hz, seconds):
+        self.hz = hz
+        self.seconds = seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack text (flamegraph.pl, speedscope import)."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self) -> dict:
+        """speedscope's file format: one sampled profile per thread, weights in seconds."""
+        frames, index = [], {}
+        profiles = {}
+        for stack, count in self.stacks.items():
+            thread, *names = stack
+            ids = []
+            for name in names:
+                if name not in index:
+                    index[name] = len(frames)
+                    frames.append({"name": name})
+                ids.append(index[name])
+            profile = profiles.setdefault(thread, {"samples": [], "weights": []})
+            profile["samples"].append(ids)
+            profile["weights"].append(count / self.hz)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"linguastream worker ({self.seconds}s @ {self.hz} Hz)",
+            "exporter": "linguastream",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(profile["weights"]),
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for thread, profile in profiles.items()
+            ],
+        }
+
+
+class SamplingProfiler:
+    """
+    On-demand wall-clock sampling profiler for the running worker: run()
+    reads thread stacks (sys._current_frames) `hz` times a second for
+    `seconds`, from the calling thread (use asyncio.to_thread). Nothing runs
+    between profiles. By default only the event-loop thread is sampled, and
+    samples where it is waiting in the selector (idle) are left out.
+    One profile at a time.
+    """
+    def __init__(self):
+        self.running = False
+
+    def run(self, seconds: float, hz=100, loop_thread=None, all_threads=False, include_idle=False) -> Profile:
+        if self.running:
+            raise RuntimeError("a profile is already running")
+        self.running = True
+        try:
+            return self._sample(seconds, hz, loop_thread, all_threads, include_idle)
+        finally:
+            self.running = False
+
+    def _sample(self, seconds, hz, loop_thread, all_threads, include_idle) -> Profile:
+        profile = Profile(hz, seconds)
+        me = threading.get_ident()
+        names = {}
+        period = 1.0 / hz
+        deadline = time.monotonic() + seconds
+        next_at = time.monotonic()
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (not all_threads and ident != loop_thread):
+                    continue
+                code = frame.f_code
+                if code.co_name == "select" and code.co_filename.endswith("selectors.py") and not include_idle:
+                    profile.idle_samples += 1
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                thread = "event-loop" if ident == loop_thread else names.get(ident, str(ident))
+                profile.stacks[(thread, *reversed(stack))] += 1
+                profile.samples += 1
+            next_at += period
+            time.sleep(max(0.0, next_at - time.monotonic()))
+        return profile
+
+
+def _await_chain(coro, limit=12) -> list:
+    """Where a suspended task is: its coroutine, and what that awaits, innermost last."""
+    chain = []
+    while coro is not None and len(chain) < limit:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            chain.append(f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return chain
+
+
+def task_dump() -> dict:
+    """
+    Live asyncio tasks of this worker (call on the event loop). Named
+    pipeline tasks (sentences, streamers) are grouped per session with where
+    each one is waiting; the rest are counted by coroutine.
+    """
+    sessions = {}
+    other = Counter()
+    for task in asyncio.all_tasks():
+        match = _TASK_NAME.match(task.get_name())
+        if match is None:
+            other[getattr(task.get_coro(), "__qualname__", "?")] += 1
+            continue
+        kind, session, detail = match.groups()
+        sessions.setdefault(session, {}).setdefault(kind, []).append({
+            "task": task.get_name(),
+            "detail": detail,
+            "done": task.done(),
+            "waiting_in": _await_chain(task.get_coro()),
+        })
+    return {
+        "tasks_total": sum(other.values()) + sum(len(t) for s in sessions.values() for t in s.values()),
+        "sessions": sessions,
+        "other": dict(other.most_common()),
+    }
@@ -0,0 +1,228 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_ATTEMPTS, UPSTREAM_HEDGE_WINS, UPSTREAM_TIMEOUTS
+
+
+class UpstreamError(Exception):
+    """A non-200 response from an upstream API."""
+    def __init__(self, status: int, body: str = ""):
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+        self.body = body
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx are worth another try; other 4xx are not."""
+    if isinstance(error, UpstreamError):
+        return error.retryable
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError))
+
+
+class LatencyTracker:
+    """Rolling window of recent request latencies (seconds) with quantiles."""
+    def __init__(self, window=200):
+        self.samples = deque(maxlen=window)
+        self._sorted = None
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.samples)
+
+    def quantile(self, q: float):
+        if not self.samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+class HedgedRequester:
+    """
+    Timeouts, hedging and retries for one upstream API (translate, TTS).
+
+    Timeouts adapt to the recent latency: `timeout_factor` x p99, within
+    [min_timeout, max_timeout]. Once warmed up, a request still pending
+    after the recent p95 gets a duplicate (a hedge); the first response
+    wins and the other request is cancelled. Retryable failures are retried
+    after a jittered exponential backoff. Hedges and retries both spend a
+    token bucket that refills by `budget` per call, so a struggling upstream
+    sees at most ~`budget` extra load rather than double.
+    """
+    def __init__(
+        self,
+        name: str,
+        hedge=True,
+        hedge_quantile=0.95,
+        budget=0.1,
+        max_tokens=10.0,
+        retries=1,
+        min_timeout=1.0,
+        max_timeout=10.0,
+        timeout_factor=3.0,
+        backoff_s=0.05,
+        min_samples=10,
+        window=200,
+    ):
+        self.name = name
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.budget = budget
+        self.max_tokens = max_tokens
+        self.retries = retries
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.backoff_s = backoff_s
+        self.min_samples = min_samples
+        self.latency = LatencyTracker(window)
+        self._tokens = max_tokens
+
+        # Stats
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.skipped_for_budget = 0
+
+    @property
+    def warm(self) -> bool:
+        return len(self.latency) >= self.min_samples
+
+    def timeout(self) -> float:
+        """Per-attempt timeout from the recent p99 (max_timeout until warmed up)."""
+        if not self.warm:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.latency.quantile(0.99) * self.timeout_factor))
+
+    def hedge_delay(self):
+        """How long to wait before hedging (None = don't hedge)."""
+        if not self.hedge or not self.warm:
+            return None
+        return self.latency.quantile(self.hedge_quantile)
+
+    def _spend_token(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        self.skipped_for_budget += 1
+        return False
+
+    async def call(self, request_fn):
+        """
+        Runs `request_fn()` (a coroutine function that returns the result or
+        raises) with hedging and retries. Raises the last error if every
+        attempt failed.
+        """
+        self.calls += 1
+        self._tokens = min(self.max_tokens, self._tokens + self.budget)
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(request_fn, "retry" if attempt else "primary")
+            except Exception as e:
+                if attempt >= self.retries or not is_retryable(e) or not self._spend_token():
+                    self.failures += 1
+                    raise
+            attempt += 1
+            self.retried += 1
+            # Full jitter, so clients that failed together don't retry together
+            await asyncio.sleep(random.uniform(0, self.backoff_s * 2 ** attempt))
+
+    async def _attempt(self, request_fn, kind: str):
+        UPSTREAM_ATTEMPTS.labels(self.name, kind).inc()
+        start = time.monotonic()
+        timeout = self.timeout()
+        try:
+            result = await asyncio.wait_for(request_fn(), timeout)
+        except asyncio.TimeoutError:
+            # Count the timeout as a slow sample so the estimate catches up
+            self.latency.observe(timeout)
+            self.timeouts += 1
+            UPSTREAM_TIMEOUTS.labels(self.name).inc()
+            raise
+        self.latency.observe(time.monotonic() - start)
+        return result
+
+    async def _hedged(self, request_fn, kind: str):
+        tasks = [asyncio.create_task(self._attempt(request_fn, kind))]
+        started = [time.monotonic()]
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._spend_token():
+                    self.hedges += 1
+                    tasks.append(asyncio.create_task(self._attempt(request_fn, "hedge")))
+                    started.append(time.monotonic())
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            self.hedge_wins += 1
+                            UPSTREAM_HEDGE_WINS.labels(self.name).inc()
+                        self._observe_losers(tasks, started, started[tasks.index(task)])
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The loser (or everything, if we were cancelled) is abandoned
+            for task in tasks:
+                task.cancel()
+
+    def _observe_losers(self, tasks, started, winner_start):
+        # A loser would have taken longer than the winner (which is already
+        # sampled) and at least as long as it has run. Leaving it out would
+        # bias the window towards the fast responses, and so would sampling
+        # a hedge that only just started.
+        now = time.monotonic()
+        winner_latency = now - winner_start
+        for task, start in zip(tasks, started):
+            if not task.done():
+                self.latency.observe(max(now - start, winner_latency))
+
+    def stats(self) -> dict:
+        p50 = self.latency.quantile(0.5)
+        p95 = self.latency.quantile(0.95)
+        return {
+            "calls": self.calls,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "timeout_ms": round(self.timeout() * 1000),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "retries": self.retried,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "over_budget": self.skipped_for_budget,
+        }
+
+
+def upstream_requester(name: str) -> HedgedRequester:
+    """A requester configured from the UPSTREAM_* settings."""
+    return HedgedRequester(
+        name,
+        hedge=settings.UPSTREAM_HEDGE_ENABLED,
+        budget=settings.UPSTREAM_HEDGE_BUDGET,
+        retries=settings.UPSTREAM_RETRIES,
+        min_timeout=settings.UPSTREAM_TIMEOUT_MIN_MS / 1000,
+        max_timeout=settings.UPSTREAM_TIMEOUT_MAX_MS / 1000,
+    )
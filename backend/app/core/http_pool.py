@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import aiohttp
+
+from app.core.config import settings
+
+
+class HTTPClientPool:
+    """
+    One pooled aiohttp session for all outbound REST calls (translate, TTS)
+    in this worker.
+
+    Every session shares the same keep-alive connections and DNS cache, so
+    a new viewer does not pay for fresh TLS handshakes. Request tracing feeds
+    counters for in-flight requests, connection reuse and time spent queued
+    waiting for a free connection, which is what tells us the pool is too small.
+    """
+    def __init__(
+        self,
+        limit=200,
+        limit_per_host=100,
+        dns_ttl=300,
+        keepalive_timeout=60.0,
+        connect_timeout=5.0,
+        total_timeout=30.0,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout)
+
+        self._session = None
+        self._loop = None
+
+        # Stats
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.queued = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+        async def on_request_done(session, ctx, params):
+            self.in_flight -= 1
+
+        async def on_queued_start(session, ctx, params):
+            ctx.queued_at = time.monotonic()
+
+        async def on_queued_end(session, ctx, params):
+            wait = time.monotonic() - ctx.queued_at
+            self.queued += 1
+            self.queue_wait_total += wait
+            self.queue_wait_max = max(self.queue_wait_max, wait)
+
+        async def on_create_end(session, ctx, params):
+            self.connections_created += 1
+
+        async def on_reuse(session, ctx, params):
+            self.connections_reused += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_done)
+        trace.on_request_exception.append(on_request_done)
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        trace.on_connection_create_end.append(on_create_end)
+        trace.on_connection_reuseconn.append(on_reuse)
+        return trace
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            trace_configs=[self._trace_config()],
+        )
+        self._loop = asyncio.get_running_loop()
+
+    async def start(self):
+        """Creates the pooled session (called from the app lifespan)."""
+        if self._session is None or self._session.closed:
+            self._create_session()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The shared session. Created on first use if the lifespan did not
+        start it (scripts, tests), and recreated if the event loop changed.
+        """
+        if self._session is None or self._session.closed or self._loop is not asyncio.get_running_loop():
+            self._create_session()
+        return self._session
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        reused = self.connections_reused
+        total_conns = reused + self.connections_created
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "utilization": self.in_flight / self.limit if self.limit else 0.0,
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": reused,
+            "reuse_rate": reused / total_conns if total_conns else 0.0,
+            "queued": self.queued,
+            "queue_wait_avg_ms": self.queue_wait_total / self.queued * 1000 if self.queued else 0.0,
+            "queue_wait_max_ms": self.queue_wait_max * 1000,
+        }
+
+
+# Shared by every session in this worker process
+http_pool = HTTPClientPool(
+    limit=settings.HTTP_POOL_LIMIT,
+    limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+    dns_ttl=settings.HTTP_DNS_TTL,
+    keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+    total_timeout=settings.HTTP_TOTAL_TIMEOUT,
+)
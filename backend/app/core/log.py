@@ -0,0 +1,72 @@
+import json
+import logging
+import sys
+
+from app.core.config import settings
+
+ROOT_LOGGER = "linguastream"
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _fields(record):
+    return {k: v for k, v in record.__dict__.items() if k not in _RESERVED}
+
+
+def _kv(value):
+    if isinstance(value, str) and (not value or " " in value or '"' in value):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class KeyValueFormatter(logging.Formatter):
+    """`12:00:01.234 INFO  linguastream.main  Translate done session=ab12 ms=231`"""
+    def format(self, record):
+        line = f"{self.formatTime(record, '%H:%M:%S')}.{int(record.msecs):03d} {record.levelname:<5} {record.name}  {record.getMessage()}"
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={_kv(v)}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ContextLogger(logging.LoggerAdapter):
+    """Adds fixed fields (e.g. the session id) to every record, merged with per-call `extra`."""
+    def process(self, msg, kwargs):
+        extra = kwargs.get("extra")
+        kwargs["extra"] = {**self.extra, **extra} if extra else self.extra
+        return msg, kwargs
+
+
+def configure_logging(level=None, fmt=None):
+    """Installs the app's handler on the `linguastream` logger (idempotent)."""
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel((level or settings.LOG_LEVEL).upper())
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter() if (fmt or settings.LOG_FORMAT) == "json" else KeyValueFormatter())
+    logger.handlers = [handler]
+    logger.propagate = False
+    return logger
+
+
+def get_logger(name: str, **context):
+    """Logger under the app namespace; keyword args become fields on every record."""
+    logger = logging.getLogger(f"{ROOT_LOGGER}.{name}")
+    return ContextLogger(logger, context) if context else logger
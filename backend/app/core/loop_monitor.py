@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from app.core.metrics import metrics
+
+LOOP_LAG = metrics.histogram(
+    "linguastream_event_loop_lag_seconds",
+    "How late the event loop ran a timer scheduled every LOOP_LAG_INTERVAL.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a task sleeps for `interval` and records how
+    much later than that it actually woke up. Anything running on the loop
+    without yielding (e.g. inline DSP) shows up here for every session.
+    """
+    def __init__(self, interval=0.1, histogram=LOOP_LAG):
+        self.interval = interval
+        self.histogram = histogram
+        self._task = None
+
+        # Stats
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.last_lag = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - expected)
+            self.samples += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            self.last_lag = lag
+            if self.histogram is not None:
+                self.histogram.observe(lag)
+
+    def stats(self) -> dict:
+        return {
+            "samples": self.samples,
+            "lag_avg_ms": self.lag_total / self.samples * 1000 if self.samples else 0.0,
+            "lag_max_ms": self.lag_max * 1000,
+            "lag_last_ms": self.last_lag * 1000,
+        }
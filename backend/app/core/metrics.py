@@ -0,0 +1,347 @@
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+# Seconds; covers a fast cache hit up to a stalled upstream call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _ValueChild:
+    __slots__ = ("fn", "value")
+
+    def __init__(self):
+        self.value = 0.0
+        self.fn = None
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, fn):
+        """Read the value from `fn()` at scrape time instead (free on the hot path)."""
+        self.fn = fn
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+
+class _Metric(ABC):
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values):
+        """Child for one label combination; cache it for repeated use."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def remove(self, *values):
+        self._children.pop(values, None)
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child (the per-label-set value) of this metric type."""
+
+    @abstractmethod
+    def _render_child(self, values, child):
+        """Exposition lines for one child."""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}"
+        labels = _format_labels(self.labelnames, values)
+        yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics with Prometheus text exposition.
+
+    Observing is a dict lookup plus a bisect, cheap enough for per-chunk
+    use on the event loop; hold on to `metric.labels(...)` children to skip
+    the lookup. Gauges can also be computed lazily at scrape time.
+    """
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry served at /metrics
+metrics = MetricsRegistry()
+
+STAGE_LATENCY = metrics.histogram(
+    "linguastream_stage_latency_seconds",
+    "Latency of each pipeline stage per sentence.",
+    ("stage", "lang"),
+)
+SESSIONS_ACTIVE = metrics.gauge(
+    "linguastream_sessions_active",
+    "Open /ws/stream sessions.",
+    ("lang",),
+)
+SENTENCES_IN_FLIGHT = metrics.gauge(
+    "linguastream_sentences_in_flight",
+    "Sentences dispatched but not yet fully synthesized.",
+    ("lang",),
+)
+SENTENCES_TOTAL = metrics.counter(
+    "linguastream_sentences_total",
+    "Sentences dispatched for translation.",
+    ("lang",),
+)
+SENTENCES_SKIPPED = metrics.counter(
+    "linguastream_sentences_skipped_total",
+    "Sentences that missed their deadline: expired (never started), cancelled (dropped mid-translation) or text_only (no audio).",
+    ("lang", "reason"),
+)
+SPECULATIONS = metrics.counter(
+    "linguastream_speculations_total",
+    "Speculative translations from interim ASR results: hit (used for the segment) or wasted.",
+    ("lang", "outcome"),
+)
+ASR_RECONNECTS = metrics.counter(
+    "linguastream_asr_reconnects_total",
+    "Deepgram sockets re-established mid-session (unfinalized audio replayed).",
+)
+SESSION_DRIFT = metrics.gauge(
+    "linguastream_session_drift_seconds",
+    "Wall-clock time minus audio time received, per open session.",
+    ("session", "lang"),
+)
+ROOMS_ACTIVE = metrics.gauge(
+    "linguastream_rooms_active",
+    "Open broadcast rooms (one ASR stream each).",
+)
+ROOM_SUBSCRIBERS = metrics.gauge(
+    "linguastream_room_subscribers",
+    "Sockets subscribed to broadcast rooms.",
+    ("lang",),
+)
+ROOM_RESYNCS = metrics.counter(
+    "linguastream_room_resyncs_total",
+    "Slow room subscribers whose backlog was dropped to rejoin the live edge.",
+    ("lang",),
+)
+SESSIONS_DETACHED = metrics.gauge(
+    "linguastream_sessions_detached",
+    "Sessions whose socket dropped, kept for their grace period.",
+)
+SESSION_RESUMES = metrics.counter(
+    "linguastream_session_resumes_total",
+    "Reconnects with a session token: resumed, or expired (unknown token, started afresh).",
+    ("outcome",),
+)
+AUDIO_PCM_BYTES = metrics.counter(
+    "linguastream_audio_pcm_bytes_total",
+    "Dubbed PCM bytes handed to the outbound encoder, by negotiated format.",
+    ("format",),
+)
+AUDIO_OUT_BYTES = metrics.counter(
+    "linguastream_audio_out_bytes_total",
+    "Dubbed audio bytes sent to clients after encoding, by negotiated format.",
+    ("format",),
+)
+UPSTREAM_ATTEMPTS = metrics.counter(
+    "linguastream_upstream_attempts_total",
+    "HTTP requests sent to upstream APIs: primary, hedge (duplicate of a slow request) or retry.",
+    ("service", "kind"),
+)
+UPSTREAM_HEDGE_WINS = metrics.counter(
+    "linguastream_upstream_hedge_wins_total",
+    "Hedged requests that answered before the original.",
+    ("service",),
+)
+UPSTREAM_TIMEOUTS = metrics.counter(
+    "linguastream_upstream_timeouts_total",
+    "Upstream request attempts that hit their adaptive timeout.",
+    ("service",),
+)
+
+
+class SessionMetrics:
+    """
+    Per-session handle on the shared metrics: stage spans land in the
+    histograms under this session's language, and the session shows up in
+    the gauges until close(). Broadcast rooms use handles with
+    `track_session=False` for their shared pipelines.
+    """
+    def __init__(self, session_id: str, lang: str, sync_buffer=None, track_session=True):
+        self.session_id = session_id
+        self.lang = lang
+        self.track_session = track_session
+        self._stages = {}
+        self._in_flight = SENTENCES_IN_FLIGHT.labels(lang)
+        self._sentences = SENTENCES_TOTAL.labels(lang)
+        self._drift = False
+        if track_session:
+            SESSIONS_ACTIVE.labels(lang).inc()
+        if sync_buffer is not None:
+            self.watch_drift(sync_buffer)
+        self.closed = False
+
+    def watch_drift(self, sync_buffer):
+        """Report this stream's drift (read lazily at scrape time)."""
+        SESSION_DRIFT.labels(self.session_id, self.lang).set_function(sync_buffer.get_latency)
+        self._drift = True
+
+    def observe(self, stage: str, seconds: float):
+        child = self._stages.get(stage)
+        if child is None:
+            child = self._stages[stage] = STAGE_LATENCY.labels(stage, self.lang)
+        child.observe(seconds)
+
+    def span(self, stage: str):
+        return _Span(self, stage)
+
+    def sentence_started(self):
+        self._sentences.inc()
+        self._in_flight.inc()
+
+    def sentence_finished(self):
+        self._in_flight.dec()
+
+    def sentence_skipped(self, reason: str):
+        SENTENCES_SKIPPED.labels(self.lang, reason).inc()
+
+    def speculation(self, outcome: str):
+        SPECULATIONS.labels(self.lang, outcome).inc()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.track_session:
+            SESSIONS_ACTIVE.labels(self.lang).dec()
+        if self._drift:
+            SESSION_DRIFT.remove(self.session_id, self.lang)
+
+
+class _Span:
+    """`with session_metrics.span("translate"):` times the block on the monotonic clock."""
+    __slots__ = ("_owner", "_stage", "_start")
+
+    def __init__(self, owner, stage):
+        self._owner = owner
+        self._stage = stage
+
+    def __enter__(self):
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self._owner.observe(self._stage, time.monotonic() - self._start)
+        return False
@@ -1,30 +1,88 @@
-import wave
 import asyncio
-import json
+import hmac
+import threading
 import uvicorn
-import time
-import aiohttp
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.websockets import WebSocketState
+from app.audio.codecs import AudioEncoder, EncodingSink, negotiate_format
+from app.audio.dsp_executor import dsp_executor
+from app.audio.ingest_format import parse_ingest_format
 from app.audio.processor import AudioProcessor
-from app.services.deepgram_client import DeepgramService
+from app.audio.recorder import RECORD_MODES, create_recorder
+from app.core.config import settings
+from app.core.diagnostics import SamplingProfiler, StallDetector, task_dump
+from app.core.http_pool import http_pool
+from app.core.log import configure_logging, get_logger
+from app.core.loop_monitor import LoopLagMonitor
+from app.core.metrics import SessionMetrics, metrics
+from app.services.asr_pool import asr_pool
+from app.services.broadcast import RoomRegistry
+from app.services.pipeline import SpeechIngest, TranslationPipeline
 from app.services.sarvam_translate_client import SarvamTranslateService
 from app.services.sarvam_tts_client import SarvamTTSService
+from app.services.sessions import ResumableSession, ResumableSink, SessionRegistry
+from app.services.translation_cache import translation_cache
+from app.services.tts_cache import tts_cache
 
-app = FastAPI()
+loop_monitor = LoopLagMonitor(interval=settings.LOOP_LAG_INTERVAL_MS / 1000)
+stall_detector = StallDetector(threshold=settings.DIAG_STALL_THRESHOLD_MS / 1000)
+profiler = SamplingProfiler()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP client for every session in this worker
+    await http_pool.start()
+    # Deepgram sockets are opened ahead of the sessions that will use them
+    asr_pool.start()
+    loop_monitor.start()
+    if settings.DIAG_STALL_DETECTOR:
+        stall_detector.start()
+    warm_up = None
+    if settings.VAD_PRELOAD:
+        # Load the VAD model off the event loop; the server answers /healthz meanwhile
+        warm_up = asyncio.create_task(asyncio.to_thread(processor.warm_up))
+    yield
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+    await sessions.close_all()
+    await loop_monitor.stop()
+    stall_detector.stop()
+    await asr_pool.close()
+    await http_pool.close()
+    dsp_executor.shutdown()
+    translation_cache.close()
+
+app = FastAPI(lifespan=lifespan)
+
+configure_logging()
+log = get_logger("main")
 
 # --- Configuration ---
-OUTPUT_FILE = "test_capture_speech_only.wav"
-BROWSER_RATE = 44100
-TARGET_RATE = 16000
 VAD_THRESHOLD = 0.5
 
+# Stateless REST clients, shared by all sessions (they use http_pool)
+translator_service = SarvamTranslateService()
+tts_service = SarvamTTSService()
+
 # Initialize Audio Processor
 processor = AudioProcessor(
-    browser_rate=BROWSER_RATE,
-    target_rate=TARGET_RATE,
-    vad_threshold=VAD_THRESHOLD
+    browser_rate=settings.BROWSER_RATE,
+    target_rate=settings.TARGET_RATE,
+    vad_threshold=VAD_THRESHOLD,
+    torch_threads=settings.TORCH_THREADS,
+    vad_model_path=settings.VAD_MODEL_PATH
 )
 
+# Broadcast rooms (content ID -> shared ASR + per-language pipelines)
+rooms = RoomRegistry(processor, translator_service, tts_service)
+
+# Resumable /ws/stream sessions (token -> session, kept for a grace period after a drop)
+sessions = SessionRegistry(grace_s=settings.SESSION_RESUME_GRACE_S)
+
 @app.get("/")
 def home():
     return {
@@ -32,166 +90,291 @@ def home():
         "asr_mode": "Deepgram (Cloud)"
     }
 
-class OrderedAudioStreamer:
+@app.get("/healthz")
+def liveness():
+    """The process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readiness():
+    """Ready for sessions once the VAD model is loaded (503 until then)."""
+    checks = {
+        "vad_model": processor.is_ready or not settings.VAD_ENABLED,
+        "http_pool": http_pool.started
+    }
+    ready = all(checks.values())
+    return JSONResponse(
+        {"ready": ready, "checks": checks, "vad_load_seconds": processor.load_seconds},
+        status_code=200 if ready else 503
+    )
+
+@app.get("/stats")
+def stats():
+    """Cache and connection pool counters for this worker."""
+    return {
+        "translation_cache": translation_cache.stats(),
+        "tts_cache": tts_cache.stats(),
+        "tts_batch": tts_service.batcher.stats() if tts_service.batcher else None,
+        "upstream": {"translate": translator_service.requester.stats(), "tts": tts_service.requester.stats()},
+        "http_pool": http_pool.stats(),
+        "asr_pool": asr_pool.stats(),
+        "dsp": dsp_executor.stats(),
+        "event_loop": loop_monitor.stats(),
+        "rooms": rooms.stats(),
+        "sessions": sessions.stats()
+    }
+
+def require_admin(authorization: str = Header(None)):
+    """Admin endpoints are hidden without ADMIN_TOKEN and need it as a Bearer token."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required")
+
+@app.get("/admin/stalls", dependencies=[Depends(require_admin)])
+def admin_stalls():
+    """Recent event-loop stalls, with the stack that was blocking the loop."""
+    return stall_detector.report()
+
+@app.get("/admin/tasks", dependencies=[Depends(require_admin)])
+async def admin_tasks():
+    """Live sentence and streamer tasks per session, and where each is waiting."""
+    return task_dump()
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_profile(seconds: float = 10.0, hz: int = 100, format: str = "speedscope", threads: str = "loop", idle: bool = False):
     """
-    Ensures that audio chunks from parallel sentence processing
-    are streamed to the WebSocket in correct order.
+    Samples the worker's stacks for `seconds` and returns a speedscope
+    profile (or collapsed stacks with format=collapsed). threads=all also
+    samples the DSP/helper threads; idle=true keeps the loop's idle samples.
     """
-    def __init__(self, websocket: WebSocket):
-        self.websocket = websocket
-        self.next_index = 0
-        self.active_queues = {} # index -> asyncio.Queue
-        self.lock = asyncio.Lock()
-        self._stream_task = asyncio.create_task(self._stream_loop())
-
-    async def _stream_loop(self):
-        """Background task that pulls from queues in order."""
-        try:
-            while True:
-                # Wait for the next queue to exist
-                while self.next_index not in self.active_queues:
-                    await asyncio.sleep(0.05)
-                
-                queue = self.active_queues[self.next_index]
-                print(f"📡 [Streamer] Now streaming sentence {self.next_index}")
-                
-                while True:
-                    chunk = await queue.get()
-                    if chunk is None: # Sentinel for end of sentence
-                        break
-                    await self.websocket.send_bytes(chunk)
-                
-                # Cleanup and move to next
-                async with self.lock:
-                    del self.active_queues[self.next_index]
-                    self.next_index += 1
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            print(f"❌ [Streamer] Error: {e}")
-
-    async def get_queue(self, index: int) -> asyncio.Queue:
-        async with self.lock:
-            if index not in self.active_queues:
-                self.active_queues[index] = asyncio.Queue()
-            return self.active_queues[index]
-    
-    def cancel(self):
-        self._stream_task.cancel()
+    if profiler.running:
+        return JSONResponse({"error": "A profile is already running"}, status_code=409)
+    seconds = min(max(seconds, 0.1), settings.DIAG_PROFILE_MAX_SECONDS)
+    hz = min(max(hz, 1), 1000)
+    log.info("🔬 Profiling", extra={"seconds": seconds, "hz": hz, "threads": threads})
+    try:
+        profile = await asyncio.to_thread(
+            profiler.run, seconds, hz,
+            loop_thread=threading.get_ident(),
+            all_threads=threads == "all",
+            include_idle=idle
+        )
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return JSONResponse(
+        profile.speedscope(),
+        headers={"Content-Disposition": 'attachment; filename="linguastream.speedscope.json"'}
+    )
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Stage latency histograms and session gauges (Prometheus text format)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+async def accept_ingest_format(websocket: WebSocket, slog, sample_rate, sample_format, channels, frame_size):
+    """
+    Validates the inbound format from the connect query params and confirms
+    it to the client. Unsupported formats close the socket (1003).
+    """
+    try:
+        ingest_format = parse_ingest_format(
+            sample_rate, sample_format, channels, frame_size,
+            default_rate=settings.BROWSER_RATE
+        )
+    except ValueError as e:
+        slog.warning("⚠️ Unsupported ingest format", extra={"error": str(e)})
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close(code=1003)
+        return None
+    await websocket.send_json(ingest_format.describe())
+    return ingest_format
 
 @app.websocket("/ws/stream")
-async def audio_stream(websocket: WebSocket, lang: str = "hi-IN"):
+async def audio_stream(
+    websocket: WebSocket,
+    lang: str = "hi-IN",
+    latency_ms: int = settings.LATENCY_TARGET_MS,
+    record: Optional[str] = None,
+    codecs: Optional[str] = None,
+    out_rate: Optional[int] = None,
+    sample_rate: Optional[int] = None,
+    sample_format: Optional[str] = None,
+    channels: Optional[int] = None,
+    frame_size: Optional[int] = None,
+    resume: Optional[str] = None,
+    last_seq: int = 0
+):
+    """
+    One client's dubbing session. The server's {"type": "session"} message
+    carries a token: a client whose socket drops reconnects with
+    ?resume=<token>&last_seq=<last message received> within the grace
+    period and continues the same session (ASR stream, sentences in flight,
+    unacknowledged audio). Clients acknowledge with {"type": "ack", "seq": n};
+    closing the socket normally (1000) ends the session.
+    """
     await websocket.accept()
-    asr_mode = "DEEPGRAM"
-    print(f"✅ Client Connected (Stream) | Target Lang: {lang} | ASR: {asr_mode}")
-
-    # --- Initialize Services ---
-    asr_service = DeepgramService()
-    translator_service = SarvamTranslateService()
-    tts_service = SarvamTTSService()
-    
-    # Shared HTTP session for all translation requests in this socket
-    http_session = aiohttp.ClientSession()
-    
-    # Ordered Streamer
-    audio_streamer = OrderedAudioStreamer(websocket)
-    
-    # Counter for preserving order
-    sentence_counter = 0
-
-    async def process_sentence(index: int, transcript_text: str):
-        """
-        Stage 2 (Translate) and Stage 3 (TTS) for a single sentence.
-        Runs in parallel with other sentences.
-        """
-        queue = await audio_streamer.get_queue(index)
-        try:
-            # --- Stage 2: Translation (Sarvam) ---
-            start_translate = time.time()
-            target_text = await translator_service.translate(
-                transcript_text, 
-                target_lang=lang, 
-                session=http_session
-            )
-            print(f"🔄 [S{index}] Translate took {time.time()-start_translate:.2f}s | Text: {target_text}")
-
-            if target_text:
-                # Send Target transcript to UI
-                try:
-                    await websocket.send_json({
-                        "type": "transcript",
-                        "text": target_text,
-                        "lang": lang,
-                        "is_final": True
-                    })
-                except Exception:
-                    pass
-
-                # --- Stage 3: TTS (Sarvam) ---
-                start_tts = time.time()
-                first_byte_time = None
-                
-                async for audio_chunk in tts_service.text_to_speech_stream(target_text, target_lang=lang, session=http_session):
-                    if first_byte_time is None:
-                        first_byte_time = time.time()
-                        print(f"⚡ [S{index}] First byte of TTS in {first_byte_time-start_tts:.2f}s")
-                    
-                    if audio_chunk:
-                        await queue.put(audio_chunk)
-                
-                print(f"🗣️ [S{index}] TTS Gen Finished. Total time: {time.time()-start_tts:.2f}s")
-                
-        except Exception as e:
-            print(f"⚠️ [S{index}] Error: {e}")
-        finally:
-            # Signal end of sentence audio
-            await queue.put(None)
-
-    async def on_transcript_received(transcript_text, is_final):
-        nonlocal sentence_counter
-        if is_final and transcript_text:
-            print(f"🎤 [ASR] S{sentence_counter}: {transcript_text}")
-            # Launch parallel task for this sentence
-            asyncio.create_task(process_sentence(sentence_counter, transcript_text))
-            sentence_counter += 1
-
-    # --- Start ASR Service ---
-    await asr_service.connect(on_transcript_callback=on_transcript_received)
-
-    # Open WAV file for debug recording
-    with wave.open(OUTPUT_FILE, "wb") as wav_file:
-        wav_file.setnchannels(1)
-        wav_file.setsampwidth(2) # 16-bit
-        wav_file.setframerate(TARGET_RATE)
+    session = sessions.claim(resume) if resume else None
+    if session is not None:
+        slog = session.log
+        ingest_format = await accept_ingest_format(websocket, slog, sample_rate, sample_format, channels, frame_size)
+        if ingest_format is None:
+            await sessions.release(session, websocket)
+            return
+        if repr(ingest_format) != repr(session.ingest.ingest_format):
+            session.ingest.set_format(ingest_format)
+        # The session keeps its output format (the replay is already encoded)
+        await websocket.send_json(session.encoder.announcement())
+    else:
+        session_id = uuid.uuid4().hex[:8]
+        slog = get_logger("session", session=session_id, lang=lang)
+        if resume:
+            slog.info("⌛ Unknown or expired session token, starting afresh")
+
+        # Inbound audio format the client declared (default: 44.1 kHz mono Int16)
+        ingest_format = await accept_ingest_format(websocket, slog, sample_rate, sample_format, channels, frame_size)
+        if ingest_format is None:
+            return
+
+        # Outbound audio format: the client lists the codecs it can decode, best first
+        encoder = AudioEncoder(*negotiate_format(codecs, out_rate))
+        await websocket.send_json(encoder.announcement())
+        slog.info("✅ Client connected (stream)", extra={"asr": "deepgram", "audio_in": repr(ingest_format), "audio_out": encoder.format_name})
+        session_metrics = SessionMetrics(session_id, lang)
+
+        # Debug capture of the audio sent to ASR ("full" file or "rolling" last-N-seconds).
+        # Off unless configured; clients may only pick a mode when allowed.
+        record_mode = record if (record in RECORD_MODES and settings.RECORD_ALLOW_CLIENT) else settings.RECORD_MODE
+        recorder = create_recorder(
+            record_mode,
+            session_id,
+            settings.RECORD_DIR,
+            sample_rate=settings.TARGET_RATE,
+            rolling_seconds=settings.RECORD_ROLLING_SECONDS
+        )
 
+        # --- Initialize Services ---
+        # Stages 2+3 stream to the session's sink, which outlives this socket;
+        # stage 1 feeds them segments
+        sink = ResumableSink(sessions.new_token(), max_unacked_bytes=settings.SESSION_RESUME_BUFFER_KB * 1024)
+        output = sink if encoder.passthrough else EncodingSink(sink, encoder)
+        pipeline = TranslationPipeline(output, lang, translator_service, tts_service, slog, session_metrics)
+        ingest = SpeechIngest(
+            processor,
+            on_segment=pipeline.submit,
+            log=slog,
+            metrics=session_metrics,
+            latency_ms=latency_ms,
+            backlog_fn=lambda: pipeline.in_flight,
+            recorder=recorder,
+            ingest_format=ingest_format,
+            on_preview=pipeline.speculate if pipeline.speculator else None
+        )
+        session = ResumableSession(session_id, slog, session_metrics, sink, encoder, ingest, pipeline, recorder)
+        sessions.add(session)
+
+        # --- Start ASR Service ---
         try:
-            while True:
-                data = await websocket.receive_bytes()
-                audio_resampled = processor.resample_chunk(data)
-                wav_file.writeframes(audio_resampled.tobytes())
-                await asr_service.send_audio(audio_resampled.tobytes())
-
-        except WebSocketDisconnect:
-            print(f"\n❌ Client Disconnected.")
-        except Exception as e:
-            print(f"\n⚠️ Error: {e}")
-        finally:
-            audio_streamer.cancel()
-            await http_session.close()
-            await asr_service.close()
+            await ingest.start()
+        except Exception:
+            await sessions.close(session)
+            raise
+
+    resumed = session.token == resume
+    keep = True
+    try:
+        lost = await session.attach(websocket, last_seq, resumed=resumed)
+        if resumed:
+            slog.info("🔁 Client resumed", extra={"last_seq": last_seq, "seq": session.sink.seq, "lost": lost})
+
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                await session.ingest.feed(message["bytes"])
+            elif message.get("text") is not None:
+                session.sink.control(message["text"])
+
+    except WebSocketDisconnect as e:
+        # A normal close ends the session; anything else may come back
+        keep = e.code != 1000
+        slog.info("❌ Client disconnected", extra={"code": e.code})
+    except Exception as e:  # noqa: BLE001 - logged, and the recorder keeps the audio that led up to it
+        keep = False
+        slog.error("⚠️ Session error", extra={"error": repr(e)})
+        if session.recorder is not None:
+            # Rolling capture: keep the audio that led up to the error
+            session.recorder.dump()
+    finally:
+        await sessions.release(session, websocket, keep=keep)
+
+@app.websocket("/ws/room/{content_id}")
+async def room_stream(
+    websocket: WebSocket,
+    content_id: str,
+    lang: str = "hi-IN",
+    codecs: Optional[str] = None,
+    out_rate: Optional[int] = None,
+    sample_rate: Optional[int] = None,
+    sample_format: Optional[str] = None,
+    channels: Optional[int] = None,
+    frame_size: Optional[int] = None
+):
+    """
+    Broadcast mode: every viewer of `content_id` shares one ASR stream and
+    one translate+TTS pipeline per language. Viewers send audio exactly as
+    on /ws/stream; only the room's current source is transcribed.
+    """
+    await websocket.accept()
+    session_id = uuid.uuid4().hex[:8]
+    slog = get_logger("session", session=session_id, lang=lang, room=content_id)
+    ingest_format = await accept_ingest_format(websocket, slog, sample_rate, sample_format, channels, frame_size)
+    if ingest_format is None:
+        return
+    audio_format = negotiate_format(codecs, out_rate)
+    await websocket.send_json(AudioEncoder(*audio_format).announcement())
+    session_metrics = SessionMetrics(session_id, lang)
+    room = subscriber = None
+
+    try:
+        room, subscriber = await rooms.join(content_id, websocket, lang, audio_format, ingest_format)
+        slog.info("✅ Client joined room", extra={"viewers": room.subscriber_count})
+
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            # Text frames (pings, control messages) mean nothing in a room
+            if message.get("bytes") is not None:
+                await room.feed(subscriber, message["bytes"])
+
+    except WebSocketDisconnect:
+        slog.info("❌ Client left room")
+    except Exception as e:  # noqa: BLE001 - one viewer's failure (join included) must not reach the server; logged
+        slog.error("⚠️ Room session error", extra={"error": repr(e)})
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close(code=1011)
+    finally:
+        session_metrics.close()
+        if room is not None:
+            await rooms.leave(room, subscriber)
 
 @app.websocket("/ws/loopback")
 async def loopback_stream(websocket: WebSocket):
     await websocket.accept()
-    print("✅ Client Connected (Loopback)")
+    log.info("✅ Client connected (loopback)")
     try:
         while True:
             data = await websocket.receive_bytes()
             await websocket.send_bytes(data)
     except WebSocketDisconnect:
-        print("❌ Loopback Client Disconnected")
-    except Exception as e:
-        print(f"⚠️ Loopback Error: {e}")
+        log.info("❌ Loopback client disconnected")
+    except Exception as e:  # noqa: BLE001 - diagnostic echo endpoint; any failure just ends it
+        log.warning("⚠️ Loopback error", extra={"error": repr(e)})
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,245 @@
+import asyncio
+import time
+from collections import deque
+
+import websockets.exceptions
+from deepgram import AsyncDeepgramClient, DeepgramClientEnvironment
+from deepgram.extensions.types.sockets import ListenV1ControlMessage
+
+from app.core.config import settings
+from app.core.log import get_logger
+
+log = get_logger("asr_pool")
+
+# What a send on a dropped or closing socket raises
+SEND_ERRORS = (websockets.exceptions.WebSocketException, OSError)
+
+# Every session streams the same audio format, so any open socket will do
+LIVE_OPTIONS = {
+    "model": "nova-2",
+    "language": "en-US",
+    "smart_format": True,
+    "encoding": "linear16",
+    "channels": "1",
+    "sample_rate": "16000",
+    "interim_results": "true",
+    "vad_events": "true",
+    "endpointing": "300",
+}
+
+
+def _environment():
+    """Production endpoints, or a custom live URL (local stand-in) from settings."""
+    if not settings.DEEPGRAM_URL:
+        return DeepgramClientEnvironment.PRODUCTION
+    prod = DeepgramClientEnvironment.PRODUCTION
+    return DeepgramClientEnvironment(
+        base=prod.base,
+        production=settings.DEEPGRAM_URL,
+        agent=prod.agent,
+        preview=prod.preview
+    )
+
+
+class ASRConnection:
+    """
+    One live Deepgram socket. A background task holds it open, passes each
+    message to `on_message` (once a session owns it) and sends KeepAlive
+    whenever nothing else was sent for KEEPALIVE_INTERVAL, so idle pooled
+    sockets and VAD-gated (silent) sessions both stay open.
+    `on_close(connection)` is called if the socket closes on its own.
+    """
+    # Deepgram closes a live socket after ~10s without audio
+    KEEPALIVE_INTERVAL = 5.0
+
+    def __init__(self):
+        self.client = AsyncDeepgramClient(api_key=settings.DEEPGRAM_API_KEY, environment=_environment())
+        self.socket = None
+        self.on_message = None
+        self.on_close = None
+        self.opened_at = None
+        self.last_send = 0.0
+        self.closing = False
+        self._ready = asyncio.Event()
+        self._task = None
+        self._loop = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.socket is not None
+
+    async def open(self) -> bool:
+        """Connects; returns False if the handshake failed."""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        return self.is_open
+
+    async def _run(self):
+        keepalive = None
+        try:
+            async with self.client.listen.v1.connect(**LIVE_OPTIONS) as socket:
+                self.socket = socket
+                self.opened_at = self.last_send = time.monotonic()
+                self._ready.set()
+                keepalive = asyncio.create_task(self._keepalive_loop())
+
+                # The "pump" that makes the SDK process incoming data
+                async for message in socket:
+                    if self.on_message is not None:
+                        await self.on_message(message)
+        except Exception as e:  # noqa: BLE001 - whatever ends the socket, on_close below reports it
+            if not self.closing:
+                log.error("❌ Deepgram Connection Error", extra={"error": repr(e)})
+        finally:
+            if keepalive is not None:
+                keepalive.cancel()
+            self.socket = None
+            self._ready.set()
+            if not self.closing and self.on_close is not None:
+                self.on_close(self)
+
+    async def _keepalive_loop(self):
+        try:
+            while True:
+                await asyncio.sleep(1.0)
+                if time.monotonic() - self.last_send >= self.KEEPALIVE_INTERVAL:
+                    await self.send_control("KeepAlive")
+        except asyncio.CancelledError:
+            pass
+        except SEND_ERRORS as e:
+            log.warning("⚠️ Error sending KeepAlive to Deepgram", extra={"error": repr(e)})
+
+    async def send_media(self, data):
+        """Sends audio; raises one of SEND_ERRORS if the socket is gone."""
+        await self._open_socket().send_media(data)
+        self.last_send = time.monotonic()
+
+    async def send_control(self, message_type: str):
+        await self._open_socket().send_control(ListenV1ControlMessage(type=message_type))
+        self.last_send = time.monotonic()
+
+    def _open_socket(self):
+        if self.socket is None:
+            raise ConnectionError("Deepgram socket is closed")
+        return self.socket
+
+    async def close(self):
+        """Asks Deepgram to flush and close (CloseStream), waiting up to 2 s."""
+        self.closing = True
+        if self._task is None:
+            return
+        if self.socket is not None:
+            try:
+                await self.send_control("CloseStream")
+            except SEND_ERRORS as e:
+                # The socket is closing anyway; the wait below still applies
+                log.debug("⚠️ CloseStream not sent", extra={"error": repr(e)})
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=2.0)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+
+class ASRConnectionPool:
+    """
+    Keeps `size` Deepgram sockets open and idle in this worker, so a new
+    session (or a reconnecting one) gets a socket without waiting for the
+    handshake. Taken sockets are replaced in the background; idle ones are
+    kept alive by KeepAlive and recycled after `max_age` seconds.
+    size=0 disables pooling: acquire() just connects.
+    """
+    def __init__(self, size=2, max_age=300.0):
+        self.size = size
+        self.max_age = max_age
+        self.idle = deque()
+        self.started = False
+        self._opening = 0
+        self._loop = None
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.opened = 0
+        self.failed = 0
+        self.recycled = 0
+
+    def start(self):
+        """Starts filling the pool (called from the app lifespan)."""
+        self.started = True
+        self._loop = asyncio.get_running_loop()
+        self._refill()
+
+    def _refill(self):
+        if not self.started or self._loop is not asyncio.get_running_loop():
+            return
+        for _ in range(self.size - len(self.idle) - self._opening):
+            self._opening += 1
+            asyncio.create_task(self._open_idle())
+
+    async def _open_idle(self):
+        connection = ASRConnection()
+        try:
+            ok = await connection.open()
+        finally:
+            self._opening -= 1
+        if not ok:
+            # Retried on the next acquire(), not in a tight loop
+            self.failed += 1
+            return
+        self.opened += 1
+        if not self.started:
+            await connection.close()
+            return
+        connection.on_close = self._discard
+        self.idle.append(connection)
+
+    def _discard(self, connection):
+        if connection in self.idle:
+            self.idle.remove(connection)
+            self.recycled += 1
+
+    async def acquire(self) -> ASRConnection:
+        """
+        An open connection, from the pool if one is ready. The result may
+        be closed if connecting failed (check `is_open`).
+        """
+        while self.idle:
+            connection = self.idle.popleft()
+            if connection.is_open and time.monotonic() - connection.opened_at < self.max_age:
+                connection.on_close = None
+                self.hits += 1
+                self._refill()
+                return connection
+            self.recycled += 1
+            asyncio.create_task(connection.close())
+
+        self.misses += 1
+        self._refill()
+        connection = ASRConnection()
+        if await connection.open():
+            self.opened += 1
+        else:
+            self.failed += 1
+        return connection
+
+    async def close(self):
+        self.started = False
+        idle, self.idle = list(self.idle), deque()
+        await asyncio.gather(*(connection.close() for connection in idle))
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self.idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "opened": self.opened,
+            "failed": self.failed,
+            "recycled": self.recycled,
+        }
+
+
+# Shared by every session in this worker process
+asr_pool = ASRConnectionPool(size=settings.ASR_POOL_SIZE, max_age=settings.ASR_POOL_MAX_AGE_S)
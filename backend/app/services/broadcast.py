@@ -0,0 +1,295 @@
+import asyncio
+
+from app.audio.codecs import TTS_RATE, AudioEncoder
+from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import (
+    ROOM_RESYNCS,
+    ROOM_SUBSCRIBERS,
+    ROOMS_ACTIVE,
+    SessionMetrics,
+)
+from app.services.pipeline import SpeechIngest, TranslationPipeline
+
+log = get_logger("room")
+
+
+class Subscriber:
+    """
+    One socket in a room. Messages are queued and sent by the subscriber's
+    own task, so a slow viewer never holds back the room. If its queue
+    fills up, the backlog is dropped and the viewer rejoins at the next
+    sentence (the live edge). Transcripts follow the same rule, so a
+    viewer never reads a sentence it will not hear.
+
+    If a send fails, the subscriber is detached from its language's
+    pipeline and gets nothing more; the receive side notices the socket
+    is gone and leaves the room.
+    """
+    def __init__(self, websocket, lang, max_queue=256, audio_format=("pcm16", TTS_RATE), ingest_format=None):
+        self.websocket = websocket
+        self.lang = lang
+        self.audio_format = audio_format  # (codec, sample_rate)
+        self.ingest_format = ingest_format  # what this socket sends, if it becomes the source
+        self.start_index = 0  # first sentence this viewer hears
+        self.on_detach = None  # set by the FanOut that feeds it
+        self.detached = False
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._task = asyncio.create_task(self._send_loop())
+
+        # Stats
+        self.frames_sent = 0
+        self.resyncs = 0
+
+    def offer_audio(self, index: int, frame: bytes):
+        if self.detached or index < self.start_index:
+            return
+        if self._queue.full():
+            self._resync(index + 1)
+            return
+        self._queue.put_nowait((True, frame))
+
+    def offer_json(self, message: dict):
+        if self.detached or message.get("sentence", self.start_index) < self.start_index:
+            return
+        if self._queue.full():
+            return
+        self._queue.put_nowait((False, message))
+
+    def _resync(self, start_index: int):
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self.start_index = start_index
+        self.resyncs += 1
+        ROOM_RESYNCS.labels(self.lang).inc()
+
+    async def _send_loop(self):
+        try:
+            while True:
+                is_audio, payload = await self._queue.get()
+                if is_audio:
+                    await self.websocket.send_bytes(payload)
+                    self.frames_sent += 1
+                else:
+                    await self.websocket.send_json(payload)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:  # noqa: BLE001 - a dead socket fails in transport-specific ways; logged and detached
+            log.warning("⚠️ Subscriber send failed", extra={"lang": self.lang, "error": repr(e)})
+            self._detach()
+
+    def _detach(self):
+        self.detached = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        if self.on_detach is not None:
+            self.on_detach(self)
+
+    def close(self):
+        self._task.cancel()
+
+
+class FanOut:
+    """
+    Sink for a room's language pipeline. It stands in for the WebSocket that
+    OrderedAudioStreamer and TranslationPipeline write to, and copies every
+    message to that language's subscribers. Each frame is encoded once per
+    audio format in use, however many subscribers share it.
+    """
+    def __init__(self):
+        self.subscribers = set()
+        self.streamer = None  # set once the pipeline exists
+        self.encoders = {}  # (codec, sample_rate) -> AudioEncoder
+
+    def live_edge(self) -> int:
+        """Index of the first sentence a new subscriber can hear from its start."""
+        if self.streamer is None:
+            return 0
+        return self.streamer.next_index + (1 if self.streamer.sending else 0)
+
+    def add(self, subscriber: Subscriber):
+        subscriber.start_index = self.live_edge()
+        subscriber.on_detach = self.remove
+        self.subscribers.add(subscriber)
+        if subscriber.audio_format not in self.encoders:
+            self.encoders[subscriber.audio_format] = AudioEncoder(*subscriber.audio_format)
+
+    def remove(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        if all(other.audio_format != subscriber.audio_format for other in self.subscribers):
+            self.encoders.pop(subscriber.audio_format, None)
+
+    async def send_bytes(self, data: bytes):
+        # Called by the streamer while it is sending sentence next_index
+        index = self.streamer.next_index
+        encoded = {}
+        for audio_format, encoder in list(self.encoders.items()):
+            encoded[audio_format] = await encoder.encode_frame(data)
+        for subscriber in list(self.subscribers):
+            frame = encoded.get(subscriber.audio_format)
+            if frame:
+                subscriber.offer_audio(index, frame)
+
+    async def send_json(self, message: dict):
+        for subscriber in list(self.subscribers):
+            subscriber.offer_json(message)
+
+
+class BroadcastRoom:
+    """
+    All viewers of one piece of content. One source socket drives a single
+    ASR stream; each target language in use gets one translate+TTS pipeline
+    whose output fans out to that language's subscribers.
+
+    Any subscriber may send audio, but only the current source is
+    transcribed. When the source leaves, the next viewer that sends audio
+    takes over, so the room survives its first viewer leaving.
+    """
+    def __init__(self, content_id, processor, translator, tts):
+        self.content_id = content_id
+        self.translator = translator
+        self.tts = tts
+        self.log = get_logger("room", room=content_id)
+
+        self.source = None
+        self.channels = {}  # lang -> (FanOut, TranslationPipeline, SessionMetrics)
+        self.subscriber_count = 0
+
+        self._metrics = SessionMetrics(f"room:{content_id}", "source", track_session=False)
+        self.ingest = SpeechIngest(
+            processor,
+            on_segment=self._dispatch,
+            log=self.log,
+            metrics=self._metrics,
+            backlog_fn=self._backlog,
+            on_preview=self._speculate if settings.SPECULATIVE_TRANSLATION else None
+        )
+        self._started = None
+
+    async def start(self):
+        """Connects the room's ASR stream (concurrent callers share one attempt; a failed one is retried)."""
+        if self._started is None:
+            self._started = asyncio.ensure_future(self.ingest.start())
+        started = self._started
+        try:
+            await asyncio.shield(started)
+        except Exception:
+            # Not cached: the next viewer to join tries again
+            if self._started is started:
+                self._started = None
+            raise
+
+    def _backlog(self) -> int:
+        return max((pipeline.in_flight for _, pipeline, _ in self.channels.values()), default=0)
+
+    def _speculate(self, text: str):
+        for _, pipeline, _ in self.channels.values():
+            pipeline.speculate(text)
+
+    def _dispatch(self, transcript_text: str, source_at=None):
+        for _, pipeline, _ in self.channels.values():
+            pipeline.submit(transcript_text, source_at)
+
+    def add(self, websocket, lang, audio_format=("pcm16", TTS_RATE), ingest_format=None) -> Subscriber:
+        channel = self.channels.get(lang)
+        if channel is None:
+            fanout = FanOut()
+            metrics = SessionMetrics(f"room:{self.content_id}", lang, track_session=False)
+            pipeline = TranslationPipeline(fanout, lang, self.translator, self.tts, self.log, metrics)
+            fanout.streamer = pipeline.streamer
+            channel = self.channels[lang] = (fanout, pipeline, metrics)
+            self.log.info("🌐 Language pipeline started", extra={"lang": lang})
+
+        subscriber = Subscriber(
+            websocket,
+            lang,
+            max_queue=settings.ROOM_SUBSCRIBER_QUEUE,
+            audio_format=audio_format,
+            ingest_format=ingest_format
+        )
+        channel[0].add(subscriber)
+        self.subscriber_count += 1
+        ROOM_SUBSCRIBERS.labels(lang).inc()
+        return subscriber
+
+    def remove(self, subscriber: Subscriber):
+        subscriber.close()
+        self.subscriber_count -= 1
+        ROOM_SUBSCRIBERS.labels(subscriber.lang).dec()
+        if subscriber is self.source:
+            self.source = None
+
+        fanout, pipeline, metrics = self.channels[subscriber.lang]
+        fanout.remove(subscriber)
+        if not fanout.subscribers:
+            # Nobody left listening in this language
+            pipeline.close()
+            metrics.close()
+            del self.channels[subscriber.lang]
+            self.log.info("🌐 Language pipeline stopped", extra={"lang": subscriber.lang})
+
+    async def feed(self, subscriber: Subscriber, data: bytes):
+        if self.source is None:
+            self.source = subscriber
+            if subscriber.ingest_format is not None:
+                # A new source may capture differently (and restarts the filter state)
+                self.ingest.set_format(subscriber.ingest_format)
+            self.log.info("🎙️ New room source", extra={"lang": subscriber.lang})
+        if subscriber is self.source:
+            await self.ingest.feed(data)
+
+    async def close(self):
+        for fanout, pipeline, metrics in self.channels.values():
+            for subscriber in fanout.subscribers:
+                subscriber.close()
+            pipeline.close()
+            metrics.close()
+        self.channels.clear()
+        self.log.info("📊 Room summary", extra=self.ingest.summary())
+        self._metrics.close()
+        await self.ingest.close()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscriber_count,
+            "languages": {
+                lang: len(fanout.subscribers) for lang, (fanout, _, _) in self.channels.items()
+            },
+            "segments": self.ingest.segments,
+            "skipped": {
+                lang: pipeline.summary()["skipped"] for lang, (_, pipeline, _) in self.channels.items()
+            },
+            "has_source": self.source is not None,
+        }
+
+
+class RoomRegistry:
+    """Open broadcast rooms in this worker, by content ID."""
+    def __init__(self, processor, translator, tts):
+        self.processor = processor
+        self.translator = translator
+        self.tts = tts
+        self.rooms = {}
+
+    async def join(self, content_id: str, websocket, lang: str, audio_format=("pcm16", TTS_RATE), ingest_format=None):
+        room = self.rooms.get(content_id)
+        if room is None:
+            room = self.rooms[content_id] = BroadcastRoom(content_id, self.processor, self.translator, self.tts)
+            ROOMS_ACTIVE.inc()
+        subscriber = room.add(websocket, lang, audio_format, ingest_format)
+        try:
+            await room.start()
+        except Exception:
+            await self.leave(room, subscriber)
+            raise
+        return room, subscriber
+
+    async def leave(self, room: BroadcastRoom, subscriber: Subscriber):
+        room.remove(subscriber)
+        if room.subscriber_count == 0 and self.rooms.get(room.content_id) is room:
+            del self.rooms[room.content_id]
+            ROOMS_ACTIVE.dec()
+            await room.close()
+
+    def stats(self) -> dict:
+        return {content_id: room.stats() for content_id, room in self.rooms.items()}
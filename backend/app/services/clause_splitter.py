@@ -0,0 +1,39 @@
+import re
+
+# Sentence enders: Latin, Devanagari/Bengali/Gurmukhi/Odia danda (। ॥),
+# Urdu full stop (۔) and question mark (؟).
+SENTENCE_END = ".?!।॥۔؟"
+# Clause breaks: comma, semicolon, colon, Urdu/Arabic comma (،) and dashes.
+CLAUSE_BREAK = ",;:،–—"
+
+_SPLIT_RE = re.compile(f"(?<=[{re.escape(SENTENCE_END + CLAUSE_BREAK)}])\\s+")
+
+
+def split_clauses(text: str, min_chars: int = 12) -> list:
+    """
+    Splits translated text into clauses at punctuation that is followed by
+    whitespace, for any of the supported Indic scripts.
+
+    Fragments shorter than `min_chars` are merged into the next clause (or
+    the previous one, at the end) so we never synthesize a single word on
+    its own.
+    """
+    text = " ".join(text.split())
+    if not text:
+        return []
+
+    pieces = [p for p in _SPLIT_RE.split(text) if p]
+    clauses = []
+    current = ""
+    for piece in pieces:
+        current = f"{current} {piece}" if current else piece
+        if len(current) >= min_chars:
+            clauses.append(current)
+            current = ""
+
+    if current:
+        if clauses and len(current) < min_chars:
+            clauses[-1] = f"{clauses[-1]} {current}"
+        else:
+            clauses.append(current)
+    return clauses
@@ -1,114 +1,263 @@
 import time
 import asyncio
-from deepgram import AsyncDeepgramClient
-from deepgram.core.events import EventType
+from collections import deque
 from deepgram.extensions.types.sockets import ListenV1ResultsEvent
 from app.core.config import settings
+from app.core.log import get_logger
+from app.core.metrics import ASR_RECONNECTS
+from app.services.asr_pool import SEND_ERRORS, ASRConnectionPool, asr_pool
+from app.services.segmenter import FixedSegmenter, Segmenter
+
+log = get_logger("asr")
+
+
+class AudioReplayBuffer:
+    """
+    Audio sent to ASR that Deepgram has not finalized yet, by stream
+    position (seconds of audio sent). If the socket drops, everything from
+    `start_s` on is replayed to the new one, so no words are lost. Bounded
+    to `max_seconds`; the oldest audio goes first.
+    """
+    def __init__(self, bytes_per_second: int, max_seconds=30.0):
+        self.bytes_per_second = bytes_per_second
+        self.max_bytes = int(bytes_per_second * max_seconds) & ~1
+        self._buffer = bytearray()
+        self.start_s = 0.0
+        self.dropped_s = 0.0
+
+    @property
+    def end_s(self) -> float:
+        return self.start_s + len(self._buffer) / self.bytes_per_second
+
+    def append(self, data):
+        self._buffer += data
+        excess = len(self._buffer) - self.max_bytes
+        if excess > 0:
+            self.dropped_s += excess / self.bytes_per_second
+            self._drop(excess)
+
+    def trim_before(self, position_s: float):
+        """Forgets audio before `position_s` (it has been finalized)."""
+        n = int((position_s - self.start_s) * self.bytes_per_second) & ~1
+        if n > 0:
+            self._drop(min(n, len(self._buffer)))
+
+    def _drop(self, n: int):
+        n += n & 1
+        del self._buffer[:n]
+        self.start_s += n / self.bytes_per_second
+
+    def read(self, position_s: float, max_bytes: int) -> bytes:
+        """Up to `max_bytes` of audio from `position_s` (b"" once caught up)."""
+        offset = max(0, round((position_s - self.start_s) * self.bytes_per_second) & ~1)
+        return bytes(self._buffer[offset:offset + max_bytes])
+
 
 class DeepgramService:
-    def __init__(self):
-        self.deepgram = AsyncDeepgramClient(api_key=settings.DEEPGRAM_API_KEY)
+    # linear16 mono at 16 kHz, as in LIVE_OPTIONS
+    BYTES_PER_SECOND = 2 * 16000
+    # Replayed audio goes out in pieces of this size
+    REPLAY_CHUNK_BYTES = BYTES_PER_SECOND // 2
+
+    def __init__(self, segmenter: Segmenter = None, pool: ASRConnectionPool = None):
+        # Sockets come pre-warmed from the worker's pool
+        self.pool = pool or asr_pool
         self.connection = None
         self.is_connected = False
+        self.closing = False
         self.on_transcript_callback = None
-        self._run_task = None
-        self._connected_event = asyncio.Event()
+        self.on_preview_callback = None
+        self._reconnect_task = None
+        # (audio seconds sent so far, monotonic time) per send, to time ASR finalization
+        self._sent_marks = deque(maxlen=4096)
+        self._audio_sent_s = 0.0
+        # Unfinalized audio, replayed after a reconnect
+        self.replay = AudioReplayBuffer(self.BYTES_PER_SECOND, settings.ASR_REPLAY_SECONDS)
+        # Stream position of the current socket's time 0 (Deepgram timestamps restart per socket)
+        self._stream_offset_s = 0.0
+        # Seconds from the last word's audio leaving us to its segment being
+        # dispatched, and when its first word's audio left us (monotonic);
+        # set just before the transcript callback runs
+        self.last_asr_latency = None
+        self.last_source_at = None
+        # Segment dispatch policy (default: 6 words / 1.5s / speech_final)
+        self.segmenter = segmenter or FixedSegmenter()
 
-    async def connect(self, on_transcript_callback):
+        # Stats
+        self.reconnects = 0
+        self.replayed_s = 0.0
+
+    async def connect(self, on_transcript_callback, on_preview_callback=None):
         """
-        Connects to Deepgram Live Transcription API by starting a background task.
+        Takes a live Deepgram socket from the pool (connecting if none is ready).
+        `on_preview_callback(text)`, if given, gets the text the next segment
+        would be if the current interim hypothesis held (pending finals +
+        interim) after every result that did not dispatch a segment.
+        If connecting fails, the service keeps retrying in the background and
+        buffers the audio meanwhile.
         """
         self.on_transcript_callback = on_transcript_callback
-        self._connected_event.clear()
-        self._run_task = asyncio.create_task(self._run_loop())
+        self.on_preview_callback = on_preview_callback
 
-        print("⏳ Connecting to Deepgram...")
-        # Wait for connection to be established (or fail)
-        await self._connected_event.wait()
+        log.info("⏳ Connecting to Deepgram...")
+        connection = await self.pool.acquire()
+        if connection.is_open:
+            self._attach(connection)
+            self.is_connected = True
+            log.info("✅ Connected to Deepgram (ASR)")
+        else:
+            self._start_reconnect()
 
-    async def _run_loop(self):
-        try:
-            # Note: connect returns an async context manager
-            async with self.deepgram.listen.v1.connect(
-                model="nova-2",
-                language="en-US",
-                smart_format=True,
-                encoding="linear16",
-                channels="1",
-                sample_rate="16000",
-                interim_results="true",
-                vad_events="true",
-                endpointing="300"
-            ) as connection:
-                self.connection = connection
-                self.is_connected = True
-                self._connected_event.set()
-                print("✅ Connected to Deepgram (ASR)")
-
-                # Iterate over the connection to receive messages
-                # This is the "pump" that makes the SDK process incoming data
-                accumulated_transcript = ""
-                accumulation_start_time = None
-
-                async for message in connection:
-                    if isinstance(message, ListenV1ResultsEvent):
-                        if not message.channel.alternatives:
-                            continue
-
-                        transcript = message.channel.alternatives[0].transcript
-                        is_final = message.is_final
-                        speech_final = message.speech_final
-
-                        if is_final and transcript:
-                            accumulated_transcript += transcript + " "
-                            if accumulation_start_time is None:
-                                accumulation_start_time = time.time()
-
-                        word_count = len(accumulated_transcript.split())
-                        time_elapsed = time.time() - accumulation_start_time if accumulation_start_time else 0
-
-                        # Thresholds for sending the chunk early to avoid long delays
-                        # If a speaker is talking fast, we force a dispatch after 6 words or 1.5 seconds
-                        force_dispatch = False
-                        if word_count >= 6 or time_elapsed >= 1.5:
-                            force_dispatch = True
-
-                        if (speech_final or force_dispatch) and accumulated_transcript.strip():
-                            if self.on_transcript_callback:
-                                # Call the callback directly (same event loop)
-                                await self.on_transcript_callback(accumulated_transcript.strip(), True)
-                            accumulated_transcript = ""
-                            accumulation_start_time = None
-
-        except Exception as e:
-            print(f"❌ Deepgram Connection Error: {e}")
-            self._connected_event.set()
-        finally:
-            self.is_connected = False
-            self.connection = None
-            print("🚫 Deepgram Connection Closed")
+    def _attach(self, connection):
+        self.connection = connection
+        connection.on_message = self._on_message
+        connection.on_close = self._on_connection_lost
+
+    async def _on_message(self, message):
+        if not isinstance(message, ListenV1ResultsEvent) or not message.channel.alternatives:
+            return
+
+        if message.is_final:
+            # Finalized audio will never need replaying
+            self.replay.trim_before(self._stream_offset_s + message.start + message.duration)
+
+        alternative = message.channel.alternatives[0]
+        # The segmenter decides when accumulated finals become a segment.
+        # A Finalize request (sent when VAD sees speech end) always flushes.
+        segment = self.segmenter.on_result(
+            alternative.transcript,
+            words=alternative.words,
+            is_final=bool(message.is_final),
+            speech_final=bool(message.speech_final),
+            from_finalize=bool(message.from_finalize)
+        )
+
+        if segment:
+            audio_start = self.segmenter.last_audio_start
+            audio_end = self.segmenter.last_audio_end
+            self.last_source_at = self.sent_at(None if audio_start is None else audio_start + self._stream_offset_s)
+            self.last_asr_latency = self.asr_latency(None if audio_end is None else audio_end + self._stream_offset_s)
+
+        if segment and self.on_transcript_callback:
+            # Call the callback directly (same event loop)
+            await self.on_transcript_callback(segment, True)
+        elif not segment and self.on_preview_callback:
+            interim = "" if message.is_final else alternative.transcript
+            preview = " ".join(filter(None, (self.segmenter.pending_text, interim.strip())))
+            if preview:
+                self.on_preview_callback(preview)
+
+    def _on_connection_lost(self, connection):
+        if self.closing or connection is not self.connection:
+            return
+        log.warning("⚠️ Deepgram connection lost, reconnecting")
+        connection.on_message = None
+        connection.on_close = None
+        if connection.is_open:
+            asyncio.create_task(connection.close())
+        self._start_reconnect()
+
+    def _start_reconnect(self):
+        self.is_connected = False
+        self.connection = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        delay = 0.1
+        while not self.closing:
+            connection = await self.pool.acquire()
+            if connection.is_open:
+                try:
+                    await self._resume(connection)
+                    return
+                except SEND_ERRORS as e:
+                    log.warning("⚠️ Error replaying audio to Deepgram", extra={"error": repr(e)})
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+    async def _resume(self, connection):
+        """Replays unfinalized + buffered audio to a new socket, then goes live."""
+        self._stream_offset_s = position = self.replay.start_s
+        replay_from = position
+        self._attach(connection)
+        while True:
+            # Audio keeps arriving (buffered) while this catches up
+            chunk = self.replay.read(position, self.REPLAY_CHUNK_BYTES)
+            if not chunk:
+                break
+            await connection.send_media(chunk)
+            position += len(chunk) / self.BYTES_PER_SECOND
+        self.is_connected = True
+        self.reconnects += 1
+        self.replayed_s += position - replay_from
+        ASR_RECONNECTS.inc()
+        log.info("✅ Reconnected to Deepgram", extra={"replayed_s": round(position - replay_from, 1)})
 
     async def send_audio(self, audio_bytes: bytes):
         """
-        Sends raw PCM audio to Deepgram.
+        Sends raw PCM audio to Deepgram. While reconnecting, the audio is
+        only buffered, and goes out once the new socket is up.
+        """
+        self.replay.append(audio_bytes)
+        self._audio_sent_s += len(audio_bytes) / self.BYTES_PER_SECOND
+        self._sent_marks.append((self._audio_sent_s, time.monotonic()))
+        if not self.connection or not self.is_connected:
+            return
+        try:
+            # In this SDK version, send_media is used for binary data
+            await self.connection.send_media(audio_bytes)
+        except SEND_ERRORS as e:
+            log.warning("⚠️ Error sending audio to Deepgram", extra={"error": repr(e)})
+            self._on_connection_lost(self.connection)
+
+    def sent_at(self, position):
+        """
+        Monotonic time the audio at stream position `position` (seconds)
+        was sent. None if unknown.
+        """
+        if position is None or not self._sent_marks:
+            return None
+        sent_at = None
+        # The words just finalized are recent: scan from the newest send
+        for audio_s, at in reversed(self._sent_marks):
+            if audio_s < position:
+                break
+            sent_at = at
+        return sent_at
+
+    def asr_latency(self, audio_end):
+        """
+        Time since the audio at stream position `audio_end` (seconds) was
+        sent. None if unknown.
+        """
+        sent_at = self.sent_at(audio_end)
+        return time.monotonic() - sent_at if sent_at is not None else None
+
+    async def finalize(self):
+        """
+        Asks Deepgram to flush any buffered audio into final results.
+        Used when the VAD gate stops forwarding audio at the end of speech.
         """
         if self.connection and self.is_connected:
             try:
-                # In this SDK version, send_media is used for binary data
-                await self.connection.send_media(audio_bytes)
-            except Exception as e:
-                print(f"⚠️ Error sending audio to Deepgram: {e}")
+                await self.connection.send_control("Finalize")
+            except SEND_ERRORS as e:
+                log.warning("⚠️ Error sending Finalize to Deepgram", extra={"error": repr(e)})
 
     async def close(self):
         """
-        Closes the connection.
+        Closes the connection. Results still arriving are not dispatched.
         """
-        self._stop_event = asyncio.Event()
-        self._stop_event.set()
-        if self._run_task:
-            # Give it a moment to clean up
-            try:
-                await asyncio.wait_for(self._run_task, timeout=2.0)
-            except asyncio.TimeoutError:
-                self._run_task.cancel()
-            self._run_task = None
+        self.closing = True
+        self.on_transcript_callback = None
+        self.on_preview_callback = None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self.connection is not None:
+            await self.connection.close()
+        self.is_connected = False
+        self.connection = None
+        log.info("🚫 Deepgram Connection Closed")
@@ -0,0 +1,388 @@
+import asyncio
+import time
+
+import numpy as np
+
+from app.audio.buffer import AudioSyncBuffer
+from app.audio.dsp_executor import dsp_executor
+from app.audio.ingest_format import FrameCoalescer, IngestDecoder, IngestFormat
+from app.audio.playout import PlayoutScheduler
+from app.audio.streamer import OrderedAudioStreamer
+from app.core.config import settings
+from app.core.http_pool import http_pool
+from app.services.deepgram_client import DeepgramService
+from app.services.scheduler import (
+    SKIP_CANCELLED,
+    SKIP_EXPIRED,
+    SKIP_TEXT_ONLY,
+    SentenceDeadline,
+    SentenceScheduler,
+)
+from app.services.segmenter import create_segmenter
+from app.services.speculation import InterimStabilizer, Speculator
+
+
+async def _replay(chunks):
+    """Audio synthesized ahead of time, as a TTS stream."""
+    for chunk in chunks:
+        yield chunk
+
+
+class SpeechIngest:
+    """
+    Stage 1 for one audio source: resampling and VAD gating on the DSP pool,
+    then Deepgram ASR. Every segment the segmenter dispatches is passed to
+    `on_segment(text, source_at)`, with the monotonic time its first word's
+    audio was sent to ASR (None if unknown). With `on_preview`, stable
+    interim hypotheses of the next segment are passed to `on_preview(text)`
+    (for speculative work).
+    """
+    def __init__(
+        self,
+        processor,
+        on_segment,
+        log,
+        metrics,
+        latency_ms=settings.LATENCY_TARGET_MS,
+        backlog_fn=None,
+        recorder=None,
+        ingest_format=None,
+        on_preview=None,
+    ):
+        self.on_segment = on_segment
+        self.on_preview = on_preview
+        self.stabilizer = InterimStabilizer(settings.SPECULATIVE_AGREEMENT)
+        self.processor = processor
+        self.log = log
+        self.metrics = metrics
+        self.recorder = recorder
+
+        # Live drift: wall-clock time vs audio time received from the client
+        self.sync_buffer = AudioSyncBuffer()
+        metrics.watch_drift(self.sync_buffer)
+
+        segmenter = create_segmenter(
+            settings.SEGMENTER_POLICY,
+            latency_target_s=latency_ms / 1000,
+            backlog_fn=backlog_fn
+        )
+        self.asr = DeepgramService(segmenter=segmenter)
+
+        # What the client sends; mono Int16 at 16 kHz skips resampling entirely
+        self.set_format(ingest_format or IngestFormat(processor.browser_rate))
+        # This source's resample/VAD jobs run in order on the shared DSP pool
+        self.dsp = dsp_executor.session()
+
+        # Only speech (+ preroll/hangover) reaches Deepgram
+        self.vad_gate = None
+        if settings.VAD_ENABLED:
+            self.vad_gate = processor.create_vad_gate(
+                preroll_ms=settings.VAD_PREROLL_MS,
+                hangover_ms=settings.VAD_HANGOVER_MS
+            )
+
+        self.segments = 0
+
+    def set_format(self, ingest_format: IngestFormat):
+        """(Re)configures decoding for a source's declared format."""
+        self.ingest_format = ingest_format
+        # Per-source resampler (keeps filter state across chunks)
+        self.decoder = IngestDecoder(ingest_format, self.processor.create_resampler(ingest_format.sample_rate))
+        # Small messages are joined into ASR-sized frames
+        align = ingest_format.channels * ingest_format.dtype.itemsize
+        min_bytes = ingest_format.bytes_per_second * settings.INGEST_FRAME_MS // 1000
+        self.coalescer = FrameCoalescer(min_bytes, align=align)
+
+    async def start(self):
+        start = time.monotonic()
+        await self.asr.connect(
+            on_transcript_callback=self._on_transcript,
+            on_preview_callback=self._on_preview if self.on_preview else None
+        )
+        self.metrics.observe("asr_connect", time.monotonic() - start)
+
+    def _on_preview(self, text):
+        stable = self.stabilizer.update(text)
+        if stable:
+            self.on_preview(stable)
+
+    async def _on_transcript(self, transcript_text, is_final):
+        if is_final and transcript_text:
+            asr_s = self.asr.last_asr_latency
+            if asr_s is not None:
+                self.metrics.observe("asr_finalize", asr_s)
+            self.log.info("🎤 Segment", extra={"segment": self.segments, "text": transcript_text})
+            self.segments += 1
+            self.stabilizer.reset()
+            self.on_segment(transcript_text, self.asr.last_source_at)
+
+    def _process(self, data: bytes):
+        """Decode/resample + VAD gate for one frame. Runs on a DSP worker thread."""
+        audio = self.decoder.process(data)
+        received = len(audio)
+        speech_ended = False
+        if self.vad_gate is not None:
+            was_speaking = self.vad_gate.is_speaking
+            audio = self.vad_gate.process(audio)
+            speech_ended = was_speaking and not self.vad_gate.is_speaking
+        return audio, received, speech_ended
+
+    async def feed(self, data: bytes):
+        """Processes one message of client audio and forwards the speech to ASR."""
+        if self.sync_buffer.start_time is None:
+            self.sync_buffer.start()
+        data = self.coalescer.push(data)
+        if data is None:
+            return
+        if self.decoder.native and self.vad_gate is None:
+            # Already ASR-ready: no thread hop, no copy
+            audio, received, speech_ended = np.frombuffer(data, dtype=np.int16), len(data) // 2, False
+        else:
+            audio, received, speech_ended = await self.dsp.run(self._process, data)
+        self.sync_buffer.record_samples(received)
+
+        if speech_ended:
+            # Speech ended: flush Deepgram instead of waiting for endpointing
+            await self.asr.finalize()
+
+        if len(audio):
+            if self.recorder is not None:
+                self.recorder.write(audio)
+            await self.asr.send_audio(memoryview(audio).cast("B"))
+
+    def pause(self):
+        """The source went away for a while (client reconnecting)."""
+        self.sync_buffer.pause()
+
+    def resume(self):
+        self.sync_buffer.resume()
+
+    async def flush(self):
+        """Has ASR finalize what it heard so far instead of waiting for more audio."""
+        await self.asr.finalize()
+
+    def summary(self) -> dict:
+        summary = {
+            "segments": self.segments,
+            "ingest": f"{self.ingest_format.sample_rate}/{self.ingest_format.sample_format}/{self.ingest_format.channels}",
+            "frames": self.coalescer.frames_out,
+            "audio_s": round(self.sync_buffer.get_audio_time(), 1),
+            "drift_s": round(self.sync_buffer.get_latency(), 3)
+        }
+        if self.vad_gate is not None:
+            summary["vad_sent_ratio"] = round(self.vad_gate.sent_ratio, 3)
+        if self.asr.reconnects:
+            summary["asr_reconnects"] = self.asr.reconnects
+            summary["asr_replayed_s"] = round(self.asr.replayed_s, 1)
+        return summary
+
+    async def close(self):
+        await self.asr.close()
+
+
+class TranslationPipeline:
+    """
+    Stages 2 and 3 for one target language: translate each segment, send
+    the transcript, and stream its TTS audio in order to `sink` (the
+    client's WebSocket, or a broadcast room's fan-out).
+    Segments are processed in parallel (up to the scheduler's limit); the
+    streamer restores their order, and sentences that miss their deadline
+    are skipped rather than played late. The playout scheduler keeps the
+    dub at a steady lag behind the speaker (holding sentences that are
+    early, speeding up TTS while it falls behind).
+    """
+    def __init__(self, sink, lang, translator, tts, log, metrics, http_session=None):
+        self.sink = sink
+        self.lang = lang
+        self.translator = translator
+        self.tts = tts
+        self.log = log
+        self.metrics = metrics
+        # Translate/TTS share the worker's HTTP pool
+        self.http_session = http_session or http_pool.session
+
+        self.playout = PlayoutScheduler(
+            target_lag_s=settings.PLAYOUT_TARGET_LAG_MS / 1000,
+            band_s=settings.PLAYOUT_LAG_BAND_MS / 1000,
+            base_pace=settings.TTS_PACE,
+            min_pace=settings.TTS_PACE_MIN,
+            max_pace=settings.TTS_PACE_MAX,
+            hold=settings.PLAYOUT_HOLD,
+            adaptive_pace=settings.PLAYOUT_ADAPTIVE_PACE,
+            on_lag=metrics.observe
+        )
+        # Task names, for the admin task dump: "sentence[<session>/<lang>]#<index>"
+        self.name = f"{metrics.session_id}/{lang}"
+        self.streamer = OrderedAudioStreamer(sink, on_span=metrics.observe, playout=self.playout, name=f"streamer[{self.name}]")
+        # Concurrency limit and per-sentence deadlines (stale work is dropped)
+        self.scheduler = SentenceScheduler(
+            max_concurrent=settings.SENTENCE_CONCURRENCY,
+            budget_s=settings.SENTENCE_BUDGET_MS / 1000,
+            text_grace_s=settings.SENTENCE_TEXT_GRACE_MS / 1000
+        )
+        # Optionally translate (and synthesize) stable interim text before its segment arrives
+        self.speculator = None
+        if settings.SPECULATIVE_TRANSLATION:
+            self.speculator = Speculator(
+                self._speculate,
+                min_words=settings.SPECULATIVE_MIN_WORDS,
+                on_outcome=metrics.speculation
+            )
+        self.sentence_counter = 0
+        # Sentences dispatched but not yet fully synthesized (downstream backlog)
+        self.in_flight = 0
+        self._tasks = set()
+
+    def submit(self, transcript_text: str, source_at=None) -> int:
+        """
+        Queues translate + TTS for the next sentence; returns its index.
+        `source_at` is when its speech was heard (see SpeechIngest).
+        """
+        index = self.sentence_counter
+        self.sentence_counter += 1
+        self.playout.register(index, source_at)
+        self.in_flight += 1
+        self.metrics.sentence_started()
+        deadline = self.scheduler.deadline()
+        speculation = self.speculator.claim(transcript_text) if self.speculator else None
+        task = asyncio.create_task(self._process(index, transcript_text, deadline, speculation), name=f"sentence[{self.name}]#{index}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return index
+
+    def speculate(self, text: str):
+        """Stable interim text of the next segment (see SpeechIngest.on_preview)."""
+        if self.speculator is not None:
+            self.speculator.offer(text)
+
+    async def _speculate(self, text: str):
+        """Speculative job: translation, plus its TTS audio if SPECULATIVE_TTS."""
+        target_text = await self.translator.translate(text, target_lang=self.lang, session=self.http_session)
+        audio = None
+        if target_text and settings.SPECULATIVE_TTS:
+            audio = [bytes(chunk) async for chunk in self._tts_stream(target_text, self.playout.pace())]
+        return target_text, audio
+
+    def _tts_stream(self, target_text: str, pace: float):
+        if settings.TTS_CLAUSE_MODE:
+            return self.tts.text_to_speech_clauses(target_text, target_lang=self.lang, session=self.http_session, pace=pace)
+        return self.tts.text_to_speech_stream(target_text, target_lang=self.lang, session=self.http_session, pace=pace)
+
+    async def _process(self, index: int, transcript_text: str, deadline: SentenceDeadline, speculation=None):
+        skip_reason = None
+        watchdog = None
+        target_text = None
+        audio = None
+        try:
+            async with self.scheduler.slots:
+                if deadline.text_missed():
+                    # Waited too long for a slot: not worth translating any more
+                    skip_reason = SKIP_EXPIRED
+                    return
+
+                # --- Stage 2: Translation (Sarvam) ---
+                watchdog = self.scheduler.watchdog(deadline, deadline.text_at)
+                start_translate = time.monotonic()
+                if speculation is not None:
+                    # Started from interim results; usually done already
+                    try:
+                        target_text, audio = await speculation
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:  # noqa: BLE001 - the segment is translated from scratch below
+                        self.log.warning("⚠️ Speculative translation failed", extra={"sentence": index, "error": repr(e)})
+                        self.speculator.failed()
+                if not target_text:
+                    target_text = await self.translator.translate(
+                        transcript_text,
+                        target_lang=self.lang,
+                        session=self.http_session
+                    )
+                watchdog.cancel()
+                translate_s = time.monotonic() - start_translate
+                self.metrics.observe("translate", translate_s)
+                self.log.info("🔄 Translated", extra={"sentence": index, "ms": round(translate_s * 1000), "text": target_text})
+
+                if target_text:
+                    # Send Target transcript to UI
+                    try:
+                        await self.sink.send_json({
+                            "type": "transcript",
+                            "sentence": index,
+                            "text": target_text,
+                            "lang": self.lang,
+                            "is_final": True
+                        })
+                    except Exception as e:  # noqa: BLE001 - the text is a side channel; the audio goes ahead either way
+                        self.log.debug("⚠️ Transcript not sent", extra={"sentence": index, "error": repr(e)})
+
+                    if deadline.audio_missed():
+                        # Too late to be spoken: the listener gets the text only
+                        skip_reason = SKIP_TEXT_ONLY
+                        return
+
+                    # --- Stage 3: TTS (Sarvam) ---
+                    # Cancelled if no audio is ready by the deadline; once the
+                    # first chunk is queued the sentence is committed
+                    watchdog = self.scheduler.watchdog(deadline, deadline.audio_at)
+                    start_tts = time.monotonic()
+                    first_byte_time = None
+
+                    tts_stream = _replay(audio) if audio else self._tts_stream(target_text, self.playout.pace(index))
+                    async for audio_chunk in tts_stream:
+                        if first_byte_time is None:
+                            watchdog.cancel()
+                            first_byte_time = time.monotonic()
+                            self.metrics.observe("tts_first_byte", first_byte_time - start_tts)
+                            self.log.debug("⚡ First TTS byte", extra={"sentence": index, "ms": round((first_byte_time - start_tts) * 1000)})
+
+                        if audio_chunk:
+                            # Waits here if the client is behind (bounded queue)
+                            await self.streamer.put(index, audio_chunk)
+
+                    tts_s = time.monotonic() - start_tts
+                    self.metrics.observe("tts_total", tts_s)
+                    self.log.info("🗣️ TTS finished", extra={"sentence": index, "ms": round(tts_s * 1000)})
+
+        except asyncio.CancelledError:
+            if not deadline.expired:
+                raise  # session closing
+            skip_reason = SKIP_TEXT_ONLY if target_text else SKIP_CANCELLED
+        except Exception as e:  # noqa: BLE001 - one bad sentence must not end the session
+            self.log.warning("⚠️ Sentence failed", extra={"sentence": index, "error": repr(e)})
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            self.in_flight -= 1
+            self.metrics.sentence_finished()
+            if skip_reason is not None:
+                self.scheduler.record_skip(skip_reason)
+                self.metrics.sentence_skipped(skip_reason)
+                self.log.info("⏭️ Sentence skipped", extra={
+                    "sentence": index,
+                    "reason": skip_reason,
+                    "late_ms": round((time.monotonic() - deadline.audio_at) * 1000)
+                })
+                # Never stall the stream waiting for audio that won't come
+                self.streamer.skip(index)
+            else:
+                # Signal end of sentence audio
+                await self.streamer.end(index)
+
+    def summary(self) -> dict:
+        summary = {"sentences": self.sentence_counter, "skipped": sum(self.scheduler.skipped.values())}
+        playout = self.playout.stats()
+        if playout["sentences"]:
+            summary.update(lag_avg_s=playout["lag_avg_s"], lag_in_band=playout["in_band"], pace_avg=playout["pace_avg"])
+        if self.speculator is not None:
+            stats = self.speculator.stats()
+            summary.update(spec_hit_rate=stats["hit_rate"], spec_wasted=stats["wasted"], spec_head_start_ms=stats["head_start_ms"])
+        return summary
+
+    def close(self):
+        """Stops streaming and abandons sentences still being translated/synthesized."""
+        self.streamer.cancel()
+        if self.speculator is not None:
+            self.speculator.cancel()
+        for task in list(self._tasks):
+            task.cancel()
@@ -1,11 +1,28 @@
 import aiohttp
-import json
 from app.core.config import settings
+from app.core.hedging import UpstreamError, upstream_requester
+from app.core.http_pool import http_pool
+from app.core.log import get_logger
+from app.services.translation_cache import TranslationCache, translation_cache
+
+log = get_logger("translate")
+
+_USE_SHARED_CACHE = object()
 
 class SarvamTranslateService:
-    def __init__(self):
+    def __init__(self, cache: TranslationCache = _USE_SHARED_CACHE):
         self.api_key = settings.SARVAM_API_KEY
-        self.url = "https://api.sarvam.ai/translate" # Verify exact endpoint
+        self.url = f"{settings.SARVAM_API_URL}/translate" # Verify exact endpoint
+        self.model = "mayura:v1" # Or whatever the latest translate model is
+        self.mode = "code-mixed"
+
+        # Process-wide cache by default; pass cache=None to always hit the API
+        if cache is _USE_SHARED_CACHE:
+            cache = translation_cache if settings.TRANSLATION_CACHE_ENABLED else None
+        self.cache = cache
+
+        # Adaptive timeouts, hedging and retries for the API calls
+        self.requester = upstream_requester("translate")
 
     async def translate(self, text: str, source_lang: str = "en-IN", target_lang: str = "hi-IN", session: aiohttp.ClientSession = None) -> str:
         """
@@ -17,13 +34,23 @@ class SarvamTranslateService:
         if source_lang == target_lang:
             return text
 
+        if self.cache is None:
+            return await self._request(text, source_lang, target_lang, session)
+
+        key = self.cache.make_key(text, source_lang, target_lang, self.model, self.mode)
+        return await self.cache.get_or_fetch(
+            key,
+            lambda: self._request(text, source_lang, target_lang, session)
+        )
+
+    async def _request(self, text: str, source_lang: str, target_lang: str, session: aiohttp.ClientSession = None) -> str:
         payload = {
             "input": text,
             "source_language_code": source_lang,
             "target_language_code": target_lang,
             "speaker_gender": "Male", # Optional
-            "mode": "code-mixed", # Optional
-            "model": "mayura:v1" # Or whatever the latest translate model is
+            "mode": self.mode, # Optional
+            "model": self.model
         }
 
         headers = {
@@ -31,31 +58,20 @@ class SarvamTranslateService:
             "api-subscription-key": self.api_key
         }
 
-        # Use provided session or create a temporary one
-        if session:
-            try:
-                async with session.post(self.url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get("translated_text", "")
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ Sarvam Translate Error {response.status}: {error_text}")
-                        return ""
-            except Exception as e:
-                print(f"❌ Translation Request Failed: {e}")
-                return ""
-        else:
-            async with aiohttp.ClientSession() as new_session:
-                try:
-                    async with new_session.post(self.url, json=payload, headers=headers) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            return data.get("translated_text", "")
-                        else:
-                            error_text = await response.text()
-                            print(f"❌ Sarvam Translate Error {response.status}: {error_text}")
-                            return ""
-                except Exception as e:
-                    print(f"❌ Translation Request Failed: {e}")
-                    return ""
+        # Use provided session or the shared connection pool
+        s = session or http_pool.session
+
+        async def fetch():
+            async with s.post(self.url, json=payload, headers=headers) as response:
+                if response.status != 200:
+                    raise UpstreamError(response.status, await response.text())
+                data = await response.json()
+                return data.get("translated_text", "")
+
+        try:
+            return await self.requester.call(fetch)
+        except UpstreamError as e:
+            log.error("❌ Sarvam Translate Error", extra={"status": e.status, "body": e.body})
+        except Exception as e:
+            log.error("❌ Translation Request Failed", extra={"error": repr(e)})
+        return ""
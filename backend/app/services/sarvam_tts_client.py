@@ -1,31 +1,64 @@
+import asyncio
 import base64
+from collections.abc import AsyncIterator
+from typing import Optional
+
 import aiohttp
-import asyncio
-from typing import AsyncIterator
+
 from app.core.config import settings
+from app.core.hedging import UpstreamError, upstream_requester
+from app.core.http_pool import http_pool
+from app.core.log import get_logger
+from app.services.clause_splitter import split_clauses
+from app.services.tts_batcher import TTSBatcher
+from app.services.tts_cache import TTSAudioCache, iter_chunks, tts_cache
+
+log = get_logger("tts")
+
+_USE_SHARED_CACHE = object()
 
 class SarvamTTSService:
-    def __init__(self):
+    def __init__(self, cache: TTSAudioCache = _USE_SHARED_CACHE, batching: Optional[bool] = None):
         self.api_key = settings.SARVAM_API_KEY
-        self.url = "https://api.sarvam.ai/text-to-speech"
+        self.url = f"{settings.SARVAM_API_URL}/text-to-speech"
         self.speaker = "ritu"
+        self.pace = settings.TTS_PACE  # default; callers may pass a per-request pace
+        self.sample_rate = 24000 # Using 24kHz for quality
+        self.model = "bulbul:v3"
+        self.chunk_size = 4096
+
+        # Process-wide cache by default; pass cache=None to always hit the API
+        if cache is _USE_SHARED_CACHE:
+            cache = tts_cache if settings.TTS_CACHE_ENABLED else None
+        self.cache = cache
+
+        # Adaptive timeouts, hedging and retries for the API calls
+        self.requester = upstream_requester("tts")
 
-    async def text_to_speech_stream(self, text: str, target_lang: str = "hi-IN", session: aiohttp.ClientSession = None) -> AsyncIterator[bytes]:
+        # Optionally group segments arriving together into one multi-input request
+        if batching is None:
+            batching = settings.TTS_BATCH_ENABLED
+        self.batcher = None
+        if batching:
+            self.batcher = TTSBatcher(
+                self.synthesize_batch,
+                max_window_ms=settings.TTS_BATCH_WINDOW_MS,
+                max_inputs=settings.TTS_BATCH_MAX_INPUTS
+            )
+
+    async def synthesize_batch(self, texts, target_lang, speaker, session: Optional[aiohttp.ClientSession] = None, pace: Optional[float] = None):
         """
-        Converts text to speech using Sarvam REST API (bulbul:v3).
-        Accepts an external session for better performance.
+        One bulbul request for all `texts` ("inputs" is a list). Returns the
+        raw PCM for each text in order, or Nones if the request failed.
         """
-        if not text or not text.strip():
-            return
-
         payload = {
-            "inputs": [text],
+            "inputs": list(texts),
             "target_language_code": target_lang,
-            "speaker": self.speaker,
-            "pace": 1.2,
-            "speech_sample_rate": 24000, # Using 24kHz for quality
+            "speaker": speaker,
+            "pace": pace or self.pace,
+            "speech_sample_rate": self.sample_rate,
             "enable_preprocessing": True,
-            "model": "bulbul:v3"
+            "model": self.model
         }
 
         headers = {
@@ -33,40 +66,90 @@ class SarvamTTSService:
             "api-subscription-key": self.api_key
         }
 
-        # Use provided session or create a temporary one
-        async def fetch(s):
-            try:
-                async with s.post(self.url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        audios = data.get("audios", [])
-                        if audios:
-                            # Sarvam returns base64 encoded audio strings
-                            base64_audio = audios[0]
-                            audio_bytes = base64.b64decode(base64_audio)
-
-                            # bulbul:v3 returns a WAV file.
-                            # We strip the 44-byte header to get raw PCM.
-                            pcm_data = audio_bytes[44:]
-                            return pcm_data
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ Sarvam TTS Error {response.status}: {error_text}")
-            except Exception as e:
-                print(f"❌ Sarvam TTS Exception: {e}")
-            return None
-
-        if session:
-            pcm_data = await fetch(session)
+        # Use provided session or the shared connection pool
+        s = session or http_pool.session
+
+        async def fetch():
+            async with s.post(self.url, json=payload, headers=headers) as response:
+                if response.status != 200:
+                    raise UpstreamError(response.status, await response.text())
+                data = await response.json()
+                audios = data.get("audios", [])
+                if len(audios) != len(texts):
+                    raise ValueError(f"{len(audios)} audios for {len(texts)} inputs")
+                # Sarvam returns base64 encoded audio strings.
+                # bulbul:v3 returns a WAV file; strip the 44-byte header to get raw PCM.
+                return [base64.b64decode(audio)[44:] for audio in audios]
+
+        try:
+            return await self.requester.call(fetch)
+        except UpstreamError as e:
+            log.error("❌ Sarvam TTS Error", extra={"status": e.status, "body": e.body})
+        except Exception as e:
+            log.error("❌ Sarvam TTS Exception", extra={"error": repr(e)})
+        return [None] * len(texts)
+
+    async def text_to_speech_stream(self, text: str, target_lang: str = "hi-IN", session: Optional[aiohttp.ClientSession] = None, pace: Optional[float] = None) -> AsyncIterator[bytes]:
+        """
+        Converts text to speech using Sarvam REST API (bulbul:v3).
+        Accepts an external session for better performance, and a speaking
+        `pace` (default self.pace).
+        Chunks are bytes-like (memoryview slices); cached audio is served
+        without copying.
+        """
+        if not text or not text.strip():
+            return
+        pace = pace or self.pace
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(text, target_lang, self.speaker, pace, self.model, self.sample_rate)
+            cached_pcm = await self.cache.get(cache_key)
+            if cached_pcm is not None:
+                for chunk in iter_chunks(cached_pcm, self.chunk_size):
+                    yield chunk
+                return
+
+        if self.batcher is not None:
+            pcm_data = await self.batcher.synthesize(text, target_lang, self.speaker, session, pace)
         else:
-            async with aiohttp.ClientSession() as new_session:
-                pcm_data = await fetch(new_session)
+            pcm_data = (await self.synthesize_batch([text], target_lang, self.speaker, session, pace))[0]
 
         if pcm_data:
+            # Keep whole 16-bit samples
+            if len(pcm_data) % 2 != 0:
+                pcm_data += b"\x00"
+
+            if cache_key is not None:
+                self.cache.put_background(cache_key, pcm_data)
+
             # Yield in smaller chunks to mimic streaming interface
-            chunk_size = 4096
-            for i in range(0, len(pcm_data), chunk_size):
-                chunk = pcm_data[i:i+chunk_size]
-                if len(chunk) % 2 != 0:
-                    chunk += b"\x00"
+            for chunk in iter_chunks(pcm_data, self.chunk_size):
+                yield chunk
+
+    async def text_to_speech_clauses(self, text: str, target_lang: str = "hi-IN", session: Optional[aiohttp.ClientSession] = None, pace: Optional[float] = None) -> AsyncIterator[bytes]:
+        """
+        Clause-pipelined variant of text_to_speech_stream.
+        Splits the text at clause/punctuation boundaries and synthesizes all
+        clauses concurrently (the first one is started first), yielding audio
+        in clause order. Time-to-first-audio is that of the first clause
+        instead of the whole sentence.
+        """
+        clauses = split_clauses(text)
+        if len(clauses) <= 1:
+            async for chunk in self.text_to_speech_stream(text, target_lang=target_lang, session=session, pace=pace):
                 yield chunk
+            return
+
+        async def synthesize(clause):
+            return [c async for c in self.text_to_speech_stream(clause, target_lang=target_lang, session=session, pace=pace)]
+
+        tasks = [asyncio.create_task(synthesize(clause)) for clause in clauses]
+        try:
+            for task in tasks:
+                for chunk in await task:
+                    yield chunk
+        finally:
+            # Consumer stopped early (cancelled/stale): drop the remaining requests
+            for task in tasks:
+                task.cancel()
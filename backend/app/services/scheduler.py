@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+# Why a sentence produced no audio
+SKIP_EXPIRED = "expired"      # its deadline passed before a slot freed up
+SKIP_CANCELLED = "cancelled"  # dropped while still being translated
+SKIP_TEXT_ONLY = "text_only"  # translated and shown, but too late to speak
+
+
+class SentenceDeadline:
+    """
+    Deadlines of one sentence, measured from when its segment arrived.
+    Audio should start by `audio_at`. After `text_at` the sentence is not
+    worth showing either.
+    """
+    def __init__(self, submitted_at: float, budget_s: float, text_grace_s: float):
+        self.submitted_at = submitted_at
+        self.audio_at = submitted_at + budget_s
+        self.text_at = self.audio_at + text_grace_s
+        self.expired = False  # set when a watchdog cancelled the work
+
+    def audio_missed(self, now=None) -> bool:
+        return (now or time.monotonic()) > self.audio_at
+
+    def text_missed(self, now=None) -> bool:
+        return (now or time.monotonic()) > self.text_at
+
+
+class SentenceScheduler:
+    """
+    Admission control and deadlines for one session's sentences.
+
+    At most `max_concurrent` sentences are translated and synthesized at
+    once; the rest wait in arrival order. Each sentence gets a latency
+    budget. Once its deadline passes, its pending HTTP work is cancelled
+    and it is shown as text only, or dropped. Lag stays bounded instead of
+    building a backlog the listener can never catch up on.
+    """
+    def __init__(self, max_concurrent=4, budget_s=6.0, text_grace_s=4.0):
+        self.max_concurrent = max_concurrent
+        self.budget_s = budget_s
+        self.text_grace_s = text_grace_s
+        self.slots = asyncio.Semaphore(max_concurrent)
+
+        # Stats
+        self.skipped = {SKIP_EXPIRED: 0, SKIP_CANCELLED: 0, SKIP_TEXT_ONLY: 0}
+
+    def deadline(self, submitted_at=None) -> SentenceDeadline:
+        return SentenceDeadline(submitted_at or time.monotonic(), self.budget_s, self.text_grace_s)
+
+    def watchdog(self, deadline: SentenceDeadline, at: float):
+        """
+        Cancels the calling task at monotonic time `at` (pending HTTP requests
+        included; a cached translation is aborted unless another session is
+        still waiting on it). Returns the timer; cancel it once the work is
+        committed.
+        """
+        task = asyncio.current_task()
+
+        def expire():
+            deadline.expired = True
+            task.cancel()
+
+        return asyncio.get_running_loop().call_later(max(0.0, at - time.monotonic()), expire)
+
+    def record_skip(self, reason: str):
+        self.skipped[reason] += 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "budget_ms": round(self.budget_s * 1000),
+            "skipped": dict(self.skipped),
+        }
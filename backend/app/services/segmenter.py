@@ -0,0 +1,182 @@
+import time
+from abc import ABC, abstractmethod
+
+SENTENCE_PUNCT = ".?!"
+CLAUSE_PUNCT = ",;:"
+
+
+class Segmenter(ABC):
+    """
+    Decides when accumulated final ASR results are dispatched as a segment
+    for translation.
+
+    DeepgramService calls on_result() once per Results message; a non-None
+    return value is the text to dispatch. Subclasses implement
+    _should_dispatch(). Word counts are tracked incrementally.
+    """
+    def __init__(self):
+        self._parts = []
+        self._words = []
+        self._word_count = 0
+        self._started_at = None
+        # Audio start/end times (Deepgram timestamps) of the last dispatched segment
+        self.last_audio_start = None
+        self.last_audio_end = None
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._parts)
+
+    @property
+    def pending_text(self) -> str:
+        """Final results accumulated for the next segment, not yet dispatched."""
+        return " ".join(self._parts).strip()
+
+    def _add(self, transcript, words, now):
+        self._parts.append(transcript)
+        self._words.extend(words or [])
+        self._word_count += len(transcript.split())
+        if self._started_at is None:
+            self._started_at = now
+
+    def _take(self):
+        # No word timings: unknown, rather than the previous segment's
+        self.last_audio_start = self._words[0].start if self._words else None
+        self.last_audio_end = self._words[-1].end if self._words else None
+        text = " ".join(self._parts).strip()
+        self._parts = []
+        self._words = []
+        self._word_count = 0
+        self._started_at = None
+        return text or None
+
+    def on_result(self, transcript, words=None, is_final=False, speech_final=False, from_finalize=False, now=None):
+        now = time.monotonic() if now is None else now
+        if is_final and transcript:
+            self._add(transcript, words, now)
+
+        if not self._parts:
+            return None
+        if speech_final or from_finalize or self._should_dispatch(now):
+            return self._take()
+        return None
+
+    def flush(self):
+        """Returns whatever is still pending (e.g. when the stream closes)."""
+        return self._take() if self._parts else None
+
+    @abstractmethod
+    def _should_dispatch(self, now) -> bool:
+        """Whether the pending results should be dispatched now (policy-specific)."""
+
+
+class FixedSegmenter(Segmenter):
+    """
+    The original policy: dispatch on speech_final, or once 6 words or 1.5s
+    (since the first final result) have accumulated.
+    """
+    def __init__(self, max_words=6, max_seconds=1.5):
+        super().__init__()
+        self.max_words = max_words
+        self.max_seconds = max_seconds
+
+    def _should_dispatch(self, now) -> bool:
+        return self._word_count >= self.max_words or now - self._started_at >= self.max_seconds
+
+
+class AdaptiveSegmenter(Segmenter):
+    """
+    Picks flush points from the speech itself.
+
+    - Sentence punctuation ends a segment as soon as it has `min_words`.
+    - Clause punctuation ends one once half the time budget is used.
+    - Otherwise a segment is cut when the audio it covers (from Deepgram word
+      timestamps) reaches the time budget.
+
+    The budget is the session's latency target minus the expected
+    translate+TTS time, stretched while downstream is backlogged (queued
+    sentences delay playback anyway, so longer segments cost no extra latency
+    and translate better). A smoothed speaking rate caps segments at roughly
+    the words spoken in one budget, which also covers results without
+    word timestamps.
+    """
+    def __init__(
+        self,
+        latency_target_s=2.5,
+        backlog_fn=None,
+        min_words=3,
+        max_words=25,
+        downstream_s=1.0,
+        min_budget_s=0.8,
+        max_budget_s=4.0,
+        backlog_stretch=0.25,
+        initial_rate_wps=2.5,
+        rate_smoothing=0.2,
+    ):
+        super().__init__()
+        self.latency_target_s = latency_target_s
+        self.backlog_fn = backlog_fn
+        self.min_words = min_words
+        self.max_words = max_words
+        self.min_budget_s = min_budget_s
+        self.max_budget_s = max_budget_s
+        self.downstream_s = downstream_s
+        self.backlog_stretch = backlog_stretch
+        self.rate_smoothing = rate_smoothing
+        self.speaking_rate = initial_rate_wps  # words per second (EMA)
+
+    def _add(self, transcript, words, now):
+        super()._add(transcript, words, now)
+        if words and len(words) >= 2:
+            span = words[-1].end - words[0].start
+            if span > 0.3:
+                rate = len(words) / span
+                self.speaking_rate += self.rate_smoothing * (rate - self.speaking_rate)
+
+    def budget_s(self) -> float:
+        backlog = self.backlog_fn() if self.backlog_fn else 0
+        budget = self.latency_target_s - self.downstream_s
+        budget *= 1 + self.backlog_stretch * min(backlog, 4)
+        return max(self.min_budget_s, min(self.max_budget_s, budget))
+
+    def _audio_span(self) -> float:
+        if not self._words:
+            return 0.0
+        return self._words[-1].end - self._words[0].start
+
+    def _last_punct(self) -> str:
+        if self._words:
+            last = self._words[-1]
+            text = getattr(last, "punctuated_word", None) or last.word
+        else:
+            text = self._parts[-1]
+        return text[-1] if text else ""
+
+    def _should_dispatch(self, now) -> bool:
+        budget = self.budget_s()
+        punct = self._last_punct()
+        ends_sentence = bool(punct) and punct in SENTENCE_PUNCT
+        ends_clause = bool(punct) and punct in CLAUSE_PUNCT
+
+        if ends_sentence and self._word_count >= self.min_words:
+            return True
+
+        span = self._audio_span()
+        if ends_clause and self._word_count >= self.min_words and span >= budget / 2:
+            return True
+
+        word_cap = max(self.min_words, min(self.max_words, round(self.speaking_rate * budget)))
+        if span >= budget or self._word_count >= word_cap:
+            return True
+
+        # Safety net if timestamps are missing or results stall
+        return now - self._started_at >= budget * 1.5
+
+
+def create_segmenter(policy="fixed", latency_target_s=2.5, backlog_fn=None) -> Segmenter:
+    """Factory used by the WebSocket handler (policy name from settings)."""
+    if policy == "adaptive":
+        return AdaptiveSegmenter(latency_target_s=latency_target_s, backlog_fn=backlog_fn)
+    if policy == "fixed":
+        return FixedSegmenter()
+    raise ValueError(f"Unknown segmentation policy: {policy}")
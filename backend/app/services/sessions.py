@@ -0,0 +1,302 @@
+import asyncio
+import json
+import secrets
+import time
+from collections import deque
+
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.log import get_logger
+from app.core.metrics import SESSION_RESUMES, SESSIONS_DETACHED
+
+log = get_logger("sessions")
+
+# What sending on (or closing) a socket the client dropped raises
+SOCKET_ERRORS = (WebSocketDisconnect, RuntimeError, OSError)
+
+
+class ResumableSink:
+    """
+    Sink that outlives the client's WebSocket. It stands in for the socket
+    the pipeline and streamer write to (behind the audio encoder, so it
+    keeps the exact frames sent) and numbers every message from 1.
+    Messages are kept until the client acknowledges them ({"type": "ack",
+    "seq": n}); a reconnecting client says the last one it received and the
+    rest is sent again, in order, before anything new.
+
+    While a socket is attached, at most `max_unacked_bytes` of audio is kept
+    (the oldest goes first, so clients that never ack cost nothing extra).
+    While detached, nothing is dropped: once that much is waiting, senders
+    wait for a socket, which pushes backpressure into TTS.
+    """
+    def __init__(self, token, max_unacked_bytes=1024 * 1024):
+        self.token = token
+        self.max_unacked_bytes = max_unacked_bytes
+        self.websocket = None
+        self.seq = 0  # last message numbered
+        self.acked = 0
+        self._unacked = deque()  # (seq, is_audio, payload)
+        self._unacked_bytes = 0
+        self._lock = asyncio.Lock()  # keeps replay and live messages in order
+        self._attached = asyncio.Event()
+        self.closed = False
+
+        # Stats
+        self.replayed = 0
+        self.trimmed = 0  # messages dropped unacked while attached
+        self.lost = 0  # messages a resuming client missed for good
+
+    async def send_bytes(self, data):
+        await self._send(True, bytes(data))
+
+    async def send_json(self, message):
+        await self._send(False, message)
+
+    async def _send(self, is_audio, payload):
+        while self.websocket is None and self._unacked_bytes >= self.max_unacked_bytes and not self.closed:
+            self._attached.clear()
+            await self._attached.wait()
+        async with self._lock:
+            self.seq += 1
+            self._unacked.append((self.seq, is_audio, payload))
+            if is_audio:
+                self._unacked_bytes += len(payload)
+            websocket = self.websocket
+            if websocket is None:
+                return
+            while self._unacked_bytes > self.max_unacked_bytes and len(self._unacked) > 1:
+                self._pop()
+                self.trimmed += 1
+            try:
+                await self._deliver(websocket, is_audio, payload)
+            except SOCKET_ERRORS as e:
+                # Socket went away (the receive side notices); the message is kept for the next one
+                log.debug("⚠️ Delivery failed, kept for replay", extra={"seq": self.seq, "error": repr(e)})
+
+    @staticmethod
+    async def _deliver(websocket, is_audio, payload):
+        if is_audio:
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_json(payload)
+
+    def _pop(self):
+        _, is_audio, payload = self._unacked.popleft()
+        if is_audio:
+            self._unacked_bytes -= len(payload)
+
+    def ack(self, seq: int):
+        """The client has everything up to `seq`."""
+        seq = min(seq, self.seq)
+        while self._unacked and self._unacked[0][0] <= seq:
+            self._pop()
+        self.acked = max(self.acked, seq)
+
+    def control(self, text: str):
+        """A text message from the client (acks; anything else is ignored)."""
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if isinstance(message, dict) and message.get("type") == "ack" and isinstance(message.get("seq"), int):
+            self.ack(message["seq"])
+
+    async def attach(self, websocket, last_seq=0, resumed=False) -> int:
+        """
+        Makes `websocket` the client: sends {"type": "session"} with the
+        token and the number of the last message before the ones that
+        follow, then everything after `last_seq` that is still kept.
+        Returns how many messages the client missed (dropped before it
+        acknowledged them).
+        """
+        async with self._lock:
+            # Current from here on, so a socket that fails mid-replay is detached like any other
+            self.websocket = websocket
+            self.ack(last_seq)
+            first = self._unacked[0][0] if self._unacked else self.seq + 1
+            lost = max(0, first - 1 - last_seq)
+            self.lost += lost
+            await websocket.send_json({
+                "type": "session",
+                "token": self.token,
+                "resumed": resumed,
+                "seq": first - 1,
+                "lost": lost
+            })
+            if resumed:
+                self.replayed += len(self._unacked)
+            for _, is_audio, payload in list(self._unacked):
+                await self._deliver(websocket, is_audio, payload)
+            self._attached.set()
+        return lost
+
+    def detach(self, websocket) -> bool:
+        """`websocket` is gone; False if another socket has taken over already."""
+        if self.websocket is not None and self.websocket is not websocket:
+            return False
+        self.websocket = None
+        return True
+
+    def close(self):
+        self.closed = True
+        self.websocket = None
+        self._unacked.clear()
+        self._unacked_bytes = 0
+        self._attached.set()
+
+    def stats(self) -> dict:
+        return {
+            "seq": self.seq,
+            "acked": self.acked,
+            "unacked": len(self._unacked),
+            "unacked_bytes": self._unacked_bytes,
+            "replayed": self.replayed,
+            "trimmed": self.trimmed,
+            "lost": self.lost,
+        }
+
+
+class ResumableSession:
+    """
+    Everything a /ws/stream client has on the server: its ASR stream
+    (ingest), its translate+TTS pipeline with the sentences in flight, the
+    output encoder and the unacknowledged output (sink). It lives on while
+    the client reconnects, so a resumed socket continues where the old one
+    stopped.
+    """
+    def __init__(self, session_id, log, metrics, sink: ResumableSink, encoder, ingest, pipeline, recorder=None):
+        self.session_id = session_id
+        self.log = log
+        self.metrics = metrics
+        self.sink = sink
+        self.encoder = encoder
+        self.ingest = ingest
+        self.pipeline = pipeline
+        self.recorder = recorder
+        self.detached_at = None
+        self.resumes = 0
+
+    @property
+    def token(self) -> str:
+        return self.sink.token
+
+    async def attach(self, websocket, last_seq=0, resumed=False) -> int:
+        """Sends the session message and any replay to `websocket` (see ResumableSink.attach)."""
+        if self.detached_at is not None:
+            self.ingest.resume()
+            self.detached_at = None
+        previous = self.sink.websocket
+        lost = await self.sink.attach(websocket, last_seq, resumed=resumed)
+        if previous is not None and previous is not websocket:
+            # The client reconnected before its old socket was noticed gone
+            try:
+                await previous.close(code=4000)
+            except SOCKET_ERRORS as e:
+                self.log.debug("⚠️ Superseded socket did not close cleanly", extra={"error": repr(e)})
+        return lost
+
+    def detach(self, websocket) -> bool:
+        """The client's socket dropped; False if a newer socket already took over."""
+        if not self.sink.detach(websocket):
+            return False
+        if self.detached_at is None:
+            self.detached_at = time.monotonic()
+            self.ingest.pause()
+        return True
+
+    async def close(self):
+        self.log.info("📊 Session summary", extra={
+            **self.ingest.summary(),
+            **self.pipeline.summary(),
+            "resumes": self.resumes,
+            "replayed": self.sink.replayed,
+            "lost": self.sink.lost
+        })
+        if self.recorder is not None:
+            self.recorder.close()
+        self.metrics.close()
+        self.pipeline.close()
+        self.sink.close()
+        await self.ingest.close()
+
+
+class SessionRegistry:
+    """
+    Resumable /ws/stream sessions in this worker, by token. A session whose
+    socket drops without a normal close is kept for `grace_s`; a client
+    that reconnects with its token within that time claims it back.
+    """
+    def __init__(self, grace_s=30.0):
+        self.grace_s = grace_s
+        self.sessions = {}
+        self._expiries = {}  # token -> TimerHandle
+        self._closing = set()
+
+    @staticmethod
+    def new_token() -> str:
+        return secrets.token_urlsafe(16)
+
+    def add(self, session: ResumableSession):
+        self.sessions[session.token] = session
+
+    def claim(self, token: str):
+        """The detached session for `token`, taken off its grace timer (None if unknown or expired)."""
+        session = self.sessions.get(token)
+        if session is None:
+            SESSION_RESUMES.labels("expired").inc()
+            return None
+        expiry = self._expiries.pop(token, None)
+        if expiry is not None:
+            expiry.cancel()
+            SESSIONS_DETACHED.dec()
+        session.resumes += 1
+        SESSION_RESUMES.labels("resumed").inc()
+        return session
+
+    async def release(self, session: ResumableSession, websocket, keep=True):
+        """
+        `websocket` of `session` is gone. With `keep` (the client did not
+        end the session) it waits `grace_s` for the client to come back;
+        otherwise, or without a grace period, it is closed now.
+        """
+        if not session.detach(websocket):
+            return  # resumed on another socket already
+        if not keep or self.grace_s <= 0:
+            await self.close(session)
+            return
+        if session.token not in self._expiries:
+            loop = asyncio.get_running_loop()
+            self._expiries[session.token] = loop.call_later(self.grace_s, self._expire, session)
+            SESSIONS_DETACHED.inc()
+        session.log.info("⏸️ Session detached", extra={"grace_s": self.grace_s, "unacked": session.sink.stats()["unacked"]})
+        # Whatever was said before the drop is translated while the client is away
+        await session.ingest.flush()
+
+    def _expire(self, session: ResumableSession):
+        if self._expiries.pop(session.token, None) is None:
+            return
+        SESSIONS_DETACHED.dec()
+        session.log.info("⌛ Session expired", extra={"grace_s": self.grace_s})
+        task = asyncio.ensure_future(self.close(session))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self, session: ResumableSession):
+        if self.sessions.pop(session.token, None) is None:
+            return
+        expiry = self._expiries.pop(session.token, None)
+        if expiry is not None:
+            expiry.cancel()
+            SESSIONS_DETACHED.dec()
+        await session.close()
+
+    async def close_all(self):
+        for session in list(self.sessions.values()):
+            await self.close(session)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "detached": len(self._expiries),
+            "grace_s": self.grace_s,
+        }
@@ -0,0 +1,156 @@
+import asyncio
+import re
+import time
+
+_NOT_WORD = re.compile(r"[^\w\s]")
+
+# What happened to a speculative job
+SPECULATION_HIT = "hit"        # its text became the segment: the result was used
+SPECULATION_WASTED = "wasted"  # the segment came out different: the call was wasted
+
+
+def normalize(text: str) -> str:
+    """Case, punctuation and spacing are ignored when matching a segment to a speculation."""
+    return " ".join(_NOT_WORD.sub("", text.lower()).split())
+
+
+class InterimStabilizer:
+    """
+    Decides when an interim hypothesis is stable enough to act on: the
+    same preview text (pending finals + interim transcript) in `agreement`
+    consecutive ASR results. Returns each stable text once.
+    """
+    def __init__(self, agreement=2):
+        self.agreement = agreement
+        self._text = None
+        self._count = 0
+
+    def update(self, text: str):
+        if text == self._text:
+            self._count += 1
+        else:
+            self._text = text
+            self._count = 1
+        return text if self._count == self.agreement else None
+
+    def reset(self):
+        self._text = None
+        self._count = 0
+
+
+class Speculator:
+    """
+    Runs `run_fn(text)` early for text the segment is likely to be, so its
+    result is ready (or nearly) when the segment is dispatched.
+
+    At most one job runs at a time; candidates offered meanwhile replace
+    each other and the latest starts when the running job finishes. claim()
+    hands over the job whose text matches the dispatched segment (a hit).
+    Every other job started for that segment counts as wasted.
+    `on_outcome(outcome)` is called with SPECULATION_HIT/SPECULATION_WASTED.
+    """
+    def __init__(self, run_fn, min_words=3, on_outcome=None):
+        self.run_fn = run_fn
+        self.min_words = min_words
+        self.on_outcome = on_outcome
+        self._running = None  # (key, task, started_at)
+        self._finished = []   # [(key, task, started_at)] done but not claimed
+        self._next = None     # text waiting for the running job
+
+        # Stats
+        self.started = 0
+        self.claims = 0
+        self.hits = 0
+        self.ready_hits = 0   # result already available at dispatch
+        self.wasted = 0
+        self.head_start_total = 0.0
+
+    def offer(self, text: str):
+        key = normalize(text)
+        if len(key.split()) < self.min_words:
+            return
+        if (self._running and self._running[0] == key) or any(k == key for k, _, _ in self._finished):
+            return
+        if self._running is None:
+            self._start(text, key)
+        else:
+            self._next = text
+
+    def _start(self, text: str, key: str):
+        self.started += 1
+        task = asyncio.create_task(self.run_fn(text))
+        self._running = (key, task, time.monotonic())
+        task.add_done_callback(self._on_done)
+
+    def _on_done(self, task):
+        if self._running is None or self._running[1] is not task:
+            return
+        if not task.cancelled():
+            # Keep only the newest finished result
+            for _, stale, _ in self._finished:
+                self._discard(stale)
+            self._finished = [self._running]
+        self._running = None
+        if self._next is not None:
+            text, self._next = self._next, None
+            self.offer(text)
+
+    def _discard(self, task):
+        task.cancel()
+        self.wasted += 1
+        if self.on_outcome:
+            self.on_outcome(SPECULATION_WASTED)
+
+    def claim(self, text: str):
+        """
+        The segment `text` was dispatched: returns the matching job's task
+        (await it for run_fn's result), or None. Other jobs are dropped.
+        """
+        self.claims += 1
+        key = normalize(text)
+        jobs = self._finished + ([self._running] if self._running else [])
+        self._finished = []
+        self._running = None
+        self._next = None
+
+        match = None
+        for job in jobs:
+            if match is None and job[0] == key:
+                match = job
+            else:
+                self._discard(job[1])
+        if match is None:
+            return None
+
+        _, task, started_at = match
+        self.hits += 1
+        if task.done():
+            self.ready_hits += 1
+        self.head_start_total += time.monotonic() - started_at
+        if self.on_outcome:
+            self.on_outcome(SPECULATION_HIT)
+        return task
+
+    def failed(self):
+        """The claimed job raised: its result never arrived, so count it as wasted."""
+        self.wasted += 1
+        if self.on_outcome:
+            self.on_outcome(SPECULATION_WASTED)
+
+    def cancel(self):
+        jobs = self._finished + ([self._running] if self._running else [])
+        self._finished = []
+        self._running = None
+        self._next = None
+        for _, task, _ in jobs:
+            task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "speculations": self.started,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.claims, 3) if self.claims else 0.0,
+            "ready_hits": self.ready_hits,
+            "wasted": self.wasted,
+            "head_start_ms": round(self.head_start_total / self.hits * 1000) if self.hits else 0,
+        }
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.log import get_logger
+
+log = get_logger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC, trimmed, single spaces."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationCache:
+    """
+    Process-wide cache for translated text, shared by every session.
+
+    Lookups go through three layers:
+      1. an in-memory LRU (bounded by `max_entries`),
+      2. an optional SQLite file that survives restarts (`db_path`),
+      3. single-flight: concurrent misses for the same key wait on the one
+         request already in flight instead of issuing their own. One
+         caller being cancelled leaves the request running for the others;
+         once the last one gives up, the request is cancelled too.
+
+    Keys are (normalized text, source, target, model, mode).
+    """
+    def __init__(self, max_entries=5000, db_path=None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._memory = OrderedDict()
+        self._inflight = {}  # key -> asyncio.Task
+        self._waiters = {}  # asyncio.Task -> callers awaiting it
+
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        # Stats
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text, source_lang, target_lang, model, mode):
+        return (normalize_text(text), source_lang, target_lang, model, mode)
+
+    # --- Memory tier ---
+    def _memory_get(self, key):
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # --- SQLite tier (blocking; called through asyncio.to_thread) ---
+    def _connect(self):
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " text TEXT, source TEXT, target TEXT, model TEXT, mode TEXT,"
+                " translated TEXT NOT NULL,"
+                " PRIMARY KEY (text, source, target, model, mode))"
+            )
+            self._db.commit()
+        return self._db
+
+    def _disk_get(self, key):
+        with self._db_lock:
+            row = self._connect().execute(
+                "SELECT translated FROM translations"
+                " WHERE text=? AND source=? AND target=? AND model=? AND mode=?",
+                key,
+            ).fetchone()
+        return row[0] if row else None
+
+    def _disk_put(self, key, value):
+        with self._db_lock:
+            db = self._connect()
+            db.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)", (*key, value))
+            db.commit()
+
+    # --- Public API ---
+    async def get(self, key):
+        """Returns the cached translation, or None."""
+        value = self._memory_get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        if self.db_path:
+            try:
+                value = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as e:
+                log.warning("⚠️ Translation cache read failed", extra={"error": str(e)})
+                value = None
+            if value is not None:
+                self.disk_hits += 1
+                self._memory_put(key, value)
+                return value
+        return None
+
+    async def put(self, key, value):
+        if not value:
+            return
+        self._memory_put(key, value)
+        if self.db_path:
+            try:
+                await asyncio.to_thread(self._disk_put, key, value)
+            except sqlite3.Error as e:
+                log.warning("⚠️ Translation cache write failed", extra={"error": str(e)})
+
+    async def get_or_fetch(self, key, fetch):
+        """
+        Returns the cached value for `key`, or awaits `fetch()` exactly once
+        across all concurrent callers and caches a non-empty result.
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            value = await self.get(key)
+            if value is not None:
+                return value
+            inflight = self._inflight.get(key)
+
+        if inflight is not None:
+            self.coalesced += 1
+            return await self._join(key, inflight)
+
+        self.misses += 1
+        # The fetch runs as its own task so one caller being cancelled does not
+        # cancel the request other sessions are waiting on.
+        task = asyncio.create_task(self._fetch_and_store(key, fetch))
+        self._inflight[key] = task
+        return await self._join(key, task)
+
+    async def _join(self, key, task):
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters = self._waiters.pop(task) - 1
+            if waiters:
+                self._waiters[task] = waiters
+            elif not task.done():
+                # Nobody wants the result any more: stop the request, and
+                # let the next caller for this key start a fresh one
+                task.cancel()
+                self._forget(key, task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _fetch_and_store(self, key, fetch):
+        try:
+            value = await fetch()
+            await self.put(key, value)
+            return value
+        finally:
+            self._forget(key, asyncio.current_task())
+
+    def clear(self):
+        self._memory.clear()
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits + self.coalesced
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by every session in this worker process
+translation_cache = TranslationCache(
+    max_entries=settings.TRANSLATION_CACHE_SIZE,
+    db_path=settings.TRANSLATION_CACHE_DB,
+)
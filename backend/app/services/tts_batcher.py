@@ -0,0 +1,129 @@
+import asyncio
+import time
+
+from app.core.log import get_logger
+
+log = get_logger("tts_batcher")
+
+
+class _Batch:
+    __slots__ = ("futures", "opened_at", "session", "texts", "timer")
+
+    def __init__(self, session):
+        self.texts = []
+        self.futures = []
+        self.session = session
+        self.timer = None
+        self.opened_at = time.monotonic()
+
+
+class TTSBatcher:
+    """
+    Groups TTS requests that arrive close together into one multi-input
+    call, per (language, speaker, pace).
+
+    `request_fn(texts, target_lang, speaker, session, pace)` performs the
+    call and returns one PCM result (or None) per text, in order.
+
+    The hold window adapts to the arrival rate. A segment that arrives
+    after a quiet period is sent at once. During a burst, a segment waits
+    roughly the expected time to the next arrival, and never longer than
+    `max_window_ms`. A batch is also sent as soon as it holds `max_inputs`
+    texts.
+    """
+    GAP_SMOOTHING = 0.3  # EWMA weight of the newest inter-arrival gap
+
+    def __init__(self, request_fn, max_window_ms=40, max_inputs=3):
+        self.request_fn = request_fn
+        self.max_window = max_window_ms / 1000
+        self.max_inputs = max_inputs
+        self._pending = {}  # (lang, speaker, pace) -> _Batch
+        self._last_arrival = {}  # (lang, speaker, pace) -> monotonic time
+        self._gap = {}  # (lang, speaker, pace) -> EWMA inter-arrival gap (s)
+        self._tasks = set()
+
+        # Stats
+        self.requests = 0
+        self.inputs = 0
+        self.held = 0
+        self.held_seconds = 0.0
+
+    def _hold_for(self, key, now) -> float:
+        """How long a new batch for `key` should stay open (0 = send now)."""
+        last = self._last_arrival.get(key)
+        self._last_arrival[key] = now
+        if last is None:
+            return 0.0
+        gap = now - last
+        ewma = self._gap.get(key)
+        ewma = gap if ewma is None else ewma + self.GAP_SMOOTHING * (gap - ewma)
+        self._gap[key] = ewma
+        if gap >= self.max_window:
+            return 0.0  # not in a burst: a lone segment is never held back
+        return min(self.max_window, 2 * ewma)
+
+    async def synthesize(self, text: str, target_lang: str, speaker: str, session, pace=None):
+        """Returns the PCM for `text` (None on failure), possibly from a shared request."""
+        key = (target_lang, speaker, pace)
+        now = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _Batch(session)
+            hold = self._hold_for(key, now)
+            batch.texts.append(text)
+            batch.futures.append(future)
+            if hold > 0 and self.max_inputs > 1:
+                self._pending[key] = batch
+                batch.timer = asyncio.get_running_loop().call_later(hold, self._flush, key)
+            else:
+                self._send(key, batch)
+        else:
+            self._hold_for(key, now)
+            batch.texts.append(text)
+            batch.futures.append(future)
+            if len(batch.texts) >= self.max_inputs:
+                self._flush(key)
+
+        return await future
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self.held += 1
+        self.held_seconds += time.monotonic() - batch.opened_at
+        self._send(key, batch)
+
+    def _send(self, key, batch: _Batch):
+        self.requests += 1
+        self.inputs += len(batch.texts)
+        task = asyncio.create_task(self._run(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key, batch: _Batch):
+        target_lang, speaker, pace = key
+        try:
+            results = await self.request_fn(batch.texts, target_lang, speaker, batch.session, pace)
+        except Exception as e:  # noqa: BLE001 - whatever failed, every waiting sentence must still get its (empty) result
+            log.error("❌ TTS batch failed", extra={"inputs": len(batch.texts), "error": repr(e)})
+            results = None
+        if not results or len(results) != len(batch.texts):
+            results = [None] * len(batch.texts)
+        for future, pcm in zip(batch.futures, results):
+            # The caller may have given up on its sentence (cancelled)
+            if not future.done():
+                future.set_result(pcm)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "inputs": self.inputs,
+            "inputs_per_request": round(self.inputs / self.requests, 2) if self.requests else 0.0,
+            "held_batches": self.held,
+            "avg_hold_ms": round(self.held_seconds / self.held * 1000, 1) if self.held else 0.0,
+        }
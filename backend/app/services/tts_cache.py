@@ -0,0 +1,209 @@
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.log import get_logger
+from app.services.translation_cache import normalize_text
+
+log = get_logger(__name__)
+
+
+def iter_chunks(buffer, chunk_size=4096):
+    """Yields zero-copy memoryview slices of `buffer`."""
+    view = memoryview(buffer)
+    for i in range(0, len(view), chunk_size):
+        yield view[i:i + chunk_size]
+
+
+class TTSAudioCache:
+    """
+    Content-addressed cache of synthesized PCM, shared by every session.
+
+    Entries are named by the SHA-256 of the synthesis parameters and stored
+    as raw PCM files under `cache_dir`. Hits are served from a small hot
+    in-memory tier or by memory-mapping the file, so no copy or decode is
+    needed before the first chunk goes out. Total disk usage is kept under
+    `max_bytes` by evicting the least recently used files.
+    """
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, hot_max_bytes=32 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hot_max_bytes = hot_max_bytes
+
+        self._hot = OrderedDict()  # digest -> bytes
+        self._hot_bytes = 0
+        self._index = None  # digest -> size, in LRU order (built lazily)
+        self._disk_bytes = 0
+        self._index_lock = threading.Lock()  # index is also updated by writer threads
+        self._pending_writes = set()
+
+        # Stats
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text, target_lang, speaker, pace, model, sample_rate) -> str:
+        params = {
+            "text": normalize_text(text),
+            "lang": target_lang,
+            "speaker": speaker,
+            "pace": pace,
+            "model": model,
+            "rate": sample_rate,
+        }
+        blob = json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], digest + ".pcm")
+
+    def _load_index(self):
+        """Scans cache_dir once, oldest access first."""
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".pcm"):
+                        continue
+                    st = os.stat(os.path.join(root, name))
+                    entries.append((st.st_atime, name[:-4], st.st_size))
+        entries.sort()
+        self._index = OrderedDict((digest, size) for _, digest, size in entries)
+        self._disk_bytes = sum(self._index.values())
+
+    # --- Hot tier ---
+    def _hot_put(self, digest, data: bytes):
+        if len(data) > self.hot_max_bytes // 4:
+            return
+        if digest in self._hot:
+            self._hot.move_to_end(digest)
+            return
+        self._hot[digest] = data
+        self._hot_bytes += len(data)
+        while self._hot_bytes > self.hot_max_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    # --- Public API ---
+    async def get(self, digest: str):
+        """
+        Returns a bytes-like view of the cached PCM, or None.
+        Disk hits are memory-mapped (off the event loop); the mapping is
+        released once every view of it has been dropped.
+        """
+        data = self._hot.get(digest)
+        if data is not None:
+            self._hot.move_to_end(digest)
+            self.hot_hits += 1
+            return data
+
+        mapped = await asyncio.to_thread(self._map, digest)
+        if mapped is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        if len(mapped) <= self.hot_max_bytes // 4:
+            # Small entries are promoted so the next hit skips the filesystem
+            self._hot_put(digest, mapped[:])
+        return mapped
+
+    def _map(self, digest):
+        """Memory-maps one entry, or None if it is not on disk (blocking)."""
+        try:
+            with open(self._path(digest), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty file, cannot be mapped
+            return None
+        with self._index_lock:
+            if self._index is not None and digest in self._index:
+                self._index.move_to_end(digest)
+        return mapped
+
+    def _write(self, digest, data: bytes):
+        """Atomically writes one entry and evicts old ones (blocking)."""
+        with self._index_lock:
+            if self._index is None:
+                self._load_index()
+            if digest in self._index:
+                return
+
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._index_lock:
+            if digest in self._index:
+                # A concurrent write of the same entry landed first; same content
+                return
+            self._index[digest] = len(data)
+            self._disk_bytes += len(data)
+            evicted = []
+            while self._disk_bytes > self.max_bytes and len(self._index) > 1:
+                old_digest, size = self._index.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_digest)
+
+        # Readers that already mapped an evicted file keep their mapping
+        for old_digest in evicted:
+            try:
+                os.remove(self._path(old_digest))
+            except FileNotFoundError:
+                pass
+            self.evictions += 1
+
+    async def put(self, digest: str, data: bytes):
+        if not data:
+            return
+        data = bytes(data)
+        self._hot_put(digest, data)
+        try:
+            await asyncio.to_thread(self._write, digest, data)
+        except OSError as e:
+            log.warning("⚠️ TTS cache write failed", extra={"error": str(e)})
+
+    def put_background(self, digest: str, data: bytes):
+        """Schedules put() without making the caller wait for the disk."""
+        task = asyncio.create_task(self.put(digest, data))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    def stats(self) -> dict:
+        hits = self.hot_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hot_entries": len(self._hot),
+            "hot_bytes": self._hot_bytes,
+            "disk_entries": len(self._index) if self._index is not None else None,
+            "disk_bytes": self._disk_bytes if self._index is not None else None,
+            "hot_hits": self.hot_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by every session in this worker process
+tts_cache = TTSAudioCache(
+    settings.TTS_CACHE_DIR,
+    max_bytes=settings.TTS_CACHE_MAX_MB * 1024 * 1024,
+    hot_max_bytes=settings.TTS_CACHE_HOT_MB * 1024 * 1024,
+)
@@ -0,0 +1,91 @@
+"""
+Benchmark: egress and encode cost of the outbound audio formats.
+
+Encodes a TTS-like 24 kHz stream frame by frame (as OrderedAudioStreamer
+sends it) with every codec/rate combination the server can negotiate, and
+reports bytes per second of dubbed audio, the reduction against raw PCM,
+encode time per second of audio and the decoded SNR.
+
+Run from backend/:
+    python -m benchmarks.bench_codecs
+    python -m benchmarks.bench_codecs --frame-bytes 4096
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.audio.codecs import (
+    CODECS,
+    OUTPUT_RATES,
+    TTS_RATE,
+    AudioEncoder,
+    adpcm_decode,
+    alaw_decode,
+    mulaw_decode,
+)
+from app.audio.resampler import StreamingResampler
+
+DECODERS = {
+    "pcm16": lambda data: np.frombuffer(data, dtype="<i2"),
+    "mulaw": mulaw_decode,
+    "alaw": alaw_decode,
+    "adpcm": adpcm_decode,
+}
+
+
+def tts_like(seconds, seed=0):
+    """Voiced harmonics with a syllable envelope, plus a little noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * TTS_RATE)) / TTS_RATE
+    f0 = 180 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / TTS_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    signal = 6000 * envelope * voiced + 200 * rng.standard_normal(len(t))
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+def snr_db(reference, decoded):
+    n = min(len(reference), len(decoded))
+    reference = reference[:n].astype(np.float64)
+    noise = reference - decoded[:n].astype(np.float64)
+    return 10 * np.log10(np.mean(reference ** 2) / max(np.mean(noise ** 2), 1e-12))
+
+
+def run(codec, rate, audio, frame_bytes):
+    encoder = AudioEncoder(codec, rate)
+    pcm = audio.tobytes()
+    frames = []
+    started = time.perf_counter()
+    for i in range(0, len(pcm), frame_bytes):
+        frames.append(encoder.encode(pcm[i:i + frame_bytes]))
+    elapsed = time.perf_counter() - started
+
+    decoded = np.concatenate([DECODERS[codec](f) for f in frames])
+    reference = audio
+    if rate != TTS_RATE:
+        # Compare against the same band-limited signal the client should hear
+        reference = StreamingResampler(TTS_RATE, rate).process(pcm)
+    return sum(len(f) for f in frames), elapsed, snr_db(reference, decoded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--frame-bytes", type=int, default=16384, help="streamer frame size (max_frame_bytes)")
+    args = parser.parse_args()
+
+    audio = tts_like(args.seconds)
+    print(f"{args.seconds:.0f}s of 24 kHz TTS-like audio, {args.frame_bytes}-byte frames\n")
+    print(f"{'format':<14}{'kB/s':>8}{'vs pcm':>8}{'encode ms/s':>13}{'snr dB':>8}")
+    for rate in OUTPUT_RATES:
+        for codec in CODECS:
+            size, elapsed, snr = run(codec, rate, audio, args.frame_bytes)
+            per_second = size / args.seconds
+            print(f"{codec + '@' + str(rate // 1000) + 'k':<14}{per_second / 1000:>8.1f}"
+                  f"{audio.nbytes / size:>7.2f}x{elapsed / args.seconds * 1000:>13.2f}{snr:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: event-loop lag with per-session DSP inline vs on the DSP pool.
+
+Simulates N sessions, each receiving 44.1 kHz chunks in real time and running
+the ingest path (StreamingResampler + VADGate) on them, while a LoopLagMonitor
+measures how late the event loop wakes up. Lag is what every other session on
+the worker feels (late receives, Deepgram sends and TTS frames).
+
+Run from backend/:
+    python -m benchmarks.bench_dsp_offload --sessions 16
+    python -m benchmarks.bench_dsp_offload --scorer silero   # needs the VAD model
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from app.audio.dsp_executor import DSPExecutor
+from app.audio.resampler import StreamingResampler
+from app.audio.vad import VADGate
+from app.core.loop_monitor import LoopLagMonitor
+
+CHUNK_FRAMES = 4096
+BROWSER_RATE = 44100
+
+
+def energy_scores(windows):
+    """Cheap stand-in for the Silero model: RMS-based speech probability."""
+    rms = np.sqrt(np.mean(windows.astype(np.float32) ** 2, axis=1))
+    return np.clip(rms / 3000.0, 0.0, 1.0)
+
+
+def make_audio(seconds, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * BROWSER_RATE)) / BROWSER_RATE
+    envelope = (np.sin(2 * np.pi * 0.3 * t) > 0).astype(np.float32)  # speech / pause
+    signal = envelope * 6000 * np.sin(2 * np.pi * 180 * t) + 300 * rng.standard_normal(len(t))
+    return signal.astype(np.int16)
+
+
+async def session(executor, score_factory, audio, speed):
+    resampler = StreamingResampler(BROWSER_RATE, 16000)
+    gate = VADGate(score_factory())
+    dsp = executor.session()
+
+    def ingest(data):
+        return gate.process(resampler.process(data))
+
+    chunk_s = CHUNK_FRAMES / BROWSER_RATE / speed
+    start = time.monotonic()
+    for n, i in enumerate(range(0, len(audio), CHUNK_FRAMES)):
+        await dsp.run(ingest, audio[i:i + CHUNK_FRAMES].tobytes())
+        delay = start + (n + 1) * chunk_s - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def run(offload, args, score_factory):
+    executor = DSPExecutor(workers=args.workers, enabled=offload)
+    monitor = LoopLagMonitor(interval=0.01, histogram=None)
+    monitor.start()
+    audio = [make_audio(args.seconds, seed) for seed in range(args.sessions)]
+    started = time.perf_counter()
+    await asyncio.gather(*(session(executor, score_factory, a, args.speed) for a in audio))
+    wall = time.perf_counter() - started
+    await monitor.stop()
+    executor.shutdown()
+    return wall, monitor.stats(), executor.stats()
+
+
+def load_scorer(name, torch_threads, model_path=None):
+    """Returns a factory for one session's score_fn."""
+    if name == "energy":
+        return lambda: energy_scores
+    from app.audio.processor import AudioProcessor
+    from app.audio.vad_model import VADStream
+    processor = AudioProcessor(torch_threads=torch_threads, vad_model_path=model_path)
+    processor.load_model()
+    return lambda: VADStream(processor.load_model).score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--speed", type=float, default=1.0, help="chunk rate relative to real time")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--scorer", default="energy", choices=("energy", "silero"))
+    parser.add_argument("--vad-model-path", help="local .jit/.onnx Silero model (default: torch.hub)")
+    args = parser.parse_args()
+
+    score_factory = load_scorer(args.scorer, args.torch_threads, args.vad_model_path)
+    print(f"{args.sessions} sessions x {args.seconds:.0f}s, scorer={args.scorer}, workers={args.workers}\n")
+    print(f"{'mode':<10}{'wall s':>8}{'lag avg ms':>12}{'lag max ms':>12}{'dsp avg ms':>12}")
+    for offload in (False, True):
+        wall, lag, dsp = asyncio.run(run(offload, args, score_factory))
+        mode = "offload" if offload else "inline"
+        print(f"{mode:<10}{wall:>8.2f}{lag['lag_avg_ms']:>12.2f}{lag['lag_max_ms']:>12.2f}{dsp['run_avg_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
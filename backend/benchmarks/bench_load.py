@@ -0,0 +1,415 @@
+"""
+Load test: how many concurrent /ws/stream sessions one worker sustains.
+
+Runs the backend as a normal uvicorn process against the local stand-ins
+(benchmarks/standins.py) and ramps up the number of synthetic clients, each
+streaming the recording in real time like bench_pipeline does. For every
+level it records:
+
+- event-loop lag of the worker (from its /metrics histogram),
+- per-session end-to-end latency (last word heard by ASR -> first dub byte
+  at the client) and the share of segments whose audio arrived,
+- worker CPU (cores) and RSS growth, total and per session (Linux /proc).
+
+The knee is the first level where e2e p95 grows past --e2e-tolerance over
+the single-session baseline, loop lag p99 passes --max-loop-lag-ms, or
+delivery falls below --min-delivery; capacity is the level before it.
+Reports are JSON with the commit and settings, and --compare flags
+regressions against an earlier report (exit code 1), so runs on the same
+machine are comparable across commits.
+
+Run from backend/:
+    python -m benchmarks.bench_load --levels 1,2,4,8,16 --seconds 30
+    python -m benchmarks.bench_load --json load.json
+    python -m benchmarks.bench_load --compare load.json
+
+Stand-ins and clients share this process; if its own loop lag ("harness")
+gets high, the numbers measure the harness, not the worker.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+import aiohttp
+import numpy as np
+
+from app.core.loop_monitor import LoopLagMonitor
+from benchmarks.bench_pipeline import (
+    BACKEND_DIR,
+    BROWSER_RATE,
+    CHUNK_FRAMES,
+    DEFAULT_WAV,
+    correlate,
+    free_port,
+    launch_backend,
+    load_wav,
+    percentiles,
+    replay,
+    wait_ready,
+)
+from benchmarks.standins import StandInServer
+
+LOOP_LAG_METRIC = "linguastream_event_loop_lag_seconds"
+HARNESS_LAG_WARN_MS = 100.0
+_SESSION_TAG = re.compile(r"^s(\d+) ")
+
+
+# --- Worker resources and loop lag ---
+
+def parse_histogram(text: str, name: str) -> dict:
+    """Cumulative bucket counts ({le: count}), sum and count of an unlabelled histogram."""
+    buckets = {}
+    total = count = 0.0
+    for line in text.splitlines():
+        if line.startswith(name + "_bucket"):
+            le = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets[float(le)] = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(name + "_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith(name + "_count"):
+            count = float(line.rsplit(" ", 1)[1])
+    return {"buckets": buckets, "sum": total, "count": count}
+
+
+def histogram_delta(before: dict, after: dict) -> dict:
+    return {
+        "buckets": {le: n - before["buckets"].get(le, 0.0) for le, n in after["buckets"].items()},
+        "sum": after["sum"] - before["sum"],
+        "count": after["count"] - before["count"],
+    }
+
+
+def histogram_quantile(q: float, histogram: dict):
+    """Quantile from cumulative buckets, interpolating within the bucket (like PromQL)."""
+    total = histogram["count"]
+    if not total:
+        return None
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for le, cumulative in sorted(histogram["buckets"].items()):
+        if cumulative >= rank:
+            if le == float("inf"):
+                return lower
+            return lower + (le - lower) * (rank - below) / max(cumulative - below, 1e-12)
+        lower, below = le, cumulative
+    return lower
+
+
+class ProcessSampler:
+    """CPU time and peak RSS of the worker process, from /proc (None elsewhere)."""
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.available = os.path.exists(f"/proc/{pid}/stat")
+        self.rss_peak = 0
+        self._task = None
+
+    def cpu_seconds(self):
+        if not self.available:
+            return None
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def rss_bytes(self):
+        if not self.available:
+            return None
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return None
+
+    def start(self):
+        self.rss_peak = self.rss_bytes() or 0
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.rss_peak = max(self.rss_peak, self.rss_bytes() or 0)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# --- Sessions ---
+
+class SessionEvents:
+    """The stand-in events of one session, shaped for bench_pipeline.correlate()."""
+    def __init__(self, standins, conn, tts_ids):
+        tag = f"s{conn} "
+        self._events = {
+            "asr_final": [e for e in standins.of_kind("asr_final") if e["conn"] == conn],
+            "translate": [e for e in standins.of_kind("translate") if e["input"].startswith(tag)],
+            "tts": [e for e in standins.of_kind("tts") if e["id"] in tts_ids],
+        }
+
+    def of_kind(self, kind):
+        return self._events[kind]
+
+
+def session_conn(client):
+    """The stand-in ASR socket that served a client, from its transcript tags."""
+    for _, message in client["transcripts"]:
+        match = _SESSION_TAG.match(message.get("text") or "")
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def analyse_session(standins, client) -> dict:
+    conn = session_conn(client)
+    if conn is None:
+        return {"segments": 0, "delivered": 0, "e2e": []}
+    arrivals = client["arrivals"]
+    e2e = []
+    segments = correlate(SessionEvents(standins, conn, set(arrivals)))
+    for seg in segments:
+        delivered = [arrivals[e["id"]] for e in seg["tts"] if e["id"] in arrivals]
+        if delivered:
+            e2e.append(min(delivered) - seg["finals"][-1]["heard_at"])
+    # Segments sent for translation (hedged requests repeat an input)
+    expected = len({e["input"] for e in standins.of_kind("translate") if e["input"].startswith(f"s{conn} ")})
+    return {"segments": expected, "delivered": len(e2e), "e2e": e2e}
+
+
+async def run_level(n, args, url, base_url, audio, standins, sampler, idle_rss):
+    harness = LoopLagMonitor(interval=0.05, histogram=None)
+    harness.start()
+    async with aiohttp.ClientSession() as http:
+        async with http.get(f"{base_url}/metrics") as resp:
+            lag_before = parse_histogram(await resp.text(), LOOP_LAG_METRIC)
+        cpu_before = sampler.cpu_seconds()
+        started = time.monotonic()
+        sampler.start()
+
+        async def client(i):
+            await asyncio.sleep(i * args.stagger)
+            return await replay(url, audio, rate=args.capture_rate, frames=args.frame_size, tail_s=args.tail)
+
+        clients = await asyncio.gather(*(client(i) for i in range(n)))
+
+        sampler.stop()
+        wall = time.monotonic() - started
+        cpu_after = sampler.cpu_seconds()
+        async with http.get(f"{base_url}/metrics") as resp:
+            loop_lag = histogram_delta(lag_before, parse_histogram(await resp.text(), LOOP_LAG_METRIC))
+    await harness.stop()
+
+    sessions = [analyse_session(standins, c) for c in clients]
+    e2e = [x for s in sessions for x in s["e2e"]]
+    expected = sum(s["segments"] for s in sessions)
+    session_p95 = [float(np.percentile(s["e2e"], 95)) for s in sessions if s["e2e"]]
+    cpu = (cpu_after - cpu_before) / wall if cpu_before is not None else None
+    rss_growth = sampler.rss_peak - idle_rss if sampler.available else None
+
+    def ms(q):
+        value = histogram_quantile(q, loop_lag)
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "sessions": n,
+        "e2e": percentiles(e2e),
+        "worst_session_e2e_p95": round(max(session_p95), 3) if session_p95 else None,
+        "delivery": round(sum(s["delivered"] for s in sessions) / expected, 3) if expected else 0.0,
+        "loop_lag_ms": {
+            "p50": ms(0.5),
+            "p99": ms(0.99),
+            "avg": round(loop_lag["sum"] / loop_lag["count"] * 1000, 2) if loop_lag["count"] else None,
+        },
+        "cpu_cores": round(cpu, 3) if cpu is not None else None,
+        "cpu_per_session": round(cpu / n, 4) if cpu is not None else None,
+        "rss_mb": round(sampler.rss_peak / 2**20, 1) if sampler.available else None,
+        "rss_per_session_mb": round(rss_growth / n / 2**20, 2) if rss_growth is not None else None,
+        "harness_lag_max_ms": round(harness.stats()["lag_max_ms"], 1),
+    }
+
+
+# --- Knee and comparison ---
+
+def find_knee(levels, e2e_tolerance=0.5, max_loop_lag_ms=50.0, min_delivery=0.95) -> dict:
+    """
+    First level that breaks a limit, relative to the first (baseline) level.
+    capacity is the largest level before it (all levels if none breaks).
+    """
+    base = levels[0]["e2e"]["p95"] if levels and levels[0]["e2e"] else None
+    capacity = 0
+    for level in levels:
+        reasons = []
+        p95 = level["e2e"]["p95"] if level["e2e"] else None
+        if p95 is None or (base is not None and p95 > base * (1 + e2e_tolerance)):
+            reasons.append(f"e2e p95 {p95}s vs baseline {base}s")
+        lag = level["loop_lag_ms"]["p99"]
+        if lag is not None and lag > max_loop_lag_ms:
+            reasons.append(f"loop lag p99 {lag}ms")
+        if level["delivery"] < min_delivery:
+            reasons.append(f"delivery {level['delivery']:.0%}")
+        if reasons:
+            return {"knee": level["sessions"], "capacity": capacity, "reasons": reasons}
+        capacity = level["sessions"]
+    return {"knee": None, "capacity": capacity, "reasons": []}
+
+
+def compare(old: dict, new: dict, e2e_tolerance=0.2) -> list:
+    """Regressions of `new` against `old` (empty if none)."""
+    regressions = []
+    if new["capacity"]["capacity"] < old["capacity"]["capacity"]:
+        regressions.append(f"capacity {old['capacity']['capacity']} -> {new['capacity']['capacity']} sessions")
+    old_levels = {level["sessions"]: level for level in old["levels"]}
+    for level in new["levels"]:
+        before = old_levels.get(level["sessions"])
+        if before is None or level["sessions"] > old["capacity"]["capacity"]:
+            continue
+        if before["e2e"] and level["e2e"]:
+            # Small absolute slack so jitter at low latency is not a regression
+            limit = before["e2e"]["p95"] * (1 + e2e_tolerance) + 0.1
+            if level["e2e"]["p95"] > limit:
+                regressions.append(f"{level['sessions']} sessions: e2e p95 {before['e2e']['p95']}s -> {level['e2e']['p95']}s")
+    return regressions
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    standins = await StandInServer(
+        asr_latency=args.asr_latency,
+        translate_latency=args.translate_latency,
+        tts_latency=args.tts_latency,
+        tag_sessions=True,
+        seed=args.seed,
+    ).start()
+    port = free_port()
+    overrides = {"VAD_ENABLED": "false"} if args.no_vad else {}
+    proc = launch_backend(port, standins, overrides, verbose=args.verbose)
+    base_url = f"http://127.0.0.1:{port}"
+    url = (f"ws://127.0.0.1:{port}/ws/stream?lang={args.lang}"
+           f"&sample_rate={args.capture_rate}&frame_size={args.frame_size}")
+    levels = []
+    try:
+        async with aiohttp.ClientSession() as session:
+            await wait_ready(session, f"{base_url}/readyz", proc)
+        audio = load_wav(args.wav, args.seconds, rate=args.capture_rate)
+        if args.warmup:
+            # First-session costs (model sessions, imports, pools) are not per-session costs
+            await replay(url, audio[:int(args.warmup * args.capture_rate)], rate=args.capture_rate, frames=args.frame_size, tail_s=2.0)
+        sampler = ProcessSampler(proc.pid)
+        idle_rss = sampler.rss_bytes() or 0
+        for n in args.levels:
+            print(f"▶️ {n} session(s) x {len(audio) / args.capture_rate:.0f}s")
+            level = await run_level(n, args, url, base_url, audio, standins, sampler, idle_rss)
+            levels.append(level)
+            print_level(level)
+            knee = find_knee(levels, args.e2e_tolerance, args.max_loop_lag_ms, args.min_delivery)
+            if knee["knee"] is not None and not args.full:
+                break
+            await asyncio.sleep(args.cooldown)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        await standins.stop()
+
+    return {
+        "revision": git_revision(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {
+            "levels": args.levels, "seconds": args.seconds, "warmup": args.warmup, "stagger": args.stagger, "wav": os.path.basename(args.wav),
+            "vad": not args.no_vad, "asr_latency": args.asr_latency, "translate_latency": args.translate_latency,
+            "tts_latency": args.tts_latency, "seed": args.seed, "e2e_tolerance": args.e2e_tolerance,
+            "max_loop_lag_ms": args.max_loop_lag_ms, "min_delivery": args.min_delivery,
+        },
+        "levels": levels,
+        "capacity": find_knee(levels, args.e2e_tolerance, args.max_loop_lag_ms, args.min_delivery),
+    }
+
+
+def print_level(level):
+    e2e = level["e2e"] or {}
+    print(f"   e2e p50/p95 {e2e.get('p50')}/{e2e.get('p95')}s (worst session p95 {level['worst_session_e2e_p95']}s), "
+          f"delivery {level['delivery']:.0%}, loop lag p50/p99 {level['loop_lag_ms']['p50']}/{level['loop_lag_ms']['p99']}ms, "
+          f"cpu {level['cpu_cores']} cores ({level['cpu_per_session']}/session), "
+          f"rss {level['rss_mb']} MB (+{level['rss_per_session_mb']} MB/session), harness lag max {level['harness_lag_max_ms']}ms")
+    if level["harness_lag_max_ms"] > HARNESS_LAG_WARN_MS:
+        print("   ⚠️ The load generator itself is lagging: run it on another core/machine for this level")
+
+
+def print_report(report):
+    print(f"\n{'sessions':>8}{'e2e p50':>9}{'e2e p95':>9}{'deliv':>7}{'lag p99':>9}{'cpu/s':>8}{'MB/s':>7}")
+    for level in report["levels"]:
+        e2e = level["e2e"] or {}
+        print(f"{level['sessions']:>8}{e2e.get('p50', float('nan')):>9.3f}{e2e.get('p95', float('nan')):>9.3f}"
+              f"{level['delivery']:>7.0%}{level['loop_lag_ms']['p99'] or 0:>9.1f}"
+              f"{level['cpu_per_session'] or 0:>8.3f}{level['rss_per_session_mb'] or 0:>7.1f}")
+    capacity = report["capacity"]
+    if capacity["knee"] is None:
+        print(f"\ncapacity: >= {capacity['capacity']} sessions (no knee within the levels tested)")
+    else:
+        print(f"\ncapacity: {capacity['capacity']} sessions; knee at {capacity['knee']} ({'; '.join(capacity['reasons'])})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    parser.add_argument("--seconds", type=float, default=30.0, help="audio each client streams")
+    parser.add_argument("--stagger", type=float, default=0.25, help="seconds between client starts within a level")
+    parser.add_argument("--tail", type=float, default=8.0, help="seconds each client listens after its audio ends")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of one unmeasured session before the first level")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="seconds between levels")
+    parser.add_argument("--lang", default="hi-IN")
+    parser.add_argument("--capture-rate", type=int, default=BROWSER_RATE)
+    parser.add_argument("--frame-size", type=int, default=CHUNK_FRAMES)
+    parser.add_argument("--asr-latency", default="const:0.25")
+    parser.add_argument("--translate-latency", default="lognormal:0.3,0.6")
+    parser.add_argument("--tts-latency", default="lognormal:0.6,1.2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-vad", action="store_true", help="run the backend with VAD_ENABLED=false")
+    parser.add_argument("--e2e-tolerance", type=float, default=0.5, help="knee: e2e p95 this much above the 1-session level")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=50.0, help="knee: worker loop lag p99 above this")
+    parser.add_argument("--min-delivery", type=float, default=0.95, help="knee: fewer segments' audio delivered than this")
+    parser.add_argument("--full", action="store_true", help="keep ramping past the knee")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="earlier --json report; exit 1 on regressions")
+    parser.add_argument("--verbose", action="store_true", help="show backend logs")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if old.get("host", {}).get("cpus") != report["host"]["cpus"] or old.get("config") != report["config"]:
+            print("⚠️ Different host or settings than the baseline: numbers may not be comparable")
+        regressions = compare(old, report)
+        print(f"\nvs {old.get('revision')}: " + ("no regressions" if not regressions else "REGRESSIONS"))
+        for regression in regressions:
+            print(f"   - {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Benchmark: end-to-end replay of a recording through /ws/stream, offline.
+
+Deepgram and Sarvam are replaced by the local stand-ins in
+benchmarks/standins.py (seeded latency models), the backend runs as a normal
+uvicorn process pointed at them, and a WAV file is streamed in real time the
+way the extension does (44.1 kHz int16, 4096 frames per message).
+
+Reports p50/p95/p99 for each stage and the playback drift (how far the dub
+runs behind the speaker) over the session.
+
+Run from backend/:
+    python -m benchmarks.bench_pipeline --seconds 60
+    python -m benchmarks.bench_pipeline --policy adaptive --json out.json
+    python -m benchmarks.bench_pipeline --tts-batch     # micro-batched TTS requests
+    python -m benchmarks.bench_pipeline --capture-rate 16000 --frame-size 1024
+    python -m benchmarks.bench_pipeline --tts-latency spike:0.6,1.2,0.1,4 [--no-hedge]
+    python -m benchmarks.bench_pipeline --endpointing 0.3 [--speculate | --speculate-tts]
+    python -m benchmarks.bench_pipeline --asr-drop-after 15   # reconnect + replay
+    python -m benchmarks.bench_pipeline --client-drop-every 10  # resumable sessions
+    python -m benchmarks.bench_pipeline --seconds 0 --tts-seconds-per-char 0.08 [--no-playout]
+
+Without network, point VAD_MODEL_PATH at a local Silero .jit/.onnx file
+(or pass --no-vad); otherwise the backend fetches the model from torch.hub.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import wave
+
+import aiohttp
+import numpy as np
+from scipy.signal import resample_poly
+
+from benchmarks.standins import TTS_SAMPLE_RATE, PCMTagParser, StandInServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WAV = os.path.join(BACKEND_DIR, "test_capture_speech_only.wav")
+BROWSER_RATE = 44100
+CHUNK_FRAMES = 4096
+
+
+def load_wav(path, seconds=None, rate=BROWSER_RATE):
+    with wave.open(path, "rb") as wav:
+        src_rate = wav.getframerate()
+        channels = wav.getnchannels()
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        audio = audio.reshape(-1, channels)[:, 0]
+    if seconds:
+        audio = audio[: int(seconds * src_rate)]
+    if src_rate != rate:
+        g = np.gcd(src_rate, rate)
+        audio = np.clip(resample_poly(audio, rate // g, src_rate // g), -32768, 32767).astype(np.int16)
+    return audio
+
+
+def percentiles(values):
+    if not values:
+        return None
+    arr = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"n": len(values), "p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3), "max": round(arr.max(), 3)}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch_backend(port, standins, overrides=None, verbose=False):
+    """Runs the app under uvicorn, pointed at the stand-ins, with caches off."""
+    env = dict(os.environ)
+    env.update({
+        "DEEPGRAM_URL": standins.ws_url,
+        "SARVAM_API_URL": standins.http_url,
+        "DEEPGRAM_API_KEY": env.get("DEEPGRAM_API_KEY") or "standin",
+        "SARVAM_API_KEY": env.get("SARVAM_API_KEY") or "standin",
+        "TRANSLATION_CACHE_ENABLED": "false",
+        "TTS_CACHE_ENABLED": "false",
+    })
+    env.update(overrides or {})
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=None if verbose else subprocess.DEVNULL,
+    )
+
+
+def start_backend(port, standins, args):
+    env = {"SEGMENTER_POLICY": args.policy}
+    if args.no_vad:
+        env["VAD_ENABLED"] = "false"
+    if args.tts_batch:
+        env["TTS_BATCH_ENABLED"] = "true"
+    if args.no_hedge:
+        env["UPSTREAM_HEDGE_ENABLED"] = "false"
+    if args.no_playout:
+        env["PLAYOUT_HOLD"] = env["PLAYOUT_ADAPTIVE_PACE"] = "false"
+    if args.target_lag is not None:
+        env["PLAYOUT_TARGET_LAG_MS"] = str(int(args.target_lag * 1000))
+    if args.speculate:
+        env["SPECULATIVE_TRANSLATION"] = "true"
+    if args.speculate_tts:
+        env["SPECULATIVE_TRANSLATION"] = env["SPECULATIVE_TTS"] = "true"
+    return launch_backend(port, standins, env, verbose=args.verbose)
+
+
+async def wait_ready(session, url, proc, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Backend exited with code {proc.returncode}")
+        try:
+            async with session.get(url) as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.25)
+    raise TimeoutError("Backend did not start")
+
+
+async def replay(url, audio, speed=1.0, tail_s=8.0, rate=BROWSER_RATE, frames=CHUNK_FRAMES, drop_every=0.0):
+    """
+    Streams `audio` in real time and records when each tagged TTS response
+    arrives. With `drop_every`, the socket is dropped that often (close code
+    4001) and the session resumed on a new one, the way the extension
+    reconnects: acks every 0.5 s, then ?resume=<token>&last_seq=<n>.
+    """
+    parser = PCMTagParser()
+    arrivals = {}   # tts id -> monotonic time of its first byte
+    order = []
+    transcripts = []
+    state = {"token": None, "seq": 0, "drops": 0, "lost": 0, "resumed": 0}
+
+    async with aiohttp.ClientSession() as session:
+        async def receiver(ws):
+            async for msg in ws:
+                now = time.monotonic()
+                if msg.type == aiohttp.WSMsgType.BINARY:
+                    state["seq"] += 1
+                    for tts_id in parser.feed(msg.data):
+                        arrivals[tts_id] = now
+                        order.append(tts_id)
+                elif msg.type == aiohttp.WSMsgType.TEXT:
+                    data = json.loads(msg.data)
+                    if data.get("type") == "session":
+                        # Numbering starts after this message (or resumes from it)
+                        state["token"] = data["token"]
+                        state["seq"] = data["seq"]
+                        state["lost"] += data["lost"]
+                        state["resumed"] += data["resumed"]
+                    else:
+                        state["seq"] += 1
+                        transcripts.append((now, data))
+
+        async def connect():
+            resume = f"&resume={state['token']}&last_seq={state['seq']}" if state["token"] else ""
+            ws = await session.ws_connect(url + resume, max_msg_size=0)
+            return ws, asyncio.create_task(receiver(ws))
+
+        ws, recv_task = await connect()
+        chunk_s = frames / rate / speed
+        started = time.monotonic()
+        last_ack = last_drop = started
+        for i in range(0, len(audio), frames):
+            await ws.send_bytes(audio[i:i + frames].tobytes())
+            now = time.monotonic()
+            if now - last_ack >= 0.5:
+                await ws.send_str(json.dumps({"type": "ack", "seq": state["seq"]}))
+                last_ack = now
+            if drop_every and now - last_drop >= drop_every:
+                # Whatever the server sends from here on is unacknowledged and replayed
+                recv_task.cancel()
+                await ws.close(code=4001)
+                state["drops"] += 1
+                ws, recv_task = await connect()
+                last_drop = time.monotonic()
+            # Pace against the start time so send jitter does not accumulate
+            delay = started + (i // frames + 1) * chunk_s - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        await asyncio.sleep(tail_s)
+        await ws.close()
+        recv_task.cancel()
+
+    return {
+        "arrivals": arrivals,
+        "order": order,
+        "transcripts": transcripts,
+        "started": started,
+        "drops": state["drops"],
+        "resumed": state["resumed"],
+        "lost": state["lost"],
+    }
+
+
+def correlate(standins):
+    """
+    Joins stand-in logs and client arrivals into one record per segment:
+    ASR finals -> translate request (same text) -> TTS requests (clauses of
+    the translation) -> first audio byte at the client.
+    """
+    finals = standins.of_kind("asr_final")
+    translates = standins.of_kind("translate")
+    tts = {e["id"]: e for e in standins.of_kind("tts")}
+
+    segments = []
+    claimed = set()
+    next_final = 0
+    for tr in translates:
+        # Greedily consume finals until their text adds up to this segment
+        parts = []
+        used = []
+        j = next_final
+        while j < len(finals) and " ".join(parts) != tr["input"]:
+            parts.append(finals[j]["text"])
+            used.append(finals[j])
+            j += 1
+        if " ".join(parts) != tr["input"]:
+            continue
+        next_final = j
+
+        clauses = [
+            e for e in tts.values()
+            if e["id"] not in claimed and e["text"] in tr["output"] and e["received_at"] >= tr["responded_at"]
+        ]
+        claimed.update(e["id"] for e in clauses)
+        segments.append({"finals": used, "translate": tr, "tts": sorted(clauses, key=lambda e: e["id"])})
+    return segments
+
+
+def analyse(standins, client):
+    segments = correlate(standins)
+    arrivals = client["arrivals"]
+    tts_seconds = {e["id"]: e["samples"] / TTS_SAMPLE_RATE for e in standins.of_kind("tts")}
+
+    # Simulated playback: each response plays back-to-back in arrival order
+    play_start = {}
+    cursor = 0.0
+    for tts_id in client["order"]:
+        cursor = max(cursor, arrivals[tts_id])
+        play_start[tts_id] = cursor
+        cursor += tts_seconds.get(tts_id, 0.0)
+
+    stats = {k: [] for k in ("asr_final", "segment_wait", "translate", "tts_first", "tts_total", "e2e", "drift")}
+    drift_series = []
+    for seg in segments:
+        last = seg["finals"][-1]
+        first = seg["finals"][0]
+        tr = seg["translate"]
+        for f in seg["finals"]:
+            stats["asr_final"].append(f["emitted_at"] - f["heard_at"])
+        stats["segment_wait"].append(tr["received_at"] - last["emitted_at"])
+        stats["translate"].append(tr["responded_at"] - tr["received_at"])
+
+        delivered = [e for e in seg["tts"] if e["id"] in arrivals]
+        if not delivered:
+            continue
+        first_audio = min(arrivals[e["id"]] for e in delivered)
+        stats["tts_first"].append(first_audio - tr["responded_at"])
+        stats["tts_total"].append(max(e["responded_at"] for e in delivered) - tr["responded_at"])
+        stats["e2e"].append(first_audio - last["heard_at"])
+
+        playback = min(play_start[e["id"]] for e in delivered)
+        drift = playback - first["first_heard_at"]
+        stats["drift"].append(drift)
+        drift_series.append((first["audio_start"], drift))
+
+    report = {k: percentiles(v) for k, v in stats.items()}
+    report["segments"] = len(segments)
+    tts_events = standins.of_kind("tts")
+    report["tts_requests"] = len({e["request"] for e in tts_events})
+    report["tts_inputs"] = len(tts_events)
+    # More requests than segments/inputs = hedges and retries
+    report["translate_requests"] = len(standins.of_kind("translate"))
+    paces = [e["pace"] for e in tts_events if e.get("pace")]
+    report["tts_pace_avg"] = round(float(np.mean(paces)), 3) if paces else None
+    report["tts_pace_max"] = max(paces) if paces else None
+    report["segments_played"] = len(drift_series)
+    # Reconnect check: every word finalized exactly once, however often the socket dropped
+    finalized = [i for e in standins.of_kind("asr_final") for i in range(e["first_word"], e["last_word"] + 1)]
+    report["asr_drops"] = sum(1 for e in standins.of_kind("asr_session") if e["dropped"])
+    report["asr_words"] = len(set(finalized))
+    report["asr_words_repeated"] = len(finalized) - len(set(finalized))
+    # Client reconnects: every synthesized response should still arrive, once
+    report["client_drops"] = client["drops"]
+    report["client_resumed"] = client["resumed"]
+    report["client_lost"] = client["lost"]
+    report["tts_undelivered"] = sum(1 for e in tts_events if e["id"] not in arrivals)
+    report["tts_repeated"] = len(client["order"]) - len(set(client["order"]))
+    if len(drift_series) >= 2:
+        xs, ys = zip(*drift_series)
+        report["drift_slope_s_per_min"] = round(float(np.polyfit(xs, ys, 1)[0]) * 60, 3)
+    return report
+
+
+async def run(args):
+    standins = await StandInServer(
+        asr_latency=args.asr_latency,
+        translate_latency=args.translate_latency,
+        tts_latency=args.tts_latency,
+        endpointing_s=args.endpointing,
+        drop_after_s=args.asr_drop_after,
+        tts_seconds_per_char=args.tts_seconds_per_char,
+        seed=args.seed,
+    ).start()
+    port = free_port()
+    proc = start_backend(port, standins, args)
+    try:
+        async with aiohttp.ClientSession() as session:
+            await wait_ready(session, f"http://127.0.0.1:{port}/", proc)
+        audio = load_wav(args.wav, args.seconds, rate=args.capture_rate)
+        print(f"▶️ Replaying {len(audio) / args.capture_rate:.1f}s of {os.path.basename(args.wav)} "
+              f"(policy={args.policy}, capture {args.capture_rate} Hz x {args.frame_size})")
+        url = (f"ws://127.0.0.1:{port}/ws/stream?lang={args.lang}"
+               f"&sample_rate={args.capture_rate}&frame_size={args.frame_size}")
+        client = await replay(
+            url, audio,
+            speed=args.speed,
+            rate=args.capture_rate,
+            frames=args.frame_size,
+            drop_every=args.client_drop_every
+        )
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        await standins.stop()
+    return analyse(standins, client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", default=DEFAULT_WAV)
+    parser.add_argument("--seconds", type=float, default=60.0, help="replay only the first N seconds (0 = all)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (1.0 = real time)")
+    parser.add_argument("--lang", default="hi-IN")
+    parser.add_argument("--policy", default="fixed", choices=("fixed", "adaptive"))
+    parser.add_argument("--asr-latency", default="const:0.25")
+    parser.add_argument("--translate-latency", default="lognormal:0.3,0.6")
+    parser.add_argument("--tts-latency", default="lognormal:0.6,1.2")
+    parser.add_argument("--tts-seconds-per-char", type=float, default=0.06, help="stand-in speech length per character (at pace 1.2)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-vad", action="store_true", help="run the backend with VAD_ENABLED=false")
+    parser.add_argument("--capture-rate", type=int, default=BROWSER_RATE, help="client capture rate (16000 = no server resampling)")
+    parser.add_argument("--frame-size", type=int, default=CHUNK_FRAMES, help="samples per WebSocket message")
+    parser.add_argument("--tts-batch", action="store_true", help="run the backend with TTS_BATCH_ENABLED=true")
+    parser.add_argument("--no-hedge", action="store_true", help="run the backend with UPSTREAM_HEDGE_ENABLED=false")
+    parser.add_argument("--endpointing", type=float, default=0.0, help="ASR stand-in waits this long (s) into a pause before finalizing")
+    parser.add_argument("--asr-drop-after", type=float, default=0.0, help="ASR stand-in drops each socket after this much audio (s)")
+    parser.add_argument("--client-drop-every", type=float, default=0.0, help="drop the client socket this often (s) and resume the session")
+    parser.add_argument("--no-playout", action="store_true", help="run the backend without playout alignment (no hold, fixed pace)")
+    parser.add_argument("--target-lag", type=float, help="PLAYOUT_TARGET_LAG_MS for the backend, in seconds")
+    parser.add_argument("--speculate", action="store_true", help="run the backend with SPECULATIVE_TRANSLATION=true")
+    parser.add_argument("--speculate-tts", action="store_true", help="also synthesize speculatively (SPECULATIVE_TTS=true)")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show backend logs")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    print(f"\n{'stage':<14}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for stage in ("asr_final", "segment_wait", "translate", "tts_first", "tts_total", "e2e", "drift"):
+        row = report[stage]
+        if row:
+            print(f"{stage:<14}{row['n']:>6}{row['p50']:>9.3f}{row['p95']:>9.3f}{row['p99']:>9.3f}{row['max']:>9.3f}")
+    print(f"\nsegments: {report['segments']} (played {report['segments_played']})")
+    print(f"tts: {report['tts_inputs']} inputs in {report['tts_requests']} requests "
+          f"(pace avg {report['tts_pace_avg']}, max {report['tts_pace_max']})")
+    print(f"translate: {report['translate_requests']} requests for {report['segments']} segments")
+    if report["client_drops"]:
+        print(f"client: {report['client_drops']} drops, {report['client_resumed']} resumed, {report['client_lost']} messages lost, "
+              f"{report['tts_undelivered']} tts responses undelivered, {report['tts_repeated']} repeated")
+    if report["asr_drops"] or report["asr_words_repeated"]:
+        print(f"asr: {report['asr_drops']} drops, {report['asr_words']} words finalized "
+              f"({report['asr_words_repeated']} repeated)")
+    if "drift_slope_s_per_min" in report:
+        print(f"drift slope: {report['drift_slope_s_per_min']:+.3f} s/min")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
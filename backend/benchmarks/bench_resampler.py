@@ -0,0 +1,71 @@
+"""
+Benchmark: per-chunk resample_poly (old ingest path) vs StreamingResampler.
+
+Run from backend/:
+    python -m benchmarks.bench_resampler
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from app.audio.resampler import StreamingResampler
+
+
+def make_signal(seconds, rate, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    tone = 8000 * np.sin(2 * np.pi * 440 * t)
+    noise = 1000 * rng.standard_normal(len(t))
+    return (tone + noise).astype(np.int16)
+
+
+def bench_stateless(chunks, up, down):
+    out = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        out.append(resample_poly(chunk, up, down).astype(np.int16))
+    return time.perf_counter() - start, np.concatenate(out)
+
+
+def bench_streaming(chunks, input_rate, output_rate):
+    resampler = StreamingResampler(input_rate, output_rate)
+    out = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        out.append(resampler.process(chunk.tobytes()))
+    out.append(resampler.flush())
+    return time.perf_counter() - start, np.concatenate(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--chunk", type=int, default=4096, help="samples per WebSocket message")
+    parser.add_argument("--input-rate", type=int, default=44100)
+    parser.add_argument("--output-rate", type=int, default=16000)
+    args = parser.parse_args()
+
+    signal = make_signal(args.seconds, args.input_rate)
+    chunks = [signal[i:i + args.chunk] for i in range(0, len(signal), args.chunk)]
+
+    probe = StreamingResampler(args.input_rate, args.output_rate)
+    reference = np.clip(resample_poly(signal, probe.up, probe.down), -32768, 32767).astype(np.int16)
+
+    t_old, y_old = bench_stateless(chunks, probe.up, probe.down)
+    t_new, y_new = bench_streaming(chunks, args.input_rate, args.output_rate)
+
+    def err(y):
+        n = min(len(y), len(reference))
+        return int(np.max(np.abs(y[:n].astype(np.int32) - reference[:n])))
+
+    print(f"Audio: {args.seconds:.0f}s @ {args.input_rate}Hz -> {args.output_rate}Hz, {len(chunks)} chunks of {args.chunk}")
+    print(f"{'path':<22}{'total ms':>10}{'us/chunk':>10}{'x realtime':>12}{'max err':>9}")
+    for name, t, y in (("resample_poly/chunk", t_old, y_old), ("StreamingResampler", t_new, y_new)):
+        print(f"{name:<22}{t * 1000:>10.1f}{t / len(chunks) * 1e6:>10.1f}{args.seconds / t:>12.0f}{err(y):>9}")
+    print(f"Speedup: {t_old / t_new:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: cold-start time of the backend.
+
+For each run, in a fresh process:
+  - import      time to `import app.main`
+  - liveness    uvicorn spawned -> GET /healthz answers 200
+  - readiness   uvicorn spawned -> GET /readyz answers 200 (VAD model loaded)
+
+Run from backend/:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --vad-model-path /path/to/silero_vad.onnx
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def backend_env(args):
+    env = dict(os.environ)
+    if args.vad_model_path:
+        env["VAD_MODEL_PATH"] = args.vad_model_path
+    return env
+
+
+def measure_import(env):
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return None
+
+
+def measure_server(env, timeout=180):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    live = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Backend exited with code {proc.returncode}")
+            if live is None and status(f"{base}/healthz") == 200:
+                live = time.perf_counter() - start
+            if live is not None and status(f"{base}/readyz") == 200:
+                ready = time.perf_counter() - start
+                break
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return live, ready
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--vad-model-path", help="local .jit/.onnx Silero model (default: torch.hub)")
+    args = parser.parse_args()
+
+    env = backend_env(args)
+    imports, lives, readies = [], [], []
+    for i in range(args.runs):
+        imports.append(measure_import(env))
+        live, ready = measure_server(env)
+        lives.append(live)
+        readies.append(ready)
+        print(f"run {i + 1}: import {imports[-1]:.2f}s  liveness {live:.2f}s  readiness {ready:.2f}s" if ready else
+              f"run {i + 1}: import {imports[-1]:.2f}s  liveness {live}  readiness timed out")
+
+    done = [r for r in readies if r is not None]
+    print(f"\nmedian  import {statistics.median(imports):.2f}s  liveness {statistics.median(lives):.2f}s", end="")
+    print(f"  readiness {statistics.median(done):.2f}s" if done else "  readiness n/a")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Local stand-ins for the upstream APIs, for offline benchmarks and tests.
+
+One aiohttp app serves:
+  - GET  /v1/listen       Deepgram live WebSocket (scripted transcript)
+  - POST /translate       Sarvam translate
+  - POST /text-to-speech  Sarvam TTS (tagged PCM in a WAV container, one per input)
+
+Point the backend at it with:
+    DEEPGRAM_URL=ws://127.0.0.1:<port>  SARVAM_API_URL=http://127.0.0.1:<port>
+
+The ASR stand-in does not recognize speech. It "hears" the words of a script
+at a fixed speaking rate, driven by how much audio it has received, so the
+transcript timing follows the audio the client actually streams.
+
+Each TTS response starts with a 5-sample header (magic, request id, sample
+count) so a client can tell which request every byte it receives came from
+(see PCMTagParser).
+"""
+import asyncio
+import base64
+import json
+import math
+import random
+import struct
+import time
+import uuid
+
+import numpy as np
+from aiohttp import WSMsgType, web
+
+ASR_SAMPLE_RATE = 16000
+TTS_SAMPLE_RATE = 24000
+TTS_BASE_PACE = 1.2  # pace tts_seconds_per_char is calibrated at (the service default)
+PCM_MAGIC = 0x5A5A
+PCM_HEADER_SAMPLES = 5
+
+DEFAULT_SCRIPT = (
+    "Welcome back to the course. Today we will look at recursion, one of the most "
+    "important ideas in programming. A recursive function is a function that calls "
+    "itself. Every call works on a smaller version of the same problem, and when the "
+    "problem is small enough, we return an answer directly. This is called the base "
+    "case. Without a base case, the function would call itself forever, and the "
+    "program would crash with a stack overflow. Let us write a simple example that "
+    "computes the factorial of a number. The factorial of five is five times four "
+    "times three times two times one. In code, we check whether n is equal to one, "
+    "and if it is, we return one. Otherwise, we return n times the factorial of n "
+    "minus one. Now let us trace what happens when we call it with three."
+)
+
+
+class LatencyModel:
+    """
+    Samples simulated service latency in seconds.
+
+    Spec strings:
+        "0" or "const:0.2"          fixed
+        "uniform:0.1,0.4"           uniform between bounds
+        "normal:0.3,0.05"           mean, std (clipped at 0)
+        "lognormal:0.3,0.9"         median, p95
+        "spike:0.3,0.9,0.05,3"      lognormal, plus 3 s with probability 0.05
+                                    (a stuck upstream request)
+    """
+    def __init__(self, spec="0", seed=None):
+        self.spec = spec
+        self._rng = random.Random(seed)
+        kind, _, args = spec.partition(":")
+        if not args:
+            kind, args = "const", kind
+        self.kind = kind
+        self.params = [float(a) for a in args.split(",")]
+        if kind not in ("const", "uniform", "normal", "lognormal", "spike"):
+            raise ValueError(f"Unknown latency model: {spec}")
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "const":
+            return p[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, self._rng.gauss(p[0], p[1]))
+        # lognormal from median and p95: sigma = ln(p95/median) / z95
+        median, p95 = p[:2]
+        sigma = math.log(p95 / median) / 1.645 if p95 > median else 0.0
+        latency = self._rng.lognormvariate(math.log(median), sigma)
+        if self.kind == "spike" and self._rng.random() < p[2]:
+            latency += p[3]
+        return latency
+
+
+def tagged_pcm(request_id: int, n_samples: int, freq=220.0) -> bytes:
+    """Header + a quiet tone, as little-endian int16."""
+    header = np.array(
+        [PCM_MAGIC, request_id >> 16, request_id & 0xFFFF, n_samples >> 16, n_samples & 0xFFFF],
+        dtype=np.uint16,
+    ).view(np.int16)
+    t = np.arange(n_samples) / TTS_SAMPLE_RATE
+    tone = (2000 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+    return np.concatenate((header, tone)).astype("<i2").tobytes()
+
+
+def wav_bytes(pcm: bytes, sample_rate=TTS_SAMPLE_RATE) -> bytes:
+    """Minimal 44-byte header WAV container (what bulbul returns)."""
+    header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b"data" + struct.pack("<I", len(pcm))
+    return header + pcm
+
+
+class PCMTagParser:
+    """
+    Splits the dubbed audio byte stream a client receives back into the
+    tagged TTS responses it was made of. feed() returns (request_id, is_start)
+    markers for the bytes just received.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._remaining = 0  # body bytes left in the current response
+        self.current_id = None
+
+    def feed(self, data: bytes):
+        markers = []
+        self._buffer.extend(data)
+        while self._buffer:
+            if self._remaining:
+                take = min(self._remaining, len(self._buffer))
+                del self._buffer[:take]
+                self._remaining -= take
+                continue
+            if len(self._buffer) < PCM_HEADER_SAMPLES * 2:
+                break
+            header = np.frombuffer(bytes(self._buffer[:PCM_HEADER_SAMPLES * 2]), dtype="<u2")
+            if header[0] != PCM_MAGIC:
+                raise ValueError("Audio stream lost sync with TTS stand-in tags")
+            self.current_id = (int(header[1]) << 16) | int(header[2])
+            n_samples = (int(header[3]) << 16) | int(header[4])
+            del self._buffer[:PCM_HEADER_SAMPLES * 2]
+            self._remaining = n_samples * 2
+            markers.append(self.current_id)
+        return markers
+
+
+class StandInServer:
+    """
+    Simulated Deepgram + Sarvam endpoints with configurable latency.
+    Every request is recorded in `events` with monotonic timestamps.
+    """
+    def __init__(
+        self,
+        script=DEFAULT_SCRIPT,
+        words_per_second=2.5,
+        final_every_s=1.0,
+        pause_every_words=14,
+        endpointing_s=0.0,
+        drop_after_s=0.0,
+        tag_sessions=False,
+        asr_latency="const:0.25",
+        translate_latency="lognormal:0.3,0.6",
+        tts_latency="lognormal:0.6,1.2",
+        tts_seconds_per_char=0.06,
+        seed=0,
+    ):
+        self.words = script.split()
+        self.words_per_second = words_per_second
+        self.final_every_s = final_every_s
+        self.pause_every_words = pause_every_words
+        # Like Deepgram's endpointing: a pause is only finalized after this
+        # much silence (interim results repeat meanwhile); 0 = immediately
+        self.endpointing_s = endpointing_s
+        # Close each live socket abruptly after this much audio (0 = never).
+        # The next socket continues the script after the last final sent, so
+        # a client that replays its unfinalized audio gets every word once.
+        self.drop_after_s = drop_after_s
+        self._listen_resume = (0, 0.0)  # (word index, script time) for the next socket
+        # Every live socket is numbered ("conn" in asr_* events). With
+        # tag_sessions, its transcripts start with "s<conn>", which the
+        # translation and the client's transcript messages carry along, so
+        # concurrent sessions reading the same script can be told apart
+        self.tag_sessions = tag_sessions
+        self._listen_conns = 0
+        self.asr_latency = LatencyModel(asr_latency, seed)
+        self.translate_latency = LatencyModel(translate_latency, seed + 1 if seed is not None else None)
+        self.tts_latency = LatencyModel(tts_latency, seed + 2 if seed is not None else None)
+        self.tts_seconds_per_char = tts_seconds_per_char
+
+        self.events = []
+        self._tts_ids = 0
+        self._tts_requests = 0
+        self._runner = None
+        self.port = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/v1/listen", self.handle_listen)
+        self.app.router.add_post("/translate", self.handle_translate)
+        self.app.router.add_post("/text-to-speech", self.handle_tts)
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    @property
+    def http_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    def of_kind(self, kind):
+        return [e for e in self.events if e["kind"] == kind]
+
+    # --- Script timeline ---
+    def _word_times(self):
+        """(start, end) audio time of each script word, with pauses."""
+        times = []
+        t = 0.0
+        step = 1.0 / self.words_per_second
+        for i in range(len(self.words)):
+            times.append((t, t + 0.8 * step))
+            t += step
+            if self.pause_every_words and (i + 1) % self.pause_every_words == 0:
+                t += 0.8
+        return times
+
+    # --- Deepgram live ---
+    async def handle_listen(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        self._listen_conns += 1
+        conn = self._listen_conns
+        tag = f"s{conn} " if self.tag_sessions else ""
+        times = self._word_times()
+        received_samples = 0
+        heard_at = {}        # word index -> wall time its audio end arrived
+        base_word = None     # where this socket starts in the script (on first audio)
+        base_time = 0.0      # script time of this socket's t=0
+        finalized = 0        # words already sent as final
+        sent_final = None    # word index after the last final actually sent
+        outbox = asyncio.Queue()
+        start_wall = time.monotonic()
+
+        def result(first, last, is_final, speech_final, from_finalize=False):
+            # Timestamps are relative to this socket, as Deepgram's are
+            words = [
+                {"word": self.words[i].strip(".,?!").lower(), "punctuated_word": self.words[i],
+                 "start": times[i][0] - base_time, "end": times[i][1] - base_time, "confidence": 0.99}
+                for i in range(first, last)
+            ]
+            return {
+                "type": "Results",
+                "channel_index": [0, 1],
+                "duration": times[last - 1][1] - times[first][0],
+                "start": times[first][0] - base_time,
+                "is_final": is_final,
+                "speech_final": speech_final,
+                "from_finalize": from_finalize,
+                "channel": {"alternatives": [{
+                    "transcript": tag + " ".join(self.words[first:last]),
+                    "confidence": 0.99,
+                    "words": words,
+                }]},
+                "metadata": {
+                    "request_id": str(uuid.uuid4()),
+                    "model_info": {"name": "standin", "version": "0", "arch": "standin"},
+                    "model_uuid": "standin",
+                },
+            }
+
+        def emit(message, first, last):
+            due = time.monotonic() + self.asr_latency.sample()
+            outbox.put_nowait((due, message, first, last))
+
+        async def sender():
+            nonlocal sent_final
+            # FIFO with per-message due time keeps results in order
+            while True:
+                due, message, first, last = await outbox.get()
+                await asyncio.sleep(max(0.0, due - time.monotonic()))
+                if ws.closed:
+                    return
+                await ws.send_str(json.dumps(message))
+                if message["is_final"]:
+                    sent_final = last
+                    self.events.append({
+                        "kind": "asr_final",
+                        "conn": conn,
+                        "text": message["channel"]["alternatives"][0]["transcript"],
+                        "first_word": first,
+                        "last_word": last - 1,
+                        "audio_start": times[first][0],
+                        "audio_end": times[last - 1][1],
+                        "first_heard_at": heard_at[first],
+                        "heard_at": heard_at[last - 1],
+                        "emitted_at": time.monotonic(),
+                        "speech_final": message["speech_final"],
+                        "from_finalize": message["from_finalize"],
+                    })
+
+        def advance(force_final=False):
+            nonlocal finalized
+            audio_time = base_time + received_samples / ASR_SAMPLE_RATE
+            now = time.monotonic()
+            heard = finalized
+            while heard < len(times) and times[heard][1] <= audio_time:
+                heard_at.setdefault(heard, now)
+                heard += 1
+            if heard == finalized:
+                return
+
+            pause = self.pause_every_words and heard % self.pause_every_words == 0 and (
+                heard == len(times) or times[heard][0] - times[heard - 1][1] > 0.5
+            )
+            span = times[heard - 1][1] - times[finalized][0]
+            if pause and heard < len(times) and not force_final and audio_time < times[heard - 1][1] + self.endpointing_s:
+                emit(result(finalized, heard, False, False), finalized, heard)
+                return
+            if force_final or pause or span >= self.final_every_s or heard == len(times):
+                emit(result(finalized, heard, True, bool(pause) or heard == len(times), force_final), finalized, heard)
+                finalized = heard
+            else:
+                emit(result(finalized, heard, False, False), finalized, heard)
+
+        sender_task = asyncio.create_task(sender())
+        dropped = False
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.BINARY:
+                    if base_word is None:
+                        base_word, base_time = self._listen_resume
+                        finalized = sent_final = base_word
+                    received_samples += len(msg.data) // 2
+                    advance()
+                    if self.drop_after_s and received_samples >= self.drop_after_s * ASR_SAMPLE_RATE:
+                        dropped = True
+                        break
+                elif msg.type == WSMsgType.TEXT:
+                    control = json.loads(msg.data).get("type")
+                    if control == "Finalize":
+                        advance(force_final=True)
+                    elif control == "CloseStream":
+                        break
+        finally:
+            self.events.append({
+                "kind": "asr_session",
+                "conn": conn,
+                "audio_seconds": received_samples / ASR_SAMPLE_RATE,
+                "started_at": start_wall,
+                "ended_at": time.monotonic(),
+                "dropped": dropped,
+            })
+            if dropped:
+                # Results not yet sent are lost with the socket
+                sender_task.cancel()
+                self._listen_resume = (sent_final, times[sent_final - 1][1] if sent_final else 0.0)
+                await ws.close(code=1011, message=b"standin drop")
+            else:
+                # Let queued results go out before closing
+                while not outbox.empty() and not ws.closed:
+                    await asyncio.sleep(0.01)
+                sender_task.cancel()
+                await ws.close()
+        return ws
+
+    # --- Sarvam translate ---
+    async def handle_translate(self, request):
+        received_at = time.monotonic()
+        payload = await request.json()
+        await asyncio.sleep(self.translate_latency.sample())
+        text = payload.get("input", "")
+        translated = f"{text} ({payload.get('target_language_code')})"
+        self.events.append({
+            "kind": "translate",
+            "input": text,
+            "output": translated,
+            "received_at": received_at,
+            "responded_at": time.monotonic(),
+        })
+        return web.json_response({"translated_text": translated})
+
+    # --- Sarvam TTS ---
+    async def handle_tts(self, request):
+        received_at = time.monotonic()
+        payload = await request.json()
+        texts = payload["inputs"]
+        self._tts_requests += 1
+        request_number = self._tts_requests
+        # tts_seconds_per_char is at the default pace; faster pace, shorter audio
+        speed = payload.get("pace", TTS_BASE_PACE) / TTS_BASE_PACE
+        pcms = []
+        for text in texts:
+            self._tts_ids += 1
+            n_samples = max(1, int(len(text) * self.tts_seconds_per_char / speed * TTS_SAMPLE_RATE))
+            pcms.append((self._tts_ids, text, n_samples, tagged_pcm(self._tts_ids, n_samples)))
+        await asyncio.sleep(self.tts_latency.sample())
+        responded_at = time.monotonic()
+        for request_id, text, n_samples, _ in pcms:
+            self.events.append({
+                "kind": "tts",
+                "id": request_id,
+                "text": text,
+                "samples": n_samples,
+                "request": request_number,
+                "batch": len(texts),
+                "pace": payload.get("pace"),
+                "received_at": received_at,
+                "responded_at": responded_at,
+            })
+        return web.json_response({"audios": [base64.b64encode(wav_bytes(pcm)).decode("ascii") for *_, pcm in pcms]})
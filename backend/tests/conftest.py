@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+
+class FakeWebSocket:
+    """Records what the server sends; `gate` (an asyncio.Event) makes a slow client."""
+    def __init__(self, gate=None):
+        self.frames = []
+        self.messages = []
+        self.sent_at = []  # monotonic time of each frame
+        self.gate = gate
+
+    async def send_bytes(self, data):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.frames.append(data)
+        self.sent_at.append(time.monotonic())
+
+    async def send_json(self, message):
+        self.messages.append(message)
+
+
+# The streamer and the pipeline only use the socket's send side
+FakeSink = FakeWebSocket
+
+
+class FakeTTS:
+    """One audio chunk per sentence, after `delays` (seconds) for listed texts."""
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+
+    async def text_to_speech_stream(self, text, target_lang, session, pace=None):
+        await asyncio.sleep(self.delays.get(text, 0))
+        yield text.encode()
+
+    text_to_speech_clauses = text_to_speech_stream
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.001)
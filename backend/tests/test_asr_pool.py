@@ -0,0 +1,74 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.asr_pool import ASRConnectionPool
+from app.services.deepgram_client import AudioReplayBuffer, DeepgramService
+from tests.test_standins import SCRIPT, start_standins
+
+
+def test_replay_buffer_trims_reads_and_caps():
+    replay = AudioReplayBuffer(bytes_per_second=100, max_seconds=1.0)
+    replay.append(bytes(range(60)))
+    replay.trim_before(0.2)
+    assert replay.start_s == pytest.approx(0.2)
+    assert replay.read(0.3, 4) == bytes([30, 31, 32, 33])
+
+    replay.append(bytes(60))
+    # Over the 1 s cap: the oldest audio goes first
+    assert replay.end_s - replay.start_s == pytest.approx(1.0)
+    assert replay.dropped_s == pytest.approx(0.0)
+    replay.append(bytes(10))
+    assert replay.dropped_s == pytest.approx(0.1)
+    assert replay.read(replay.end_s, 10) == b""
+
+
+@pytest.mark.asyncio
+async def test_pool_hands_out_prewarmed_sockets(monkeypatch):
+    standins = await start_standins(monkeypatch)
+    pool = ASRConnectionPool(size=1)
+    pool.start()
+    for _ in range(100):
+        if pool.idle:
+            break
+        await asyncio.sleep(0.01)
+
+    connection = await pool.acquire()
+    assert connection.is_open
+    assert pool.stats()["hits"] == 1
+    await connection.close()
+    await pool.close()
+    await standins.stop()
+
+
+@pytest.mark.asyncio
+async def test_dropped_socket_is_replaced_without_losing_words(monkeypatch):
+    standins = await start_standins(monkeypatch)
+    standins.drop_after_s = 1.5
+    segments = []
+
+    async def on_transcript(text, is_final):
+        segments.append(text)
+
+    asr = DeepgramService(pool=ASRConnectionPool(size=0))
+    await asr.connect(on_transcript_callback=on_transcript)
+    silence = np.zeros(1600, dtype=np.int16).tobytes()
+    for _ in range(20):
+        await asr.send_audio(silence)
+        await asyncio.sleep(0.01)
+    for _ in range(100):
+        if asr.is_connected:
+            break
+        await asyncio.sleep(0.02)
+    await asr.finalize()
+    for _ in range(100):
+        if " ".join(segments) == SCRIPT:
+            break
+        await asyncio.sleep(0.02)
+    await asr.close()
+    await standins.stop()
+
+    assert " ".join(segments) == SCRIPT
+    assert asr.reconnects >= 1
+    assert any(event["dropped"] for event in standins.of_kind("asr_session"))
@@ -0,0 +1,44 @@
+from app.core.metrics import MetricsRegistry
+from benchmarks.bench_load import (
+    compare,
+    find_knee,
+    histogram_delta,
+    histogram_quantile,
+    parse_histogram,
+)
+
+
+def level(sessions, p95, lag_p99=2.0, delivery=1.0):
+    return {"sessions": sessions, "e2e": {"p50": p95 / 2, "p95": p95}, "loop_lag_ms": {"p99": lag_p99}, "delivery": delivery}
+
+
+def test_loop_lag_quantiles_from_the_metrics_endpoint():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("lag_seconds", "test", buckets=(0.01, 0.1, 1.0))
+    before = parse_histogram(registry.render(), "lag_seconds")
+    for value in [0.005] * 90 + [0.05] * 10:
+        histogram.observe(value)
+    delta = histogram_delta(before, parse_histogram(registry.render(), "lag_seconds"))
+    assert delta["count"] == 100
+    assert histogram_quantile(0.5, delta) <= 0.01
+    assert 0.01 < histogram_quantile(0.99, delta) <= 0.1
+
+
+def test_knee_is_the_first_level_past_a_limit():
+    levels = [level(1, 2.0), level(4, 2.2), level(8, 2.5, lag_p99=80.0), level(16, 5.0)]
+    knee = find_knee(levels, e2e_tolerance=0.5, max_loop_lag_ms=50.0)
+    assert knee["knee"] == 8 and knee["capacity"] == 4
+    assert knee["reasons"] == ["loop lag p99 80.0ms"]
+    assert find_knee(levels[:2])["knee"] is None
+    assert find_knee([level(1, 2.0), level(2, 2.0, delivery=0.5)])["capacity"] == 1
+
+
+def test_compare_flags_capacity_and_latency_regressions():
+    def report(levels):
+        return {"levels": levels, "capacity": find_knee(levels)}
+
+    old = report([level(1, 2.0), level(8, 2.2), level(16, 2.4)])
+    assert compare(old, report([level(1, 2.05), level(8, 2.3), level(16, 2.5)])) == []
+    regressions = compare(old, report([level(1, 2.0), level(8, 3.2), level(16, 4.0)]))
+    assert any(r.startswith("capacity 16 -> 1") for r in regressions)
+    assert any(r.startswith("8 sessions") for r in regressions)
@@ -0,0 +1,240 @@
+import asyncio
+
+import numpy as np
+import pytest
+from starlette.websockets import WebSocketState
+
+from app.audio.codecs import mulaw_encode
+from app.audio.processor import AudioProcessor
+from app.audio.streamer import OrderedAudioStreamer
+from app.services.broadcast import BroadcastRoom, FanOut, Subscriber
+from tests.conftest import FakeWebSocket, wait_for
+
+
+def make_fanout(max_frame_bytes=2):
+    fanout = FanOut()
+    fanout.streamer = OrderedAudioStreamer(fanout, max_frame_bytes=max_frame_bytes)
+    return fanout
+
+
+async def send_sentence(streamer, index, chunk):
+    await streamer.put(index, chunk)
+    await streamer.end(index)
+
+
+@pytest.mark.asyncio
+async def test_every_subscriber_gets_the_sentences_in_order():
+    fanout = make_fanout()
+    a, b = FakeWebSocket(), FakeWebSocket()
+    subs = [Subscriber(a, "hi-IN"), Subscriber(b, "hi-IN")]
+    for sub in subs:
+        fanout.add(sub)
+
+    await send_sentence(fanout.streamer, 1, b"s1")
+    await send_sentence(fanout.streamer, 0, b"s0")
+    await fanout.send_json({"type": "transcript"})
+    await wait_for(lambda: len(a.frames) == 2 and len(b.frames) == 2)
+
+    assert a.frames == b.frames == [b"s0", b"s1"]
+    assert a.messages == b.messages == [{"type": "transcript"}]
+    fanout.streamer.cancel()
+    for sub in subs:
+        sub.close()
+
+
+@pytest.mark.asyncio
+async def test_late_joiner_starts_at_the_next_sentence_boundary():
+    fanout = make_fanout()
+    early = FakeWebSocket()
+    fanout.add(Subscriber(early, "hi-IN"))
+
+    # Sentence 0 is half sent when the late viewer joins
+    await fanout.streamer.put(0, b"aa")
+    await wait_for(lambda: len(early.frames) == 1)
+    late = FakeWebSocket()
+    late_sub = Subscriber(late, "hi-IN")
+    fanout.add(late_sub)
+    assert late_sub.start_index == 1
+
+    await fanout.streamer.put(0, b"bb")
+    await fanout.streamer.end(0)
+    await send_sentence(fanout.streamer, 1, b"cc")
+    await wait_for(lambda: len(early.frames) == 3 and len(late.frames) == 1)
+
+    assert early.frames == [b"aa", b"bb", b"cc"]
+    assert late.frames == [b"cc"]
+    fanout.streamer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_resynced_without_stalling_the_room():
+    fanout = make_fanout()
+    fast = FakeWebSocket()
+    gate = asyncio.Event()
+    slow = FakeWebSocket(gate=gate)
+    fast_sub = Subscriber(fast, "hi-IN")
+    slow_sub = Subscriber(slow, "hi-IN", max_queue=2)
+    fanout.add(fast_sub)
+    fanout.add(slow_sub)
+
+    # Sentence 0 overflows the slow viewer's queue; the room keeps going
+    for part in (b"aa", b"bb", b"cc", b"dd"):
+        await fanout.streamer.put(0, part)
+        await asyncio.sleep(0)
+    await fanout.streamer.end(0)
+    await wait_for(lambda: len(fast.frames) == 4)
+    assert slow_sub.resyncs == 1
+    assert slow_sub.start_index == 1
+
+    gate.set()
+    await send_sentence(fanout.streamer, 1, b"ee")
+    await wait_for(lambda: len(fast.frames) == 5 and b"ee" in slow.frames)
+
+    # The slow viewer lost the rest of sentence 0, then picked up at sentence 1
+    assert slow.frames == [b"aa", b"ee"]
+    fanout.streamer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_each_subscriber_gets_its_negotiated_format():
+    fanout = make_fanout(max_frame_bytes=4096)
+    raw, compact = FakeWebSocket(), FakeWebSocket()
+    subs = [Subscriber(raw, "hi-IN"), Subscriber(compact, "hi-IN", audio_format=("mulaw", 24000))]
+    for sub in subs:
+        fanout.add(sub)
+
+    pcm = (np.arange(200, dtype=np.int16) * 50).tobytes()
+    await send_sentence(fanout.streamer, 0, pcm)
+    await wait_for(lambda: raw.frames and compact.frames)
+
+    assert raw.frames == [pcm]
+    assert compact.frames == [mulaw_encode(np.frombuffer(pcm, dtype=np.int16))]
+    fanout.streamer.cancel()
+    for sub in subs:
+        sub.close()
+
+
+@pytest.mark.asyncio
+async def test_late_joiner_gets_no_transcripts_for_sentences_it_will_not_hear():
+    fanout = make_fanout()
+    fanout.add(Subscriber(FakeWebSocket(), "hi-IN"))
+    await fanout.streamer.put(0, b"aa")
+    await asyncio.sleep(0)
+    late = FakeWebSocket()
+    late_sub = Subscriber(late, "hi-IN")
+    fanout.add(late_sub)
+
+    await fanout.send_json({"type": "transcript", "sentence": 0})
+    await fanout.send_json({"type": "transcript", "sentence": 1})
+    await fanout.send_json({"type": "notice"})
+    await wait_for(lambda: len(late.messages) == 2)
+    assert late.messages == [{"type": "transcript", "sentence": 1}, {"type": "notice"}]
+    fanout.streamer.cancel()
+
+
+class BrokenWebSocket(FakeWebSocket):
+    async def send_bytes(self, data):
+        raise ConnectionResetError("gone")
+
+
+@pytest.mark.asyncio
+async def test_failed_subscriber_is_detached_from_the_fanout():
+    fanout = make_fanout()
+    ok, broken = Subscriber(FakeWebSocket(), "hi-IN"), Subscriber(BrokenWebSocket(), "hi-IN")
+    fanout.add(ok)
+    fanout.add(broken)
+
+    await send_sentence(fanout.streamer, 0, b"s0")
+    await wait_for(lambda: broken.detached)
+    assert fanout.subscribers == {ok}
+    await send_sentence(fanout.streamer, 1, b"s1")
+    await wait_for(lambda: len(ok.websocket.frames) == 2)
+    fanout.streamer.cancel()
+    ok.close()
+
+
+@pytest.mark.asyncio
+async def test_room_retries_a_failed_start():
+    room = BroadcastRoom("c1", AudioProcessor(), None, None)
+    attempts = []
+
+    async def connect(**callbacks):
+        attempts.append(callbacks)
+        if len(attempts) == 1:
+            raise ConnectionError("ASR down")
+
+    room.ingest.asr.connect = connect
+    with pytest.raises(ConnectionError):
+        await room.start()
+    await room.start()
+    await room.start()
+    assert len(attempts) == 2
+    await room.close()
+
+
+class RoomClientSocket(FakeWebSocket):
+    """A /ws/room client: sends the scripted ASGI messages, then disconnects."""
+    def __init__(self, inbound):
+        super().__init__()
+        self.inbound = list(inbound)
+        self.client_state = WebSocketState.CONNECTING
+        self.close_code = None
+
+    async def accept(self):
+        self.client_state = WebSocketState.CONNECTED
+
+    async def receive(self):
+        if self.inbound:
+            return self.inbound.pop(0)
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    async def close(self, code=1000):
+        self.close_code = code
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+class FakeRooms:
+    def __init__(self, join_error=None):
+        self.join_error = join_error
+        self.fed = []
+        self.left = []
+
+    async def join(self, content_id, websocket, lang, audio_format, ingest_format):
+        if self.join_error is not None:
+            raise self.join_error
+        return self, "viewer"
+
+    subscriber_count = 1
+
+    async def feed(self, subscriber, data):
+        self.fed.append(data)
+
+    async def leave(self, room, subscriber):
+        self.left.append(subscriber)
+
+
+@pytest.mark.asyncio
+async def test_room_socket_ignores_text_frames(monkeypatch):
+    from app import main
+    rooms = FakeRooms()
+    monkeypatch.setattr(main, "rooms", rooms)
+    websocket = RoomClientSocket([
+        {"type": "websocket.receive", "text": '{"type": "ping"}'},
+        {"type": "websocket.receive", "bytes": b"\x00\x01"},
+    ])
+
+    await main.room_stream(websocket, "c1")
+    assert rooms.fed == [b"\x00\x01"]
+    assert rooms.left == ["viewer"]
+
+
+@pytest.mark.asyncio
+async def test_room_socket_is_closed_when_joining_fails(monkeypatch):
+    from app import main
+    rooms = FakeRooms(join_error=ConnectionError("ASR down"))
+    monkeypatch.setattr(main, "rooms", rooms)
+    websocket = RoomClientSocket([])
+
+    await main.room_stream(websocket, "c1")
+    assert websocket.close_code == 1011
+    assert rooms.left == []
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.services.clause_splitter import split_clauses
+from app.services.sarvam_tts_client import SarvamTTSService
+
+
+def test_splits_on_danda_and_commas():
+    text = "नमस्ते दोस्तों, आज हम पायथन के बारे में सीखेंगे। यह एक भाषा है, जो बहुत लोकप्रिय है।"
+    assert split_clauses(text) == [
+        "नमस्ते दोस्तों,",
+        "आज हम पायथन के बारे में सीखेंगे।",
+        "यह एक भाषा है,",
+        "जो बहुत लोकप्रिय है।",
+    ]
+
+
+def test_short_fragments_are_merged():
+    assert split_clauses("Hi, ok. This is fine.") == ["Hi, ok. This is fine."]
+    # Trailing fragment joins the previous clause
+    assert split_clauses("இது ஒரு சோதனை, நன்றி.") == ["இது ஒரு சோதனை, நன்றி."]
+
+
+def test_no_split_inside_numbers():
+    assert split_clauses("मूल्य 3.14 है और यह स्थिर है") == ["मूल्य 3.14 है और यह स्थिर है"]
+
+
+@pytest.mark.asyncio
+async def test_clauses_are_fetched_concurrently_and_yielded_in_order(monkeypatch):
+    service = SarvamTTSService(cache=None)
+    started, finished = [], []
+    all_started, later_finished = asyncio.Event(), asyncio.Event()
+
+    async def fake_stream(text, target_lang="hi-IN", session=None, pace=None):
+        started.append(text)
+        if len(started) == 3:
+            all_started.set()
+        # Fetched one at a time, the first clause would wait here forever
+        await all_started.wait()
+        if text.startswith("पहला"):
+            # Later clauses finish first
+            await later_finished.wait()
+        finished.append(text)
+        if len(finished) == 2:
+            later_finished.set()
+        yield text.encode("utf-8")
+
+    monkeypatch.setattr(service, "text_to_speech_stream", fake_stream)
+
+    async def collect(text):
+        return [c.decode("utf-8") async for c in service.text_to_speech_clauses(text)]
+
+    text = "पहला वाक्यांश यहाँ है, दूसरा वाक्यांश यहाँ है, तीसरा वाक्यांश यहाँ है।"
+    chunks = await asyncio.wait_for(collect(text), 1.0)
+
+    assert chunks == split_clauses(text)
+    assert started == chunks
+    assert finished[-1] == chunks[0]
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from app.audio.codecs import (
+    ADPCM_BLOCK_SAMPLES,
+    AudioEncoder,
+    EncodingSink,
+    adpcm_decode,
+    adpcm_encode,
+    alaw_decode,
+    alaw_encode,
+    mulaw_decode,
+    mulaw_encode,
+    negotiate_format,
+)
+from tests.conftest import FakeWebSocket
+
+
+def speech_like(n, rate=24000):
+    t = np.arange(n) / rate
+    signal = 8000 * np.sin(2 * np.pi * 220 * t) + 2000 * np.sin(2 * np.pi * 1300 * t)
+    return signal.astype(np.int16)
+
+
+def snr_db(reference, decoded):
+    reference = reference.astype(np.float64)
+    noise = reference - decoded[:len(reference)].astype(np.float64)
+    return 10 * np.log10(np.mean(reference ** 2) / np.mean(noise ** 2))
+
+
+@pytest.mark.parametrize("encode,decode", [(mulaw_encode, mulaw_decode), (alaw_encode, alaw_decode)])
+def test_g711_round_trip(encode, decode):
+    x = speech_like(4800)
+    data = encode(x)
+    assert len(data) == len(x)
+    assert snr_db(x, decode(data)) > 30
+
+
+def test_g711_extremes_do_not_wrap():
+    x = np.array([-32768, -1, 0, 1, 32767], dtype=np.int16)
+    for encode, decode in ((mulaw_encode, mulaw_decode), (alaw_encode, alaw_decode)):
+        y = decode(encode(x))
+        assert np.all(np.sign(y[[0, 4]]) == [-1, 1])
+        assert abs(int(y[4]) - 32767) < 1100
+
+
+@pytest.mark.parametrize("n", [1, 2, ADPCM_BLOCK_SAMPLES, ADPCM_BLOCK_SAMPLES + 1, 4096])
+def test_adpcm_round_trip_keeps_length(n):
+    x = speech_like(n)
+    y = adpcm_decode(adpcm_encode(x))
+    assert len(y) == n
+    if n > 100:
+        assert snr_db(x, y) > 30
+
+
+def test_adpcm_is_about_four_times_smaller():
+    x = speech_like(8192)
+    assert 3.5 < x.nbytes / len(adpcm_encode(x)) < 4.0
+
+
+def test_negotiation_takes_first_supported_codec():
+    assert negotiate_format("opus,adpcm,mulaw", "16000") == ("adpcm", 16000)
+    assert negotiate_format(None, None) == ("pcm16", 24000)
+    assert negotiate_format("opus", "11025") == ("pcm16", 24000)
+    assert negotiate_format("MULAW", "oops") == ("mulaw", 24000)
+
+
+def test_downsampling_encoder_keeps_duration():
+    encoder = AudioEncoder("pcm16", 16000)
+    x = speech_like(24000)
+    out = b"".join(encoder.encode(x[i:i + 2048].tobytes()) for i in range(0, len(x), 2048))
+    # Everything but the filter's look-ahead comes out at 2/3 the sample count
+    assert abs(len(out) // 2 - 16000) <= encoder.resampler.delay_samples
+
+
+@pytest.mark.asyncio
+async def test_encoding_sink_encodes_audio_and_passes_json():
+    ws = FakeWebSocket()
+    encoder = AudioEncoder("mulaw")
+    sink = EncodingSink(ws, encoder)
+    x = speech_like(1000)
+    await sink.send_bytes(x.tobytes())
+    await sink.send_json({"type": "transcript"})
+
+    assert ws.frames == [mulaw_encode(x)]
+    assert ws.messages == [{"type": "transcript"}]
+    assert encoder.announcement() == {"type": "audio_format", "codec": "mulaw", "sample_rate": 24000}
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.diagnostics import SamplingProfiler, StallDetector, task_dump
+from app.core.metrics import SessionMetrics
+from app.services.pipeline import TranslationPipeline
+from tests.conftest import FakeSink, FakeTTS
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+def spin(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_stall_detector_records_the_blocking_stack():
+    detector = StallDetector(threshold=0.05)
+    detector.start()
+    await asyncio.sleep(0.1)
+    block_the_loop(0.2)
+    await asyncio.sleep(0.1)
+    detector.stop()
+
+    report = detector.report()
+    assert report["stalls_total"] == 1
+    stall = report["recent"][0]
+    assert not stall["ongoing"]
+    assert stall["stalled_ms"] >= 150
+    assert "block_the_loop" in stall["stack"][-1]
+
+
+@pytest.mark.asyncio
+async def test_profiler_samples_the_loop_thread():
+    profiler = SamplingProfiler()
+    running = asyncio.ensure_future(asyncio.to_thread(profiler.run, 0.3, 200, loop_thread=threading.get_ident()))
+    await asyncio.sleep(0.02)
+    spin(0.35)
+    profile = await running
+
+    assert profile.samples > 10
+    assert "spin (tests/test_diagnostics.py" in profile.collapsed()
+    speedscope = profile.speedscope()
+    assert speedscope["profiles"][0]["name"] == "event-loop"
+    assert any(frame["name"].startswith("spin ") for frame in speedscope["shared"]["frames"])
+
+
+class SlowTranslator:
+    async def translate(self, text, target_lang, session):
+        await asyncio.sleep(1.0)
+        return text
+
+
+@pytest.mark.asyncio
+async def test_task_dump_groups_pipeline_tasks_by_session():
+    metrics = SessionMetrics("s1", "sp-IN", track_session=False)
+    pipeline = TranslationPipeline(FakeSink(), "sp-IN", SlowTranslator(), FakeTTS(), logging.getLogger("test"), metrics, http_session=object())
+    pipeline.submit("one")
+    await asyncio.sleep(0.01)
+
+    session = task_dump()["sessions"]["s1/sp-IN"]
+    pipeline.close()
+    assert session["sentence"][0]["detail"] == "#0"
+    assert any("in translate" in where for where in session["sentence"][0]["waiting_in"])
+    assert len(session["streamer"]) == 1
+
+
+def test_admin_endpoints_need_the_token(monkeypatch):
+    from app.main import require_admin
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    with pytest.raises(HTTPException) as hidden:
+        require_admin("Bearer anything")
+    assert hidden.value.status_code == 404
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    with pytest.raises(HTTPException) as denied:
+        require_admin("Bearer wrong")
+    assert denied.value.status_code == 401
+    require_admin("Bearer secret")
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.audio.dsp_executor import DSPExecutor
+from app.core.loop_monitor import LoopLagMonitor
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_off_the_event_loop_in_session_order():
+    executor = DSPExecutor(workers=4)
+    dsp = executor.session()
+    order = []
+
+    def job(i):
+        time.sleep(0.01 if i % 2 == 0 else 0.0)  # uneven durations
+        order.append((i, threading.current_thread().name))
+        return i
+
+    try:
+        results = await asyncio.gather(*(dsp.run(job, i) for i in range(6)))
+    finally:
+        executor.shutdown()
+
+    assert results == list(range(6))
+    assert [i for i, _ in order] == list(range(6))
+    assert all(name.startswith("dsp") for _, name in order)
+    assert executor.stats()["jobs"] == 6
+
+
+@pytest.mark.asyncio
+async def test_disabled_executor_runs_inline():
+    executor = DSPExecutor(enabled=False)
+    name = await executor.session().run(lambda: threading.current_thread().name)
+    assert name == threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_offload_keeps_loop_lag_low():
+    async def measure(enabled):
+        executor = DSPExecutor(workers=2, enabled=enabled)
+        monitor = LoopLagMonitor(interval=0.005, histogram=None)
+        monitor.start()
+        await asyncio.sleep(0.01)
+        await executor.session().run(time.sleep, 0.1)  # a blocking (GIL-free) job
+        await asyncio.sleep(0.01)
+        await monitor.stop()
+        executor.shutdown()
+        return monitor.stats()["lag_max_ms"]
+
+    assert await measure(False) >= 80
+    assert await measure(True) < 50
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from app.core.hedging import HedgedRequester, LatencyTracker, UpstreamError
+
+
+def warmed(requester, seconds=0.01, n=None):
+    for _ in range(n or requester.min_samples):
+        requester.latency.observe(seconds)
+    return requester
+
+
+class FakeUpstream:
+    """Answers after each call's scripted delay, or raises a scripted error."""
+    def __init__(self, script):
+        self.script = list(script)
+        self.started = 0
+        self.cancelled = 0
+
+    async def request(self):
+        step = self.script[min(self.started, len(self.script) - 1)]
+        self.started += 1
+        number = self.started
+        if isinstance(step, Exception):
+            raise step
+        try:
+            await asyncio.sleep(step)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return number
+
+
+def test_latency_quantiles():
+    tracker = LatencyTracker(window=100)
+    assert tracker.quantile(0.5) is None
+    for ms in range(1, 101):
+        tracker.observe(ms / 1000)
+    assert tracker.quantile(0.5) == pytest.approx(0.051)
+    assert tracker.quantile(0.95) == pytest.approx(0.096)
+
+
+def test_timeout_adapts_within_bounds():
+    requester = HedgedRequester("t", min_timeout=0.5, max_timeout=5.0)
+    assert requester.timeout() == 5.0  # cold: be generous
+    warmed(requester, 0.4)
+    assert requester.timeout() == pytest.approx(1.2)
+    fast = warmed(HedgedRequester("t", min_timeout=0.5, max_timeout=5.0), 0.01)
+    assert fast.timeout() == 0.5
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_the_loser_cancelled():
+    requester = warmed(HedgedRequester("t"))
+    upstream = FakeUpstream([1.0, 0.01])
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    assert await requester.call(upstream.request) == 2
+    assert loop.time() - start < 0.2
+    await asyncio.sleep(0.01)
+    assert upstream.cancelled == 1
+    assert requester.hedges == 1 and requester.hedge_wins == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_loser_is_counted_as_a_slow_sample():
+    requester = warmed(HedgedRequester("t"))
+    upstream = FakeUpstream([1.0, 0.05])
+    assert await requester.call(upstream.request) == 2
+
+    # The winner's sample plus one for the loser, which ran for at least the
+    # hedge delay and the winner's time together
+    samples = list(requester.latency.samples)[requester.min_samples:]
+    assert len(samples) == 2
+    assert max(samples) >= 0.01 + 0.05
+    assert max(samples) > min(samples)
+
+
+@pytest.mark.asyncio
+async def test_hedge_losing_to_the_primary_does_not_lower_the_estimate():
+    requester = warmed(HedgedRequester("t"), 0.02)
+    p95 = requester.latency.quantile(0.95)
+    # The primary answers just after the hedge went out; the hedge has barely run
+    upstream = FakeUpstream([0.04, 1.0])
+    assert await requester.call(upstream.request) == 1
+    assert requester.hedges == 1 and requester.hedge_wins == 0
+
+    primary, loser = list(requester.latency.samples)[requester.min_samples:]
+    assert loser >= primary
+    assert requester.latency.quantile(0.95) >= p95
+
+
+@pytest.mark.asyncio
+async def test_no_hedging_until_warm_or_when_budget_is_spent():
+    requester = HedgedRequester("t", max_tokens=1.0, budget=0.0)
+    upstream = FakeUpstream([0.05])
+    await requester.call(upstream.request)
+    assert upstream.started == 1  # cold: no p95 to hedge on yet
+
+    warmed(requester, 0.001, n=100)
+    upstream = FakeUpstream([0.05])
+    await requester.call(upstream.request)
+    await requester.call(upstream.request)
+    assert requester.hedges == 1
+    assert requester.skipped_for_budget == 1
+
+
+@pytest.mark.asyncio
+async def test_retryable_errors_are_retried_others_are_not():
+    requester = HedgedRequester("t", hedge=False, retries=2, backoff_s=0.001)
+    upstream = FakeUpstream([UpstreamError(503), UpstreamError(429), 0])
+    assert await requester.call(upstream.request) == 3
+    assert requester.retried == 2
+
+    upstream = FakeUpstream([UpstreamError(400, "bad input"), 0])
+    with pytest.raises(UpstreamError):
+        await requester.call(upstream.request)
+    assert upstream.started == 1
+    assert requester.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_attempt_times_out_and_raises_the_latency_estimate():
+    requester = warmed(HedgedRequester("t", hedge=False, retries=0, min_timeout=0.05, max_timeout=0.05))
+    upstream = FakeUpstream([1.0])
+    with pytest.raises(asyncio.TimeoutError):
+        await requester.call(upstream.request)
+    assert requester.timeouts == 1
+    assert requester.latency.quantile(0.99) == pytest.approx(0.05)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_caller_cancels_every_attempt():
+    requester = warmed(HedgedRequester("t"))
+    upstream = FakeUpstream([1.0, 1.0])
+    task = asyncio.create_task(requester.call(upstream.request))
+    await asyncio.sleep(0.05)
+    assert upstream.started == 2
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.01)
+    assert upstream.cancelled == 2
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.core.http_pool import HTTPClientPool
+
+
+async def start_server(delay=0.0):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused():
+    server = await start_server()
+    pool = HTTPClientPool()
+    await pool.start()
+    try:
+        for _ in range(5):
+            async with pool.session.post(server.make_url("/")) as response:
+                assert response.status == 200
+                await response.json()
+        stats = pool.stats()
+        assert stats["requests"] == 5
+        assert stats["connections_created"] == 1
+        assert stats["connections_reused"] == 4
+        assert stats["in_flight"] == 0
+    finally:
+        await pool.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_is_recorded_when_pool_is_full():
+    server = await start_server(delay=0.05)
+    pool = HTTPClientPool(limit=1, limit_per_host=1)
+    try:
+        async def call():
+            async with pool.session.post(server.make_url("/")) as response:
+                await response.read()
+
+        await asyncio.gather(*(call() for _ in range(3)))
+        stats = pool.stats()
+        assert stats["peak_in_flight"] == 3
+        assert stats["queued"] >= 2
+        assert stats["queue_wait_max_ms"] > 0
+    finally:
+        await pool.close()
+        await server.close()
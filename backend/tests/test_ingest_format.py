@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from app.audio.ingest_format import (
+    FrameCoalescer,
+    IngestDecoder,
+    IngestFormat,
+    parse_ingest_format,
+)
+from app.audio.resampler import StreamingResampler
+
+
+def tone(n, rate):
+    return (8000 * np.sin(2 * np.pi * 440 * np.arange(n) / rate)).astype(np.int16)
+
+
+def test_defaults_are_the_historic_browser_format():
+    fmt = parse_ingest_format(default_rate=44100)
+    assert (fmt.sample_rate, fmt.sample_format, fmt.channels) == (44100, "s16", 1)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"sample_rate": 4000},
+    {"sample_format": "u8"},
+    {"channels": 6},
+    {"frame_size": 0},
+])
+def test_unsupported_formats_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        parse_ingest_format(**kwargs)
+
+
+def test_native_16k_is_passed_through_without_copy():
+    decoder = IngestDecoder(IngestFormat(16000), StreamingResampler(16000, 16000))
+    data = tone(1024, 16000).tobytes()
+    out = decoder.process(data)
+    assert decoder.native
+    assert np.shares_memory(out, np.frombuffer(data, dtype=np.int16))
+
+
+def test_browser_rate_matches_the_plain_resampler():
+    x = tone(4096, 44100)
+    decoder = IngestDecoder(IngestFormat(44100), StreamingResampler(44100, 16000))
+    expected = StreamingResampler(44100, 16000).process(x.tobytes())
+    assert np.array_equal(decoder.process(x.tobytes()), expected)
+
+
+def test_float32_stereo_is_downmixed_and_scaled():
+    x = tone(4800, 48000)
+    stereo = np.repeat(x.astype(np.float32) / 32767.0, 2)
+    decoder = IngestDecoder(IngestFormat(48000, "f32", 2), StreamingResampler(48000, 16000))
+    expected = StreamingResampler(48000, 16000).process(x.tobytes())
+    out = decoder.process(stereo.astype("<f4").tobytes())
+    assert len(out) == len(expected)
+    assert np.max(np.abs(out.astype(int) - expected.astype(int))) <= 2
+
+
+def test_coalescer_joins_small_messages_into_frames():
+    coalescer = FrameCoalescer(min_bytes=1280)  # 40 ms at 16 kHz
+    frames = [coalescer.push(b"\x01\x00" * 128) for _ in range(12)]  # 8 ms messages
+    out = [f for f in frames if f is not None]
+    assert [len(f) for f in out] == [1280, 1280]
+    assert coalescer.flush() == b"\x01\x00" * 128 * 2
+    assert (coalescer.messages_in, coalescer.frames_out) == (12, 3)
+
+
+def test_coalescer_passes_big_messages_through():
+    coalescer = FrameCoalescer(min_bytes=1280)
+    data = b"\x00" * 2048
+    assert coalescer.push(data) is data
+
+
+def test_coalescer_keeps_whole_samples():
+    coalescer = FrameCoalescer(min_bytes=8, align=4)
+    assert coalescer.push(b"\x00" * 6) is None
+    assert len(coalescer.push(b"\x00" * 5)) == 8
+    assert coalescer.flush() is None
@@ -0,0 +1,74 @@
+import json
+import logging
+
+from app.audio.buffer import AudioSyncBuffer
+from app.core.log import ContextLogger, JSONFormatter, KeyValueFormatter
+from app.core.metrics import STAGE_LATENCY, MetricsRegistry, SessionMetrics, metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("t_latency_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        hist.labels("translate").observe(value)
+
+    text = registry.render()
+    assert "# TYPE t_latency_seconds histogram" in text
+    assert 't_latency_seconds_bucket{stage="translate",le="0.1"} 2' in text
+    assert 't_latency_seconds_bucket{stage="translate",le="1.0"} 3' in text
+    assert 't_latency_seconds_bucket{stage="translate",le="+Inf"} 4' in text
+    assert 't_latency_seconds_count{stage="translate"} 4' in text
+    assert 't_latency_seconds_sum{stage="translate"} 2.65' in text
+
+
+def test_gauges_and_label_escaping():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("t_gauge", "Test.", ("name",))
+    gauge.labels('a"b').set(3)
+    gauge.labels("lazy").set_function(lambda: 1.5)
+    text = registry.render()
+    assert 't_gauge{name="a\\"b"} 3' in text
+    assert 't_gauge{name="lazy"} 1.5' in text
+
+
+def test_session_metrics_spans_and_drift():
+    sync = AudioSyncBuffer()
+    sync.start()
+    session = SessionMetrics("test1234", "ta-IN", sync_buffer=sync)
+    with session.span("translate"):
+        pass
+    session.observe("tts_first_byte", 0.3)
+    session.sentence_started()
+
+    text = metrics.render()
+    assert STAGE_LATENCY.labels("translate", "ta-IN").count == 1
+    assert 'linguastream_sessions_active{lang="ta-IN"} 1' in text
+    assert 'linguastream_sentences_in_flight{lang="ta-IN"} 1' in text
+    assert 'linguastream_session_drift_seconds{session="test1234",lang="ta-IN"}' in text
+
+    session.sentence_finished()
+    session.close()
+    session.close()  # idempotent
+    text = metrics.render()
+    assert 'linguastream_sessions_active{lang="ta-IN"} 0' in text
+    assert 'session="test1234"' not in text
+
+
+def test_structured_log_formatters():
+    logger = logging.getLogger("linguastream.test")
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        ContextLogger(logger, {"session": "ab12"}).info("Translated", extra={"ms": 231})
+    finally:
+        logger.removeHandler(handler)
+
+    record = records[0]
+    assert KeyValueFormatter().format(record).endswith("Translated session=ab12 ms=231")
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["msg"] == "Translated"
+    assert entry["level"] == "INFO"
+    assert entry["session"] == "ab12" and entry["ms"] == 231
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from app.audio.buffer import JitterBuffer
+from app.audio.playout import PlayoutScheduler
+from app.audio.streamer import OrderedAudioStreamer
+from tests.conftest import FakeSink
+
+
+def test_jitter_buffer_releases_in_order_on_monotonic_time():
+    jitter = JitterBuffer(delay_ms=100)
+    now = time.monotonic()
+    jitter.push("a")
+    jitter.push("b", release_at=now - 1)
+    # "b" is due, but waits behind "a"
+    assert jitter.pop_ready(now) == []
+    assert jitter.pop_ready(now + 0.2) == ["a", "b"]
+    assert jitter.next_release() is None
+
+
+@pytest.mark.asyncio
+async def test_jitter_buffer_wait_ready():
+    jitter = JitterBuffer()
+    jitter.push("x", release_at=time.monotonic() + 0.03)
+    start = time.monotonic()
+    assert await jitter.wait_ready() == ["x"]
+    assert time.monotonic() - start >= 0.025
+
+
+def test_pace_speeds_up_only_above_the_band():
+    playout = PlayoutScheduler(target_lag_s=3.0, band_s=1.0, base_pace=1.2, max_pace=2.0)
+    now = time.monotonic()
+    playout.register(0, now - 3.5)   # in band
+    playout.register(1, now - 5.5)   # 1.5 s over the band
+    playout.register(2, now - 30.0)  # far behind: capped
+    assert playout.pace(0) == 1.2
+    assert playout.pace(1) == 1.8
+    assert playout.pace(2) == 2.0
+    # Unknown source time (speculative audio): the latest decision
+    assert playout.pace() == 2.0
+
+
+def test_pace_slows_down_ahead_of_the_band_without_holding():
+    playout = PlayoutScheduler(target_lag_s=3.0, band_s=1.0, base_pace=1.2, min_pace=1.0, hold=False)
+    playout.register(0, time.monotonic() - 1.5)
+    assert playout.pace(0) == 1.0
+    fixed = PlayoutScheduler(adaptive_pace=False)
+    fixed.register(0, time.monotonic() - 30.0)
+    assert fixed.pace(0) == fixed.base_pace
+
+
+@pytest.mark.asyncio
+async def test_early_sentence_is_held_until_the_band():
+    playout = PlayoutScheduler(target_lag_s=0.15, band_s=0.05, bytes_per_second=48000)
+    sink = FakeSink()
+    streamer = OrderedAudioStreamer(sink, playout=playout)
+    heard_at = time.monotonic()
+    playout.register(0, heard_at)
+    await streamer.put(0, b"\x00" * 480)  # 10 ms of audio
+    await streamer.end(0)
+    for _ in range(50):
+        if sink.sent_at:
+            break
+        await asyncio.sleep(0.01)
+    streamer.cancel()
+
+    assert sink.sent_at[0] - heard_at >= 0.095
+    stats = playout.stats()
+    assert stats["held"] == 1 and stats["sentences"] == 1 and stats["in_band"] == 1.0
+    # The client's playback now runs to the end of the sentence
+    assert playout.cursor == pytest.approx(sink.sent_at[0] + 0.01, abs=0.01)
@@ -0,0 +1,50 @@
+import threading
+import wave
+
+import numpy as np
+
+from app.audio.recorder import RollingCapture, WavRecorder, create_recorder
+
+
+def read_wav(path):
+    with wave.open(str(path), "rb") as wav_file:
+        assert wav_file.getframerate() == 16000
+        return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+
+def test_full_recording_is_written_off_thread(tmp_path):
+    recorder = WavRecorder(str(tmp_path / "s1.wav"), flush_bytes=1000)
+    writer_threads = set()
+    original = recorder._write_frames
+
+    def spy(data):
+        writer_threads.add(threading.current_thread().name)
+        original(data)
+
+    recorder._write_frames = spy
+    chunks = [np.full(300, i, dtype=np.int16) for i in range(10)]
+    for chunk in chunks:
+        recorder.write(chunk)
+    path = recorder.close().result(timeout=5)
+
+    assert writer_threads == {"wav-writer"}
+    np.testing.assert_array_equal(read_wav(path), np.concatenate(chunks))
+
+
+def test_rolling_capture_keeps_last_seconds_and_dumps_on_demand(tmp_path):
+    capture = RollingCapture(str(tmp_path / "err.wav"), seconds=0.1)  # 1600 samples
+    audio = np.arange(5000, dtype=np.int16)
+    for i in range(0, len(audio), 512):
+        capture.write(audio[i:i + 512])
+    assert not (tmp_path / "err.wav").exists()
+
+    path = capture.dump().result(timeout=5)
+    np.testing.assert_array_equal(read_wav(path), audio[-1600:])
+
+
+def test_create_recorder_modes(tmp_path):
+    assert create_recorder("off", "abc", str(tmp_path)) is None
+    full = create_recorder("full", "abc", str(tmp_path))
+    rolling = create_recorder("rolling", "abc", str(tmp_path))
+    assert isinstance(full, WavRecorder) and full.path.endswith("-abc.wav")
+    assert isinstance(rolling, RollingCapture) and rolling.path.endswith("-abc-error.wav")
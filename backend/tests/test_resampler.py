@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from scipy.signal import resample_poly
+
+from app.audio.resampler import StreamingResampler
+
+
+def _random_chunks(signal, seed=0, max_chunk=5000):
+    rng = np.random.default_rng(seed)
+    i = 0
+    while i < len(signal):
+        n = int(rng.integers(1, max_chunk))
+        yield signal[i:i + n]
+        i += n
+
+
+@pytest.mark.parametrize("rates", [(44100, 16000), (48000, 16000), (16000, 24000)])
+def test_streaming_matches_whole_stream(rates):
+    """Chunked output plus flush equals resample_poly over the full signal."""
+    rng = np.random.default_rng(1)
+    signal = (rng.standard_normal(rates[0]) * 4000).astype(np.int16)
+
+    resampler = StreamingResampler(*rates)
+    out = [resampler.process_float(chunk) for chunk in _random_chunks(signal)]
+    out.append(resampler.flush_float())
+    streamed = np.concatenate(out)
+
+    reference = resample_poly(signal, resampler.up, resampler.down)
+    assert len(streamed) == len(reference)
+    np.testing.assert_allclose(streamed, reference, atol=1e-6)
+
+
+def test_process_returns_int16_from_bytes():
+    resampler = StreamingResampler(44100, 16000)
+    chunk = (np.ones(4096) * 1000).astype(np.int16)
+    out = resampler.process(chunk.tobytes())
+    assert out.dtype == np.int16
+    # Output lags by the filter delay only
+    expected = len(chunk) * 16000 // 44100
+    assert expected - 2 * resampler.delay_samples <= len(out) <= expected
+
+
+def test_passthrough_when_rates_match():
+    resampler = StreamingResampler(16000, 16000)
+    chunk = np.arange(512, dtype=np.int16)
+    out = resampler.process(chunk.tobytes())
+    np.testing.assert_array_equal(out, chunk)
+    assert len(resampler.flush()) == 0
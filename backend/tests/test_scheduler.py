@@ -0,0 +1,146 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.audio.streamer import OrderedAudioStreamer
+from app.core.metrics import SENTENCES_SKIPPED, SessionMetrics
+from app.services.pipeline import TranslationPipeline
+from app.services.sarvam_translate_client import SarvamTranslateService
+from app.services.scheduler import SentenceScheduler
+from app.services.translation_cache import TranslationCache
+from tests.conftest import FakeSink, FakeTTS, wait_for
+
+
+class FakeTranslator:
+    """Translates instantly, except texts listed in `delays` (seconds)."""
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.active = 0
+        self.peak = 0
+        self.cancelled = []
+
+    async def translate(self, text, target_lang, session):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(text, 0.01))
+        except asyncio.CancelledError:
+            self.cancelled.append(text)
+            raise
+        finally:
+            self.active -= 1
+        return text.upper()
+
+
+def make_pipeline(translator, tts=None, max_concurrent=4, budget_s=0.1, text_grace_s=0.1, lang="xx-IN"):
+    sink = FakeSink()
+    metrics = SessionMetrics("test", lang, track_session=False)
+    pipeline = TranslationPipeline(sink, lang, translator, tts or FakeTTS(), logging.getLogger("test"), metrics, http_session=object())
+    pipeline.streamer = OrderedAudioStreamer(sink, max_frame_bytes=64)
+    pipeline.scheduler = SentenceScheduler(max_concurrent, budget_s, text_grace_s)
+    return pipeline, sink
+
+
+@pytest.mark.asyncio
+async def test_hung_translation_is_cancelled_and_does_not_stall_later_sentences():
+    translator = FakeTranslator(delays={"hang": 10})
+    pipeline, sink = make_pipeline(translator)
+    for text in ("a", "hang", "c"):
+        pipeline.submit(text)
+
+    await wait_for(lambda: pipeline.in_flight == 0)
+    await wait_for(lambda: len(sink.frames) == 2)
+    assert sink.frames == [b"A", b"C"]
+    assert translator.cancelled == ["hang"]
+    assert pipeline.scheduler.skipped["cancelled"] == 1
+    assert pipeline.summary() == {"sentences": 3, "skipped": 1}
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_sentence_aborts_the_cached_translation_request(monkeypatch):
+    translator = SarvamTranslateService(cache=TranslationCache())
+    cancelled = []
+
+    async def request(text, source_lang, target_lang, session=None):
+        try:
+            await asyncio.sleep(10 if text == "hang" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+        return text.upper()
+
+    monkeypatch.setattr(translator, "_request", request)
+    pipeline, sink = make_pipeline(translator)
+    for text in ("hang", "next"):
+        pipeline.submit(text)
+
+    await wait_for(lambda: pipeline.in_flight == 0)
+    await wait_for(lambda: cancelled)
+    assert cancelled == ["hang"]
+    assert sink.frames == [b"NEXT"]
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_late_translation_is_shown_as_text_only():
+    translator = FakeTranslator(delays={"slow": 0.15})
+    pipeline, sink = make_pipeline(translator, budget_s=0.1, text_grace_s=0.5, lang="tl-IN")
+    before = SENTENCES_SKIPPED.labels("tl-IN", "text_only").get()
+    for text in ("slow", "next"):
+        pipeline.submit(text)
+
+    await wait_for(lambda: pipeline.in_flight == 0)
+    await wait_for(lambda: len(sink.frames) == 1)
+    assert sorted(m["text"] for m in sink.messages) == ["NEXT", "SLOW"]
+    assert sink.frames == [b"NEXT"]
+    assert pipeline.scheduler.skipped["text_only"] == 1
+    assert SENTENCES_SKIPPED.labels("tl-IN", "text_only").get() == before + 1
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_tts_without_first_audio_by_the_deadline_is_cancelled():
+    pipeline, sink = make_pipeline(FakeTranslator(), FakeTTS(delays={"MUTE": 10}))
+    for text in ("mute", "after"):
+        pipeline.submit(text)
+
+    await wait_for(lambda: pipeline.in_flight == 0)
+    await wait_for(lambda: len(sink.frames) == 1)
+    assert sink.frames == [b"AFTER"]
+    assert "MUTE" in [m["text"] for m in sink.messages]
+    assert pipeline.scheduler.skipped["text_only"] == 1
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_expiry_while_queued():
+    translator = FakeTranslator(delays={"a": 0.12, "b": 0.12})
+    pipeline, sink = make_pipeline(translator, max_concurrent=2, budget_s=0.05, text_grace_s=0.05)
+    for text in ("a", "b", "c"):
+        pipeline.submit(text)
+
+    await wait_for(lambda: pipeline.in_flight == 0)
+    assert translator.peak == 2
+    # "c" waited past its deadline for a slot and was never translated
+    assert pipeline.scheduler.skipped == {"expired": 1, "cancelled": 2, "text_only": 0}
+    assert sink.frames == [] and sink.messages == []
+    assert pipeline.streamer.next_index == 3
+    pipeline.close()
+
+
+@pytest.mark.asyncio
+async def test_streamer_skip_discards_queued_audio_and_moves_on():
+    sink = FakeSink()
+    streamer = OrderedAudioStreamer(sink, max_frame_bytes=2)
+    await streamer.put(1, b"b1")
+    streamer.skip(1)
+    streamer.skip(0)
+    await streamer.put(2, b"c2")
+    await streamer.end(2)
+
+    await wait_for(lambda: len(sink.frames) == 1)
+    assert sink.frames == [b"c2"]
+    assert streamer.skipped == 2
+    streamer.cancel()
@@ -0,0 +1,132 @@
+"""
+Replay tests for ASR segmentation policies.
+
+Event streams mimic Deepgram live results: interim hypotheses between finals,
+one final per ~1s of audio, speech_final at pauses. `now` is the arrival time
+of each message (audio time + a fixed ASR lag).
+"""
+from types import SimpleNamespace
+
+from app.services.segmenter import AdaptiveSegmenter, FixedSegmenter
+
+ASR_LAG = 0.3
+
+
+def make_events(text, rate_wps, final_every=1.0, pause_after=()):
+    """Builds (now, kwargs) events for `text` spoken at `rate_wps` words/sec."""
+    words = []
+    t = 0.0
+    for i, token in enumerate(text.split()):
+        words.append(SimpleNamespace(word=token.strip(".,?!").lower(), punctuated_word=token, start=t, end=t + 0.8 / rate_wps))
+        t += 1.0 / rate_wps
+        if i in pause_after:
+            t += 0.8
+
+    events = []
+    group = []
+    for i, word in enumerate(words):
+        group.append(word)
+        is_pause = i in pause_after
+        last = i == len(words) - 1
+        if len(group) >= 2:
+            # Interim for the partial group
+            events.append((word.end + ASR_LAG, {"transcript": " ".join(w.punctuated_word for w in group), "words": list(group), "is_final": False}))
+        if word.end - group[0].start >= final_every or is_pause or last:
+            events.append((word.end + ASR_LAG, {
+                "transcript": " ".join(w.punctuated_word for w in group),
+                "words": list(group),
+                "is_final": True,
+                "speech_final": is_pause or last,
+            }))
+            group = []
+    return events
+
+
+def replay(segmenter, events):
+    segments = []
+    for now, kwargs in events:
+        text = segmenter.on_result(now=now, **kwargs)
+        if text:
+            segments.append((now, text))
+    return segments
+
+
+def legacy_replay(events):
+    """The original inline logic from DeepgramService._run_loop."""
+    segments = []
+    accumulated = ""
+    start = None
+    for now, kwargs in events:
+        if kwargs["is_final"] and kwargs["transcript"]:
+            accumulated += kwargs["transcript"] + " "
+            if start is None:
+                start = now
+        word_count = len(accumulated.split())
+        elapsed = now - start if start else 0
+        force = word_count >= 6 or elapsed >= 1.5
+        if (kwargs.get("speech_final") or force) and accumulated.strip():
+            segments.append((now, accumulated.strip()))
+            accumulated = ""
+            start = None
+    return segments
+
+
+LECTURE = (
+    "Today we will look at recursion. A recursive function calls itself, "
+    "and every call works on a smaller problem. When the problem is small enough, "
+    "we return directly. This is called the base case."
+)
+
+
+def test_fixed_policy_reproduces_legacy_behaviour():
+    for rate in (1.5, 2.5, 4.5):
+        events = make_events(LECTURE, rate, pause_after=(5, 20))
+        assert replay(FixedSegmenter(), events) == legacy_replay(events)
+
+
+def test_adaptive_cuts_at_sentence_punctuation():
+    events = make_events(LECTURE, 2.5)
+    segments = [text for _, text in replay(AdaptiveSegmenter(latency_target_s=6.0), events)]
+    assert segments[0] == "Today we will look at recursion."
+    assert " ".join(segments) == LECTURE
+
+
+def test_adaptive_uses_latency_headroom_for_fast_talkers():
+    # 6 words is barely over a second of fast speech; with a relaxed
+    # latency target the adaptive policy sends fewer, longer segments.
+    events = make_events(LECTURE, 4.5)
+    fixed = replay(FixedSegmenter(), events)
+    adaptive = replay(AdaptiveSegmenter(latency_target_s=4.0), events)
+    assert len(adaptive) < len(fixed)
+    assert " ".join(t for _, t in adaptive) == " ".join(t for _, t in fixed)
+
+
+def test_adaptive_respects_latency_budget_for_slow_speakers():
+    text = "so the the next thing we want to think about is how the memory is laid out in the machine"
+    events = make_events(text, 1.2)
+    segmenter = AdaptiveSegmenter(latency_target_s=2.0)
+    budget = segmenter.budget_s()
+
+    segments = replay(segmenter, events)
+    first_final = next(now for now, kw in events if kw["is_final"])
+    assert segments[0][0] - first_final <= budget * 1.5 + 1.0
+
+
+def test_backlog_stretches_budget():
+    backlog = [0]
+    segmenter = AdaptiveSegmenter(latency_target_s=2.5, backlog_fn=lambda: backlog[0])
+    idle = segmenter.budget_s()
+    backlog[0] = 3
+    assert segmenter.budget_s() > idle
+    assert segmenter.budget_s() <= segmenter.max_budget_s
+
+
+def test_segment_without_word_timings_has_no_audio_span():
+    segmenter = FixedSegmenter()
+    word = SimpleNamespace(word="hello", punctuated_word="Hello.", start=1.0, end=1.5)
+    assert segmenter.on_result("Hello.", words=[word], is_final=True, speech_final=True) == "Hello."
+    assert (segmenter.last_audio_start, segmenter.last_audio_end) == (1.0, 1.5)
+
+    assert segmenter.on_result("Again.", is_final=True, speech_final=True) == "Again."
+    assert segmenter.last_audio_start is None
+    assert segmenter.last_audio_end is None
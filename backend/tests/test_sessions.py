@@ -0,0 +1,121 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.services.sessions import ResumableSession, ResumableSink, SessionRegistry
+from tests.conftest import FakeWebSocket
+
+
+class FakeIngest:
+    def __init__(self):
+        self.paused = False
+        self.flushes = 0
+        self.closed = False
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    async def flush(self):
+        self.flushes += 1
+
+    def summary(self):
+        return {}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClosable:
+    def summary(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+def make_session(token="t0"):
+    return ResumableSession("s0", logging.getLogger("test"), FakeClosable(), ResumableSink(token), None, FakeIngest(), FakeClosable())
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_unacknowledged_messages_in_order():
+    sink = ResumableSink("t0")
+    first = FakeWebSocket()
+    await sink.attach(first)
+    await sink.send_bytes(b"a")
+    await sink.send_json({"type": "transcript", "text": "one"})
+    await sink.send_bytes(b"b")
+    sink.control('{"type": "ack", "seq": 2}')
+
+    # Sent after the drop: kept for the next socket
+    assert sink.detach(first)
+    await sink.send_bytes(b"c")
+
+    second = FakeWebSocket()
+    lost = await sink.attach(second, last_seq=2, resumed=True)
+    assert lost == 0
+    assert second.messages == [{"type": "session", "token": "t0", "resumed": True, "seq": 2, "lost": 0}]
+    assert second.frames == [b"b", b"c"]
+    await sink.send_bytes(b"d")
+    assert second.frames == [b"b", b"c", b"d"]
+    assert first.frames == [b"a", b"b"]
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_audio_is_bounded_while_attached():
+    sink = ResumableSink("t0", max_unacked_bytes=4)
+    await sink.attach(FakeWebSocket())
+    for chunk in (b"aa", b"bb", b"cc", b"dd"):
+        await sink.send_bytes(chunk)
+    assert sink.stats()["unacked_bytes"] == 4
+
+    sink.detach(sink.websocket)
+    resumed = FakeWebSocket()
+    lost = await sink.attach(resumed, last_seq=1, resumed=True)
+    assert lost == 1
+    assert resumed.frames == [b"cc", b"dd"]
+
+
+@pytest.mark.asyncio
+async def test_detached_sink_holds_senders_once_full():
+    sink = ResumableSink("t0", max_unacked_bytes=4)
+    await sink.send_bytes(b"aaaa")
+    blocked = asyncio.ensure_future(sink.send_bytes(b"bb"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    websocket = FakeWebSocket()
+    await sink.attach(websocket, resumed=True)
+    await asyncio.wait_for(blocked, 1.0)
+    assert websocket.frames == [b"aaaa", b"bb"]
+
+
+@pytest.mark.asyncio
+async def test_registry_keeps_dropped_sessions_for_the_grace_period():
+    registry = SessionRegistry(grace_s=0.05)
+    kept, expired, ended = make_session("kept"), make_session("expired"), make_session("ended")
+    sockets = {}
+    for session in (kept, expired, ended):
+        registry.add(session)
+        sockets[session.token] = FakeWebSocket()
+        await session.attach(sockets[session.token])
+
+    await registry.release(kept, sockets["kept"])
+    await registry.release(expired, sockets["expired"])
+    await registry.release(ended, sockets["ended"], keep=False)
+    assert ended.ingest.closed and registry.claim("ended") is None
+    assert kept.ingest.paused and kept.ingest.flushes == 1
+
+    assert registry.claim("kept") is kept
+    await kept.attach(FakeWebSocket(), last_seq=0, resumed=True)
+    assert not kept.ingest.paused
+
+    await asyncio.sleep(0.1)
+    assert expired.ingest.closed
+    assert registry.claim("expired") is None
+    assert not kept.ingest.closed
+    assert registry.stats()["sessions"] == 1
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.core.config import settings
+from app.core.metrics import SessionMetrics
+from app.services.pipeline import TranslationPipeline
+from app.services.speculation import InterimStabilizer, Speculator, normalize
+from tests.conftest import FakeSink, FakeTTS
+
+
+class Recorder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def run(self, text):
+        self.calls.append(text)
+        await asyncio.sleep(self.delay)
+        return text.upper()
+
+
+def test_normalize_ignores_case_and_punctuation():
+    assert normalize("Hello,  World!") == normalize("hello world") == "hello world"
+
+
+def test_stabilizer_fires_once_after_agreement():
+    stabilizer = InterimStabilizer(agreement=2)
+    assert stabilizer.update("we check") is None
+    assert stabilizer.update("we check whether") is None
+    assert stabilizer.update("we check whether") == "we check whether"
+    assert stabilizer.update("we check whether") is None
+    stabilizer.reset()
+    assert stabilizer.update("we check whether") is None
+
+
+@pytest.mark.asyncio
+async def test_matching_segment_claims_the_speculation():
+    runner = Recorder()
+    outcomes = []
+    speculator = Speculator(runner.run, min_words=2, on_outcome=outcomes.append)
+    speculator.offer("one two three")
+    await asyncio.sleep(0.01)
+
+    task = speculator.claim("One two three.")
+    assert await task == "ONE TWO THREE"
+    assert outcomes == ["hit"]
+    assert speculator.stats()["hit_rate"] == 1.0
+    assert speculator.stats()["ready_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_one_job_at_a_time_latest_candidate_wins():
+    runner = Recorder(delay=0.02)
+    speculator = Speculator(runner.run, min_words=1)
+    speculator.offer("a")
+    speculator.offer("a b")
+    speculator.offer("a b c")
+    await asyncio.sleep(0.06)
+    # "a b" was replaced while "a" was running; "a" is now stale
+    assert runner.calls == ["a", "a b c"]
+    assert speculator.wasted == 1
+
+    assert await speculator.claim("a b c") == "A B C"
+    assert speculator.stats()["speculations"] == 2
+
+
+@pytest.mark.asyncio
+async def test_different_segment_wastes_the_speculation():
+    runner = Recorder(delay=1.0)
+    outcomes = []
+    speculator = Speculator(runner.run, min_words=1, on_outcome=outcomes.append)
+    speculator.offer("ten words")
+    assert speculator.claim("ten words and more") is None
+    assert outcomes == ["wasted"]
+    assert speculator.stats()["hit_rate"] == 0.0
+    speculator.offer("short")  # too short texts are never offered to run_fn
+    speculator.cancel()
+
+
+class CountingTranslator:
+    def __init__(self):
+        self.calls = []
+
+    async def translate(self, text, target_lang, session):
+        self.calls.append(text)
+        await asyncio.sleep(0.01)
+        return f"<{text}>"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_uses_the_speculative_translation(monkeypatch):
+    monkeypatch.setattr(settings, "SPECULATIVE_TRANSLATION", True)
+    monkeypatch.setattr(settings, "SPECULATIVE_TTS", True)
+    translator = CountingTranslator()
+    sink = FakeSink()
+    metrics = SessionMetrics("test", "sp-IN", track_session=False)
+    pipeline = TranslationPipeline(sink, "sp-IN", translator, FakeTTS(), logging.getLogger("test"), metrics, http_session=object())
+
+    pipeline.speculate("we return n times")
+    await asyncio.sleep(0.05)
+    pipeline.submit("We return n times")
+    await asyncio.sleep(0.05)
+
+    assert translator.calls == ["we return n times"]
+    assert sink.messages[0]["text"] == "<we return n times>"
+    assert sink.frames == [b"<we return n times>"]
+    assert pipeline.summary()["spec_hit_rate"] == 1.0
+    pipeline.close()
+
+
+class FlakyTranslator(CountingTranslator):
+    """The first call (the speculative one) fails."""
+    async def translate(self, text, target_lang, session):
+        if not self.calls:
+            self.calls.append(text)
+            raise RuntimeError("upstream down")
+        return await super().translate(text, target_lang, session)
+
+
+@pytest.mark.asyncio
+async def test_failed_speculation_falls_back_to_a_normal_translation(monkeypatch):
+    monkeypatch.setattr(settings, "SPECULATIVE_TRANSLATION", True)
+    monkeypatch.setattr(settings, "SPECULATIVE_TTS", True)
+    translator = FlakyTranslator()
+    sink = FakeSink()
+    metrics = SessionMetrics("test", "sp-IN", track_session=False)
+    pipeline = TranslationPipeline(sink, "sp-IN", translator, FakeTTS(), logging.getLogger("test"), metrics, http_session=object())
+
+    pipeline.speculate("we return n times")
+    await asyncio.sleep(0.05)
+    pipeline.submit("We return n times")
+    await asyncio.sleep(0.05)
+
+    assert translator.calls == ["we return n times", "We return n times"]
+    assert sink.messages[0]["text"] == "<We return n times>"
+    assert sink.frames == [b"<We return n times>"]
+    assert pipeline.speculator.stats()["wasted"] == 1
+    pipeline.close()
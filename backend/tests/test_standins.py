@@ -0,0 +1,114 @@
+"""
+The offline stand-ins must speak the real wire formats: these tests drive
+them with the production Deepgram/Sarvam clients, no network needed.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.http_pool import HTTPClientPool
+from app.services.deepgram_client import DeepgramService
+from app.services.sarvam_translate_client import SarvamTranslateService
+from app.services.sarvam_tts_client import SarvamTTSService
+from benchmarks.standins import LatencyModel, PCMTagParser, StandInServer, tagged_pcm
+
+SCRIPT = "Hello there everyone. Today we talk about loops, and why they matter."
+
+
+async def start_standins(monkeypatch):
+    server = await StandInServer(
+        script=SCRIPT,
+        words_per_second=10,
+        asr_latency="0",
+        translate_latency="0",
+        tts_latency="0",
+    ).start()
+    monkeypatch.setattr(settings, "DEEPGRAM_URL", server.ws_url)
+    monkeypatch.setattr(settings, "SARVAM_API_URL", server.http_url)
+    monkeypatch.setattr(settings, "DEEPGRAM_API_KEY", "standin")
+    monkeypatch.setattr(settings, "SARVAM_API_KEY", "standin")
+    return server
+
+
+def test_latency_model_specs():
+    assert LatencyModel("0.2").sample() == 0.2
+    samples = [LatencyModel("lognormal:0.3,0.9", seed=1).sample() for _ in range(3)]
+    assert samples[0] == samples[1] == samples[2]  # seeded
+    uniform = LatencyModel("uniform:0.1,0.2", seed=0)
+    assert all(0.1 <= uniform.sample() <= 0.2 for _ in range(100))
+    with pytest.raises(ValueError):
+        LatencyModel("pareto:1")
+
+
+def test_pcm_tags_survive_arbitrary_framing():
+    stream = tagged_pcm(7, 1000) + tagged_pcm(8, 3)
+    parser = PCMTagParser()
+    seen = []
+    for i in range(0, len(stream), 333):
+        seen.extend(parser.feed(stream[i:i + 333]))
+    assert seen == [7, 8]
+
+
+@pytest.mark.asyncio
+async def test_deepgram_service_transcribes_script(monkeypatch):
+    standins = await start_standins(monkeypatch)
+    segments = []
+
+    async def on_transcript(text, is_final):
+        segments.append(text)
+
+    asr = DeepgramService()
+    await asr.connect(on_transcript_callback=on_transcript)
+    # 2 s of audio at 10 words/s covers the whole script
+    silence = np.zeros(1600, dtype=np.int16).tobytes()
+    for _ in range(20):
+        await asr.send_audio(silence)
+        await asyncio.sleep(0.005)
+    await asr.finalize()
+    for _ in range(100):
+        if " ".join(segments) == SCRIPT:
+            break
+        await asyncio.sleep(0.02)
+    await asr.close()
+    await standins.stop()
+
+    assert " ".join(segments) == SCRIPT
+    assert standins.of_kind("asr_final")
+
+
+@pytest.mark.asyncio
+async def test_sarvam_clients_against_standins(monkeypatch):
+    standins = await start_standins(monkeypatch)
+    pool = HTTPClientPool()
+    await pool.start()
+    try:
+        translator = SarvamTranslateService(cache=None)
+        text = await translator.translate("Good morning", target_lang="hi-IN", session=pool.session)
+        assert text == "Good morning (hi-IN)"
+
+        tts = SarvamTTSService(cache=None)
+        audio = b"".join([bytes(c) async for c in tts.text_to_speech_stream(text, target_lang="hi-IN", session=pool.session)])
+    finally:
+        await pool.close()
+        await standins.stop()
+
+    assert PCMTagParser().feed(audio) == [1]
+    assert standins.of_kind("tts")[0]["text"] == text
+
+
+@pytest.mark.asyncio
+async def test_tts_standin_answers_multi_input_requests(monkeypatch):
+    standins = await start_standins(monkeypatch)
+    pool = HTTPClientPool()
+    await pool.start()
+    try:
+        tts = SarvamTTSService(cache=None, batching=False)
+        pcms = await tts.synthesize_batch(["one", "two"], "hi-IN", tts.speaker, session=pool.session)
+    finally:
+        await pool.close()
+        await standins.stop()
+
+    assert [PCMTagParser().feed(pcm) for pcm in pcms] == [[1], [2]]
+    assert {e["request"] for e in standins.of_kind("tts")} == {1}
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from app.audio.streamer import OrderedAudioStreamer
+from tests.conftest import FakeWebSocket, wait_for
+
+
+@pytest.mark.asyncio
+async def test_sentences_are_streamed_in_order():
+    ws = FakeWebSocket()
+    streamer = OrderedAudioStreamer(ws, max_frame_bytes=2)
+
+    # Sentence 1 finishes before sentence 0 even starts
+    await streamer.put(1, b"b1")
+    await streamer.end(1)
+    await asyncio.sleep(0)
+    assert ws.frames == []
+
+    await streamer.put(0, b"a0")
+    await streamer.end(0)
+    await wait_for(lambda: len(ws.frames) == 2)
+    assert ws.frames == [b"a0", b"b1"]
+    assert streamer.next_index == 2
+    streamer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_waiting_chunks_are_coalesced():
+    ws = FakeWebSocket()
+    streamer = OrderedAudioStreamer(ws, max_queue_chunks=16, max_frame_bytes=6)
+    for part in (b"aa", b"bb", b"cc", b"dd"):
+        await streamer.put(0, part)
+    await streamer.end(0)
+    await wait_for(lambda: streamer.next_index == 1)
+    assert ws.frames == [b"aabbcc", b"dd"]
+    streamer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure():
+    ws = FakeWebSocket()
+    streamer = OrderedAudioStreamer(ws, max_queue_chunks=2)
+
+    # Sentence 0 is not done, so sentence 1 cannot drain
+    await streamer.put(1, b"x")
+    await streamer.put(1, b"y")
+    blocked = asyncio.create_task(streamer.put(1, b"z"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    # Cancelling releases the blocked producer
+    streamer.cancel()
+    await asyncio.wait_for(blocked, timeout=1.0)
+    await streamer.put(1, b"after-close")
+
+
+@pytest.mark.asyncio
+async def test_cancel_releases_every_blocked_producer():
+    streamer = OrderedAudioStreamer(FakeWebSocket(), max_queue_chunks=1)
+
+    # More producers waiting than the queue has slots
+    await streamer.put(1, b"x")
+    blocked = [asyncio.create_task(streamer.put(1, bytes([i]))) for i in range(4)]
+    blocked.append(asyncio.create_task(streamer.end(1)))
+    await asyncio.sleep(0.01)
+    assert not any(task.done() for task in blocked)
+
+    streamer.cancel()
+    await asyncio.wait_for(asyncio.gather(*blocked), timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_queue_wait_and_send_spans_are_reported():
+    ws = FakeWebSocket()
+    spans = []
+    streamer = OrderedAudioStreamer(ws, on_span=lambda stage, s: spans.append((stage, s)))
+
+    await streamer.put(1, b"b1")
+    await streamer.end(1)
+    await asyncio.sleep(0.02)  # sentence 1 waits behind sentence 0
+    await streamer.put(0, b"a0")
+    await streamer.end(0)
+    await wait_for(lambda: len(ws.frames) == 2)
+
+    waits = [s for stage, s in spans if stage == "queue_wait"]
+    assert len(waits) == 2
+    assert waits[1] >= 0.02 > waits[0]
+    assert sum(stage == "ws_send" for stage, _ in spans) == 2
+    streamer.cancel()
+
+
+@pytest.mark.asyncio
+async def test_skipping_the_sentence_being_sent_with_a_full_queue_moves_on():
+    gate = asyncio.Event()
+    ws = FakeWebSocket(gate=gate)
+    streamer = OrderedAudioStreamer(ws, max_queue_chunks=2, max_frame_bytes=2)
+
+    # Sentence 0 is on the wire (the client is slow) and its queue fills up
+    await streamer.put(0, b"aa")
+    await wait_for(lambda: streamer.sending)
+    await streamer.put(0, b"bb")
+    await streamer.put(0, b"cc")
+    streamer.skip(0)
+    await streamer.put(1, b"dd")
+    await streamer.end(1)
+
+    gate.set()
+    await wait_for(lambda: len(ws.frames) == 4)
+    assert ws.frames == [b"aa", b"bb", b"cc", b"dd"]
+    streamer.cancel()
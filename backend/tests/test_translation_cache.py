@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from app.services.sarvam_translate_client import SarvamTranslateService
+from app.services.translation_cache import TranslationCache
+
+
+class CountingFetch:
+    def __init__(self, result="नमस्ते", delay=0.01):
+        self.calls = 0
+        self.result = result
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+def test_key_normalizes_whitespace():
+    a = TranslationCache.make_key("  Hello   world ", "en-IN", "hi-IN", "m", "code-mixed")
+    b = TranslationCache.make_key("Hello world", "en-IN", "hi-IN", "m", "code-mixed")
+    assert a == b
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_request():
+    cache = TranslationCache()
+    fetch = CountingFetch()
+    key = cache.make_key("Hello", "en-IN", "hi-IN", "m", "code-mixed")
+
+    results = await asyncio.gather(*(cache.get_or_fetch(key, fetch) for _ in range(10)))
+
+    assert results == ["नमस्ते"] * 10
+    assert fetch.calls == 1
+    assert cache.misses == 1
+    assert cache.coalesced == 9
+
+    assert await cache.get_or_fetch(key, fetch) == "नमस्ते"
+    assert cache.memory_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_results_are_not_cached():
+    cache = TranslationCache()
+    fetch = CountingFetch(result="")
+    key = cache.make_key("Hello", "en-IN", "hi-IN", "m", "code-mixed")
+    await cache.get_or_fetch(key, fetch)
+    await cache.get_or_fetch(key, fetch)
+    assert fetch.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest():
+    cache = TranslationCache(max_entries=2)
+    for word in ("a", "b", "c"):
+        await cache.put(cache.make_key(word, "en-IN", "hi-IN", "m", "x"), word.upper())
+    assert await cache.get(cache.make_key("a", "en-IN", "hi-IN", "m", "x")) is None
+    assert await cache.get(cache.make_key("c", "en-IN", "hi-IN", "m", "x")) == "C"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_survives_restart(tmp_path):
+    db_path = str(tmp_path / "translations.db")
+    key = TranslationCache.make_key("Hello", "en-IN", "te-IN", "m", "code-mixed")
+
+    first = TranslationCache(db_path=db_path)
+    await first.put(key, "హలో")
+    first.close()
+
+    second = TranslationCache(db_path=db_path)
+    fetch = CountingFetch()
+    assert await second.get_or_fetch(key, fetch) == "హలో"
+    assert fetch.calls == 0
+    assert second.disk_hits == 1
+    second.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_is_cancelled_once_every_caller_gives_up():
+    cache = TranslationCache()
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def fetch():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    key = cache.make_key("Hello", "en-IN", "hi-IN", "m", "code-mixed")
+    callers = [asyncio.ensure_future(cache.get_or_fetch(key, fetch)) for _ in range(2)]
+    await started.wait()
+
+    # One session dropping its sentence leaves the request to the other
+    callers[0].cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()
+
+    callers[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), 1.0)
+    # A new caller starts a fresh request rather than joining the dead one
+    assert await cache.get_or_fetch(key, CountingFetch()) == "नमस्ते"
+
+
+@pytest.mark.asyncio
+async def test_service_uses_cache(monkeypatch):
+    service = SarvamTranslateService(cache=TranslationCache())
+    calls = []
+
+    async def fake_request(text, source_lang, target_lang, session=None):
+        calls.append(text)
+        return "अनुवाद"
+
+    monkeypatch.setattr(service, "_request", fake_request)
+    assert await service.translate("Hello there", target_lang="hi-IN") == "अनुवाद"
+    assert await service.translate("Hello  there ", target_lang="hi-IN") == "अनुवाद"
+    assert calls == ["Hello there"]
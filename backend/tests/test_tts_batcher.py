@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from app.services.tts_batcher import TTSBatcher
+
+
+class FakeTTS:
+    def __init__(self, latency=0.0):
+        self.calls = []
+        self.latency = latency
+
+    async def request(self, texts, target_lang, speaker, session, pace=None):
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.latency)
+        return [f"{target_lang}:{text}".encode() for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_lone_segment_is_sent_immediately():
+    tts = FakeTTS()
+    batcher = TTSBatcher(tts.request, max_window_ms=200)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    assert await batcher.synthesize("hello", "hi-IN", "ritu", None) == b"hi-IN:hello"
+    assert loop.time() - start < 0.1
+    assert batcher.stats()["held_batches"] == 0
+
+
+@pytest.mark.asyncio
+async def test_burst_shares_one_request_and_results_keep_their_order():
+    tts = FakeTTS()
+    batcher = TTSBatcher(tts.request, max_window_ms=50, max_inputs=3)
+    # The first segment goes out alone; the rest of the burst is grouped
+    first = asyncio.create_task(batcher.synthesize("a", "hi-IN", "ritu", None))
+    await asyncio.sleep(0.001)
+    rest = [asyncio.create_task(batcher.synthesize(t, "hi-IN", "ritu", None)) for t in ("b", "c", "d")]
+    results = await asyncio.gather(first, *rest)
+
+    assert results == [b"hi-IN:a", b"hi-IN:b", b"hi-IN:c", b"hi-IN:d"]
+    assert tts.calls == [["a"], ["b", "c", "d"]]
+    assert batcher.stats()["inputs_per_request"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_languages_are_batched_separately():
+    tts = FakeTTS()
+    batcher = TTSBatcher(tts.request, max_window_ms=50, max_inputs=2)
+    await batcher.synthesize("warm", "hi-IN", "ritu", None)
+    await batcher.synthesize("warm", "ta-IN", "ritu", None)
+    results = await asyncio.gather(
+        batcher.synthesize("x", "hi-IN", "ritu", None),
+        batcher.synthesize("y", "ta-IN", "ritu", None),
+        batcher.synthesize("z", "hi-IN", "ritu", None),
+    )
+    assert results == [b"hi-IN:x", b"ta-IN:y", b"hi-IN:z"]
+    assert ["x", "z"] in tts.calls
+    assert ["y"] in tts.calls
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_returns_none_for_every_input():
+    async def failing(texts, target_lang, speaker, session, pace=None):
+        raise RuntimeError("boom")
+
+    batcher = TTSBatcher(failing, max_window_ms=50)
+    assert await batcher.synthesize("a", "hi-IN", "ritu", None) is None
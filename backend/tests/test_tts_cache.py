@@ -0,0 +1,77 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from app.services.sarvam_tts_client import SarvamTTSService
+from app.services.tts_cache import TTSAudioCache
+
+
+def test_key_depends_on_all_parameters():
+    base = TTSAudioCache.make_key("नमस्ते", "hi-IN", "ritu", 1.2, "bulbul:v3", 24000)
+    assert base == TTSAudioCache.make_key(" नमस्ते ", "hi-IN", "ritu", 1.2, "bulbul:v3", 24000)
+    assert base != TTSAudioCache.make_key("नमस्ते", "hi-IN", "ritu", 1.0, "bulbul:v3", 24000)
+    assert base != TTSAudioCache.make_key("नमस्ते", "te-IN", "ritu", 1.2, "bulbul:v3", 24000)
+
+
+@pytest.mark.asyncio
+async def test_disk_hit_is_memory_mapped(tmp_path):
+    digest = TTSAudioCache.make_key("hello", "hi-IN", "ritu", 1.2, "bulbul:v3", 24000)
+    pcm = bytes(range(256)) * 100
+
+    writer = TTSAudioCache(str(tmp_path))
+    await writer.put(digest, pcm)
+
+    # A fresh instance has an empty hot tier, so this comes from disk
+    reader = TTSAudioCache(str(tmp_path), hot_max_bytes=0)
+    hit = await reader.get(digest)
+    assert bytes(hit) == pcm
+    assert reader.disk_hits == 1
+    assert await reader.get("0" * 64) is None
+    assert reader.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_eviction_keeps_disk_under_limit(tmp_path):
+    cache = TTSAudioCache(str(tmp_path), max_bytes=2500, hot_max_bytes=0)
+    digests = [TTSAudioCache.make_key(str(i), "hi-IN", "ritu", 1.2, "m", 24000) for i in range(4)]
+    for digest in digests:
+        await cache.put(digest, b"\x01" * 1000)
+
+    assert cache.stats()["disk_bytes"] <= 2500
+    assert cache.evictions == 2
+    assert not os.path.exists(cache._path(digests[0]))
+    assert await cache.get(digests[3]) is not None
+
+
+@pytest.mark.asyncio
+async def test_service_serves_repeat_from_cache(tmp_path):
+    cache = TTSAudioCache(str(tmp_path))
+    service = SarvamTTSService(cache=cache)
+    service.chunk_size = 1000
+    digest = cache.make_key("नमस्ते", "hi-IN", service.speaker, service.pace, service.model, service.sample_rate)
+    await cache.put(digest, b"\x02" * 2500)
+
+    chunks = [bytes(c) async for c in service.text_to_speech_stream("नमस्ते", target_lang="hi-IN")]
+    assert [len(c) for c in chunks] == [1000, 1000, 500]
+    assert cache.hot_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_of_one_entry_count_it_once(tmp_path, monkeypatch):
+    cache = TTSAudioCache(str(tmp_path), hot_max_bytes=0)
+    digest = TTSAudioCache.make_key("hello", "hi-IN", "ritu", 1.2, "m", 24000)
+    # Both writers get past the index check before either renames
+    both_written = threading.Barrier(2, timeout=1.0)
+    replace = os.replace
+
+    def racing_replace(src, dst):
+        both_written.wait()
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", racing_replace)
+    await asyncio.gather(*(asyncio.to_thread(cache._write, digest, b"\x03" * 1000) for _ in range(2)))
+
+    assert cache.stats()["disk_entries"] == 1
+    assert cache.stats()["disk_bytes"] == 1000
@@ -0,0 +1,71 @@
+import numpy as np
+
+from app.audio.buffer import RingBuffer
+from app.audio.vad import VADGate
+
+WINDOW = 512
+
+
+def energy_score(windows):
+    """Stand-in for Silero: loud windows are speech."""
+    rms = np.sqrt(np.mean(windows.astype(np.float32) ** 2, axis=1))
+    return (rms > 1000).astype(np.float32)
+
+
+def make_audio(pattern):
+    """One 512-sample window per character: 's' = speech, '.' = silence."""
+    windows = [np.full(WINDOW, 5000 if c == "s" else 10, dtype=np.int16) for c in pattern]
+    return np.concatenate(windows)
+
+
+def test_ring_buffer_wraps_and_drops_oldest():
+    ring = RingBuffer(8)
+    ring.write(np.arange(6, dtype=np.int16))
+    np.testing.assert_array_equal(ring.read(4), [0, 1, 2, 3])
+    ring.write(np.arange(6, 12, dtype=np.int16))
+    np.testing.assert_array_equal(ring.drain(), [4, 5, 6, 7, 8, 9, 10, 11])
+
+    ring.write(np.arange(10, dtype=np.int16))
+    assert ring.dropped == 2
+    np.testing.assert_array_equal(ring.drain(), np.arange(2, 10))
+
+
+def test_gate_drops_silence():
+    gate = VADGate(energy_score, preroll_ms=0, hangover_ms=0)
+    out = gate.process(make_audio("." * 40))
+    assert len(out) == 0
+    assert gate.windows_total == 40
+    assert not gate.is_speaking
+
+
+def test_gate_adds_preroll_and_hangover():
+    # 2 windows of preroll (64ms) and 2 of hangover at 16kHz
+    gate = VADGate(energy_score, preroll_ms=64, hangover_ms=64)
+    audio = make_audio("....sss....")
+    out = gate.process(audio)
+
+    # 2 preroll + 3 speech + 2 hangover windows
+    assert len(out) == 7 * WINDOW
+    np.testing.assert_array_equal(out, audio[2 * WINDOW:9 * WINDOW])
+    assert not gate.is_speaking
+
+
+def test_gate_is_independent_of_chunking():
+    audio = make_audio("..ss.....s.sss......")
+    whole = VADGate(energy_score, preroll_ms=64, hangover_ms=96).process(audio)
+
+    gate = VADGate(energy_score, preroll_ms=64, hangover_ms=96, max_batch=3)
+    pieces = [gate.process(audio[i:i + 1486]) for i in range(0, len(audio), 1486)]
+    np.testing.assert_array_equal(np.concatenate(pieces), whole)
+
+
+def test_gate_batches_model_calls():
+    calls = []
+
+    def counting_score(windows):
+        calls.append(len(windows))
+        return energy_score(windows)
+
+    gate = VADGate(counting_score, max_batch=8)
+    gate.process(make_audio("s" * 20))
+    assert calls == [8, 8, 4]
@@ -0,0 +1,103 @@
+"""
+Silero VAD runtimes against the model files shipped in the `silero-vad`
+package (skipped when it is not installed).
+"""
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.audio.processor import AudioProcessor
+from app.audio.vad_model import VADStream, load_vad_model
+
+silero_vad = pytest.importorskip("silero_vad")
+MODEL_DIR = os.path.join(os.path.dirname(silero_vad.__file__), "data")
+JIT_PATH = os.path.join(MODEL_DIR, "silero_vad.jit")
+ONNX_PATH = os.path.join(MODEL_DIR, "silero_vad.onnx")
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "test_capture_speech_only.wav")
+
+
+def speech_windows(seconds=4.0):
+    with wave.open(SAMPLE, "rb") as wav_file:
+        audio = np.frombuffer(wav_file.readframes(int(seconds * 16000)), dtype=np.int16)
+    n = len(audio) // 512
+    return audio[:n * 512].reshape(n, 512)
+
+
+def score_in_batches(model, windows, sizes):
+    stream = VADStream(lambda: model)
+    out = []
+    i = 0
+    for size in sizes:
+        out.append(stream.score(windows[i:i + size]))
+        i += size
+    return np.concatenate(out)
+
+
+def test_batched_scoring_matches_window_by_window():
+    pytest.importorskip("torch")
+    model = load_vad_model(JIT_PATH)
+    windows = speech_windows()
+    one_by_one = score_in_batches(model, windows, [1] * len(windows))
+    batched = score_in_batches(model, windows, [7, 32, 1, 20, len(windows)])
+    np.testing.assert_allclose(batched, one_by_one, atol=1e-5)
+    assert (one_by_one > 0.5).any()
+
+
+def test_streams_do_not_share_state():
+    pytest.importorskip("torch")
+    model = load_vad_model(JIT_PATH)
+    windows = speech_windows()
+    reference = score_in_batches(model, windows, [len(windows)])
+
+    a, b = VADStream(lambda: model), VADStream(lambda: model)
+    silence = np.zeros((4, 512), dtype=np.int16)
+    got = []
+    for i in range(0, len(windows), 4):
+        got.append(a.score(windows[i:i + 4]))
+        b.score(silence)  # another session in between
+    np.testing.assert_allclose(np.concatenate(got), reference, atol=1e-5)
+
+
+def test_torchscript_matches_the_module_forward():
+    torch = pytest.importorskip("torch")
+    module = torch.jit.load(JIT_PATH, map_location="cpu")
+    windows = speech_windows()
+    module.reset_states()
+    with torch.inference_mode():
+        expected = np.array([module(torch.from_numpy(w[None].astype(np.float32) / 32768.0), 16000).item() for w in windows])
+    got = score_in_batches(load_vad_model(JIT_PATH), windows, [len(windows)])
+    np.testing.assert_allclose(got, expected, atol=1e-5)
+
+
+def test_streams_score_in_parallel_threads():
+    pytest.importorskip("torch")
+    model = load_vad_model(JIT_PATH)
+    windows = speech_windows()
+    reference = score_in_batches(model, windows, [len(windows)])
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: score_in_batches(model, windows, [8] * (len(windows) // 8 + 1)), range(4)))
+    for got in results:
+        np.testing.assert_allclose(got, reference, atol=1e-5)
+
+
+def test_onnx_runtime_matches_torchscript():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("torch")
+    windows = speech_windows()
+    jit = score_in_batches(load_vad_model(JIT_PATH), windows, [len(windows)])
+    onnx = score_in_batches(load_vad_model(ONNX_PATH), windows, [16] * (len(windows) // 16 + 1))
+    np.testing.assert_allclose(onnx, jit, atol=1e-3)
+
+
+def test_processor_loads_model_on_first_use():
+    pytest.importorskip("onnxruntime")
+    processor = AudioProcessor(vad_model_path=ONNX_PATH)
+    gate = processor.create_vad_gate()
+    assert not processor.is_ready
+
+    gate.process(speech_windows(1.0).reshape(-1))
+    assert processor.is_ready
+    assert processor.load_seconds is not None
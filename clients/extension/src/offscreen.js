@@ -1,9 +1,30 @@
 let socket = null;
 let mediaStream = null;
-let audioContext = null; // 44.1k for capture
-let playbackContext = null; // 16k for TTS playback
+let audioContext = null; // capture, at the ASR rate
+let playbackContext = null; // 24k for TTS playback
 let processor = null;
 
+// Capture straight at the ASR rate: the server passes 16 kHz mono Int16
+// through without resampling. Declared to the server at connect time.
+const CAPTURE_RATE = 16000;
+const CAPTURE_FRAMES = 1024; // samples per message (64 ms)
+
+// Outbound (dubbed) audio format asked of the server, best first.
+// The server answers with an "audio_format" message before any audio.
+const PREFERRED_CODECS = "adpcm,mulaw,pcm16";
+const PREFERRED_RATE = 24000;
+let outputFormat = { codec: "pcm16", sample_rate: 24000 };
+
+// Resumable session: the server numbers its messages after {"type": "session"}.
+// We ack what we received; if the socket drops, we reconnect with the token
+// and the last number and get the rest (the server keeps it for a while).
+const ACK_INTERVAL_MS = 500;
+const RECONNECT_DELAYS_MS = [250, 500, 1000, 2000, 4000];
+let session = null; // { token, seq }
+let ackTimer = null;
+let reconnectAttempt = 0;
+let stopping = false;
+
 chrome.runtime.onMessage.addListener(async (message) => {
   if (message.type === "START_RECORDING") {
     startCapture(message.data, message.isLoopback, message.targetLanguage);
@@ -15,16 +36,33 @@ chrome.runtime.onMessage.addListener(async (message) => {
 async function startCapture(streamId, isLoopback, targetLanguage) {
   const endpoint = isLoopback
     ? "ws://127.0.0.1:8000/ws/loopback"
-    : `ws://127.0.0.1:8000/ws/stream?lang=${targetLanguage || "hi-IN"}`;
+    : `ws://127.0.0.1:8000/ws/stream?lang=${targetLanguage || "hi-IN"}` +
+      `&sample_rate=${CAPTURE_RATE}&sample_format=s16&channels=1&frame_size=${CAPTURE_FRAMES}` +
+      `&codecs=${PREFERRED_CODECS}&out_rate=${PREFERRED_RATE}`;
+  // Loopback echoes our own capture back
+  outputFormat = {
+    codec: "pcm16",
+    sample_rate: isLoopback ? CAPTURE_RATE : 24000,
+  };
+  session = null;
+  stopping = false;
+  reconnectAttempt = 0;
+  connect(endpoint, streamId);
+}
 
-  socket = new WebSocket(endpoint);
+function connect(endpoint, streamId) {
+  const url = session
+    ? `${endpoint}&resume=${session.token}&last_seq=${session.seq}`
+    : endpoint;
+  socket = new WebSocket(url);
   socket.binaryType = "arraybuffer";
+  socket.onmessage = onSocketMessage;
 
   socket.onopen = async () => {
-    console.log(
-      `Connected to Python Server (${isLoopback ? "Loopback" : "Stream"})`,
-    );
+    console.log(`Connected to Python Server (${url})`);
     chrome.runtime.sendMessage({ type: "WS_STATUS", status: "connected" });
+    reconnectAttempt = 0;
+    if (mediaStream) return; // reconnected: capture is already running
 
     try {
       mediaStream = await navigator.mediaDevices.getUserMedia({
@@ -37,12 +75,12 @@ async function startCapture(streamId, isLoopback, targetLanguage) {
         video: false,
       });
 
-      audioContext = new AudioContext({ sampleRate: 44100 });
+      audioContext = new AudioContext({ sampleRate: CAPTURE_RATE });
       playbackContext = new AudioContext({ sampleRate: 24000 }); // Dedicated for TTS (bulbul:v3)
 
       const source = audioContext.createMediaStreamSource(mediaStream);
 
-      processor = audioContext.createScriptProcessor(4096, 1, 1);
+      processor = audioContext.createScriptProcessor(CAPTURE_FRAMES, 1, 1);
       source.connect(processor);
 
       // Keep original audio playing
@@ -66,36 +104,73 @@ async function startCapture(streamId, isLoopback, targetLanguage) {
         }
       };
 
-      socket.onmessage = (event) => {
-        if (typeof event.data === "string") {
-          try {
-            const data = JSON.parse(event.data);
-            if (data.type === "transcript") {
-              chrome.runtime.sendMessage({ type: "TRANSCRIPT", data: data });
-            }
-          } catch (e) {
-            console.error("Error parsing socket message:", e);
-          }
-        } else if (event.data instanceof ArrayBuffer) {
-          // Play any binary data received (TTS Chunks)
-          playBuffer(event.data);
-        }
-      };
     } catch (err) {
       console.error("Error starting tab capture:", err);
       chrome.runtime.sendMessage({ type: "WS_STATUS", status: "error" });
     }
   };
 
-  socket.onclose = () => {
-    chrome.runtime.sendMessage({ type: "WS_STATUS", status: "disconnected" });
+  socket.onclose = (event) => {
+    clearInterval(ackTimer);
+    ackTimer = null;
+    const delay = RECONNECT_DELAYS_MS[reconnectAttempt];
+    if (stopping || !session || event.code === 1000 || delay === undefined) {
+      chrome.runtime.sendMessage({ type: "WS_STATUS", status: "disconnected" });
+      return;
+    }
+    // Dropped: resume the same session on a new socket
+    chrome.runtime.sendMessage({ type: "WS_STATUS", status: "reconnecting" });
+    reconnectAttempt++;
+    setTimeout(() => {
+      if (!stopping) connect(endpoint, streamId);
+    }, delay);
   };
 
   socket.onerror = (err) => {
-    chrome.runtime.sendMessage({ type: "WS_STATUS", status: "error" });
+    // A session that drops is resumed by onclose instead
+    if (!session) {
+      chrome.runtime.sendMessage({ type: "WS_STATUS", status: "error" });
+    }
   };
 }
 
+function onSocketMessage(event) {
+  if (typeof event.data === "string") {
+    try {
+      const data = JSON.parse(event.data);
+      if (data.type === "session") {
+        // Numbering starts after this message (or resumes from it)
+        session = { token: data.token, seq: data.seq };
+        if (data.lost) console.warn(`Missed ${data.lost} messages while away`);
+        clearInterval(ackTimer);
+        ackTimer = setInterval(sendAck, ACK_INTERVAL_MS);
+        return;
+      }
+      if (session) session.seq++;
+      if (data.type === "transcript") {
+        chrome.runtime.sendMessage({ type: "TRANSCRIPT", data: data });
+      } else if (data.type === "error") {
+        console.error("Server rejected the stream:", data.message);
+      } else if (data.type === "audio_format") {
+        outputFormat = data;
+        console.log(`Dubbed audio: ${data.codec} @ ${data.sample_rate} Hz`);
+      }
+    } catch (e) {
+      console.error("Error parsing socket message:", e);
+    }
+  } else if (event.data instanceof ArrayBuffer) {
+    if (session) session.seq++;
+    // Play any binary data received (TTS Chunks)
+    playBuffer(event.data);
+  }
+}
+
+function sendAck() {
+  if (session && socket && socket.readyState === WebSocket.OPEN) {
+    socket.send(JSON.stringify({ type: "ack", seq: session.seq }));
+  }
+}
+
 let nextStartTime = 0;
 let activeSources = [];
 
@@ -105,16 +180,18 @@ function playBuffer(arrayBuffer) {
   // Notify background that audio is playing (for ducking)
   chrome.runtime.sendMessage({ type: "AUDIO_PLAYING" });
 
-  const pcmData = new Int16Array(arrayBuffer);
+  const pcmData = decodeAudio(arrayBuffer, outputFormat.codec);
   const float32Data = new Float32Array(pcmData.length);
   for (let i = 0; i < pcmData.length; i++) {
     float32Data[i] = pcmData[i] / 0x7fff;
   }
+  if (float32Data.length === 0) return;
 
+  // 16 kHz buffers are resampled by the 24 kHz context
   const audioBuffer = playbackContext.createBuffer(
     1,
     float32Data.length,
-    24000,
+    outputFormat.sample_rate,
   );
   audioBuffer.getChannelData(0).set(float32Data);
 
@@ -146,8 +223,13 @@ function playBuffer(arrayBuffer) {
 }
 
 function stopCapture() {
+  stopping = true;
+  clearInterval(ackTimer);
+  ackTimer = null;
+  session = null;
   if (socket) {
-    socket.close();
+    // A normal close ends the session on the server (no resume)
+    socket.close(1000);
     socket = null;
   }
   if (mediaStream) {
@@ -178,3 +260,104 @@ function convertFloat32ToInt16(buffer) {
   }
   return buf.buffer;
 }
+
+// --- Dubbed audio decoders (mirror backend/app/audio/codecs.py) ---
+
+function decodeAudio(arrayBuffer, codec) {
+  switch (codec) {
+    case "mulaw":
+      return decodeTable(arrayBuffer, MULAW_TABLE);
+    case "alaw":
+      return decodeTable(arrayBuffer, ALAW_TABLE);
+    case "adpcm":
+      return decodeAdpcm(arrayBuffer);
+    default:
+      return new Int16Array(arrayBuffer);
+  }
+}
+
+// G.711: one byte per sample, decoded through a 256-entry table
+const MULAW_TABLE = buildMulawTable();
+const ALAW_TABLE = buildAlawTable();
+
+function buildMulawTable() {
+  const table = new Int16Array(256);
+  for (let i = 0; i < 256; i++) {
+    const u = ~i & 0xff;
+    const t = (((u & 0x0f) << 3) + 0x84) << ((u & 0x70) >> 4);
+    table[i] = u & 0x80 ? 0x84 - t : t - 0x84;
+  }
+  return table;
+}
+
+function buildAlawTable() {
+  const table = new Int16Array(256);
+  for (let i = 0; i < 256; i++) {
+    const a = i ^ 0x55;
+    let t = (a & 0x0f) << 4;
+    const seg = (a & 0x70) >> 4;
+    t = seg === 0 ? t + 8 : (t + 0x108) << (seg - 1);
+    table[i] = a & 0x80 ? t : -t;
+  }
+  return table;
+}
+
+function decodeTable(arrayBuffer, table) {
+  const bytes = new Uint8Array(arrayBuffer);
+  const out = new Int16Array(bytes.length);
+  for (let i = 0; i < bytes.length; i++) {
+    out[i] = table[bytes[i]];
+  }
+  return out;
+}
+
+// IMA ADPCM: independent blocks of [int16 first sample, uint8 step index,
+// uint8 last-nibble-is-padding, 4-bit codes (low nibble first)]
+const ADPCM_BLOCK_BYTES = 68;
+const IMA_STEPS = [
+  7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+  50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+  253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+  1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+  3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442,
+  11487, 12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794,
+  32767,
+];
+const IMA_INDEX_ADJUST = [-1, -1, -1, -1, 2, 4, 6, 8];
+
+function decodeAdpcm(arrayBuffer) {
+  const view = new DataView(arrayBuffer);
+  const total = arrayBuffer.byteLength;
+  let samples = 0;
+  for (let start = 0; start < total; start += ADPCM_BLOCK_BYTES) {
+    const size = Math.min(ADPCM_BLOCK_BYTES, total - start);
+    samples += 1 + 2 * (size - 4) - view.getUint8(start + 3);
+  }
+
+  const out = new Int16Array(samples);
+  let o = 0;
+  for (let start = 0; start < total; start += ADPCM_BLOCK_BYTES) {
+    const end = Math.min(start + ADPCM_BLOCK_BYTES, total);
+    let predictor = view.getInt16(start, true);
+    let index = view.getUint8(start + 2);
+    let nibbles = 2 * (end - start - 4) - view.getUint8(start + 3);
+    out[o++] = predictor;
+
+    for (let i = start + 4; i < end && nibbles > 0; i++) {
+      const byte = view.getUint8(i);
+      for (let shift = 0; shift <= 4 && nibbles > 0; shift += 4, nibbles--) {
+        const code = (byte >> shift) & 0x0f;
+        const step = IMA_STEPS[index];
+        let vpdiff = step >> 3;
+        if (code & 4) vpdiff += step;
+        if (code & 2) vpdiff += step >> 1;
+        if (code & 1) vpdiff += step >> 2;
+        predictor += code & 8 ? -vpdiff : vpdiff;
+        predictor = Math.max(-32768, Math.min(32767, predictor));
+        index = Math.max(0, Math.min(88, index + IMA_INDEX_ADJUST[code & 7]));
+        out[o++] = predictor;
+      }
+    }
+  }
+  return out;
+}
@@ -66,6 +66,8 @@ function updateUI(isRecording, connectionStatus, isLoopback) {
   if (connectionStatus === 'connected') {
     statusIndicator.classList.add('connected');
     statusText.textContent = 'Connected';
+  } else if (connectionStatus === 'reconnecting') {
+    statusText.textContent = 'Reconnecting...';
   } else if (connectionStatus === 'error') {
     statusIndicator.classList.add('error');
     statusText.textContent = 'Connection Error';